@@ -1,30 +1,80 @@
 # app.py
 import os
-from flask import Flask, request, jsonify
+import json
+import base64
+import codecs
+import hashlib
+import time
+from flask import Flask, Blueprint, Response, current_app, request, jsonify, g, has_request_context, make_response, stream_with_context
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_jwt_extended import (
     JWTManager, jwt_required, create_access_token,
-    get_jwt_identity, get_jwt, verify_jwt_in_request
+    get_jwt_identity
 )
 from functools import wraps
-from datetime import datetime, timedelta
-from sqlalchemy import func # For stats count
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_, and_, event # For stats count / keyset filters
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, contains_eager, aliased
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import IntegrityError
 from math import ceil # For pagination calculation
+import click
 
 
 from config import Config
-from models import db, User, Campaign, AdRequest
-
-# --- App Initialization ---
-app = Flask(__name__)
-CORS(app, resources={r"*": {"origins": "http://localhost:5173"}})
-app.config.from_object(Config)
-
-# --- Extension Initialization ---
-db.init_app(app)
-migrate = Migrate(app, db)
-jwt = JWTManager(app)
+from models import db, User, Campaign, AdRequest, NegotiationHistory, CampaignFeedList, CampaignFeedEntry, OPEN_AD_REQUEST_STATUSES
+from counters import CounterSnapshot, rebuild_counters, diff_counters # Registers the counter flush hook
+from rollups import RollupWindow, month_labels, backfill_rollups # Registers the rollup flush hook
+from histograms import histogram, parse_edges, log_edges, quantile_edges, bin_labels, MAX_BINS
+from search import build_match_query, fts_available, matching_influencers, rebuild_search_index # Registers the index sync hook
+from trigrams import trigram_matches, rebuild_trigram_index # Registers the trigram sync hook
+from response_cache import cache, cached_response, cache_stats
+from identity import current_identity, campaign_owner # Registers the identity cache eviction hook
+from passwords import hash_password, verify_password, needs_rehash, PasswordPoolBusy
+import db_profiles # Registers the SQLite pragma hook
+import replicas # Registers the primary-pinning hooks
+from replicas import replica_reads, replica_configured, replica_status, sync_replica
+from moderation import ACTIONS, moderate
+from exports import EXPORT_FIELDS, FORMATS, stream_export
+from user_import import IMPORT_BATCH_SIZE, import_users, read_rows, format_for
+import events # Registers the publish-on-commit hook
+from events import publish_after_commit, event_stream
+from matching import recommend_influencers # Registers the match-index refresh hook
+from feeds import refresh_feeds # Registers the feed sync hook
+import notifications
+from notifications import enqueue_notifications, process_outbox
+
+# --- Extensions (bound to an app in create_app) ---
+cors = CORS()
+migrate = Migrate()
+jwt = JWTManager()
+api = Blueprint('api', __name__, cli_group=None) # CLI commands stay top-level: `flask create-admin`
+
+
+def create_app(config=Config):
+    """Application factory.
+
+    Importing this module performs no I/O: the schema is managed only by migrations
+    (`flask db upgrade`), and extensions bind to the app here without connecting.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+
+    # --- Extension Initialization ---
+    db_profiles.init_app(app)
+    replicas.init_app(app)
+    events.init_app(app)
+    notifications.init_app(app)
+    cors.init_app(app, resources={r"*": {"origins": "http://localhost:5173"}})
+    db.init_app(app)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
+    cache.init_app(app)
+
+    app.register_blueprint(api)
+    return app
 
 
 def serialize_pagination(pagination_obj):
@@ -41,38 +91,186 @@ def serialize_pagination(pagination_obj):
     }
 
 
-# --- Add Negotiation History ---
-class NegotiationHistory(db.Model):
-    __tablename__ = 'negotiation_history'
-    id = db.Column(db.Integer, primary_key=True)
-    ad_request_id = db.Column(db.Integer, db.ForeignKey('ad_requests.id', ondelete='CASCADE'), nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    user_role = db.Column(db.String(20), nullable=False)  # 'sponsor' or 'influencer'
-    action = db.Column(db.String(20), nullable=False)  # 'propose', 'counter', 'accept', 'reject'
-    message = db.Column(db.Text, nullable=True)
-    payment_amount = db.Column(db.Float, nullable=True)
-    requirements = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Relationships
-    ad_request = db.relationship('AdRequest', backref=db.backref('negotiation_history', lazy='dynamic', cascade='all, delete-orphan'))
-    user = db.relationship('User')
-    
-    def __repr__(self):
-        return f'<NegotiationHistory {self.id} AdRequest:{self.ad_request_id} Action:{self.action}>'
+# Search results are counted up to this many matches; larger totals are reported as estimates
+SEARCH_COUNT_LIMIT = 1000
+
+def serialize_estimated_pagination(page, per_page, total, estimated):
+    """serialize_pagination for a hand-paged query whose total may be a capped lower bound."""
+    total_pages = ceil(total / per_page) if total else 0
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages,
+        'total_items': total,
+        'total_estimated': estimated,
+        'has_prev': page > 1,
+        'has_next': page < total_pages or estimated,
+        'prev_num': page - 1 if page > 1 else None,
+        'next_num': page + 1 if page < total_pages or estimated else None
+    }
+
+
+# --- Conditional GET (ETag / Last-Modified) ---
+class Validators:
+    """ETag and Last-Modified for a response, derived from cheap metadata (ids, counts,
+    updated_at) so a 304 can be decided before loading or serializing any rows."""
+
+    def __init__(self, *parts, last_modified=None):
+        self.etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+        # HTTP dates have second precision
+        self.last_modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc) if last_modified else None
+
+    def not_modified(self):
+        """304 response if the request's If-None-Match/If-Modified-Since still match, else None."""
+        if request.if_none_match:
+            fresh = request.if_none_match.contains(self.etag)
+        elif request.if_modified_since and self.last_modified:
+            fresh = self.last_modified <= request.if_modified_since
+        else:
+            fresh = False
+        return self.apply(make_response('', 304)) if fresh else None
+
+    def apply(self, rv):
+        response = make_response(rv)
+        response.set_etag(self.etag)
+        if self.last_modified:
+            response.last_modified = self.last_modified
+        return response
+
+
+# --- Keyset (cursor) Pagination ---
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def get_page_size():
+    """Reads `per_page` from the query string, clamped to [1, MAX_PAGE_SIZE]."""
+    per_page = request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+def encode_cursor(values):
+    """Encodes the sort-key values of the last row on a page into an opaque cursor."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decodes a cursor produced by encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match sort key")
+        return [datetime.fromisoformat(v) if isinstance(col.type, db.DateTime) else v
+                for col, v in zip(columns, values)]
+    except (TypeError, AttributeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def keyset_paginate(query, columns, cursor=None, per_page=DEFAULT_PAGE_SIZE, row_values=None):
+    """Returns (items, next_cursor) for `query` ordered by `columns` descending.
+
+    The last column must be unique (usually the primary key) so the order is total.
+    Seeks past the cursor instead of using OFFSET, so deep pages cost the same as the
+    first one, and never issues a COUNT(*). `row_values(row)` extracts the sort-key
+    values from a result row; by default they are read as attributes named after the columns.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        # Lexicographic "row < cursor" for a descending sort
+        clauses = []
+        for i, col in enumerate(columns):
+            prefix = [columns[j] == values[j] for j in range(i)]
+            clauses.append(and_(*prefix, col < values[i]))
+        query = query.filter(or_(*clauses))
+
+    rows = query.order_by(*[col.desc() for col in columns]).limit(per_page + 1).all()
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        values = row_values(last) if row_values else [getattr(last, col.key) for col in columns]
+        next_cursor = encode_cursor(values)
+    return items, next_cursor
+
+def serialize_cursor_pagination(per_page, next_cursor):
+    """Cursor variant of serialize_pagination (no total count, so no COUNT(*) per page)."""
+    return {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None
+    }
+
+AD_REQUEST_FEED_ORDER = (AdRequest.updated_at, AdRequest.id)
+
+
+# --- Eager Loading for List Queries ---
+# serialize_ad_request_detail reads campaign.name and target_influencer.influencer_name, and
+# serialize_negotiation_history reads user.username. Every list query goes through these so
+# those reads come from the same SELECT instead of one lazy load per row.
+def with_ad_request_relations(query, campaign_joined=False):
+    """Eager-loads the relations serialize_ad_request_detail touches.
+
+    Pass campaign_joined=True when the query already joins Campaign so the existing
+    join is reused instead of adding a second one.
+    """
+    campaign_opt = contains_eager(AdRequest.campaign) if campaign_joined else joinedload(AdRequest.campaign)
+    return query.options(
+        campaign_opt.load_only(Campaign.id, Campaign.name, Campaign.sponsor_id),
+        joinedload(AdRequest.target_influencer).load_only(User.id, User.influencer_name)
+    )
+
+def latest_negotiation_id():
+    """Correlated subquery: id of the most recent NegotiationHistory row of the outer AdRequest.
+
+    Resolved per row through idx_negotiation_request_created, so joining on it fetches the
+    latest action of every ad request on a page in the same statement.
+    """
+    latest = aliased(NegotiationHistory)
+    return db.session.query(latest.id) \
+        .filter(latest.ad_request_id == AdRequest.id) \
+        .order_by(latest.created_at.desc(), latest.id.desc()) \
+        .limit(1).correlate(AdRequest).scalar_subquery()
+
+def with_latest_negotiation(query):
+    """Turns an AdRequest query into (AdRequest, latest NegotiationHistory) rows.
+
+    Ad requests without any history are dropped, matching the summary endpoints.
+    """
+    return with_ad_request_relations(
+        query.add_entity(NegotiationHistory)
+             .join(NegotiationHistory, NegotiationHistory.id == latest_negotiation_id())
+    )
+
+def with_history_relations(query):
+    """Eager-loads the user serialize_negotiation_history touches."""
+    return query.options(joinedload(NegotiationHistory.user).load_only(User.id, User.username))
+
+# --- SQL Statement Counter ---
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_sql_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statement_count = g.get('sql_statement_count', 0) + 1
 
-# Create migration for the new model
-with app.app_context():
-    db.create_all()
+def get_sql_statement_count():
+    """Number of SQL statements executed so far while handling the current request."""
+    return g.get('sql_statement_count', 0)
+
+@api.after_app_request
+def add_sql_statement_count_header(response):
+    if current_app.config.get('SQL_STATEMENT_COUNT_HEADER'):
+        response.headers['X-SQL-Statement-Count'] = str(get_sql_statement_count())
+    return response
+
+# --- Response Cache TTLs (seconds); writes invalidate earlier via generations ---
+SEARCH_CACHE_TTL = 60
+CHART_CACHE_TTL = 300
+PROFILE_CACHE_TTL = 300
 
 # --- Decorators ---
 def role_required(required_role):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            user_role = claims.get('role')
+            # Reuses the token @jwt_required() already decoded for this request
+            user_role = current_identity().role
             # Allow admin access to all role-restricted routes
             if user_role == 'admin':
                 return fn(*args, **kwargs)
@@ -115,6 +313,7 @@ def serialize_ad_request_detail(ad_request):
         'id': ad_request.id, 'campaign_id': ad_request.campaign_id, 'influencer_id': ad_request.influencer_id,
         'initiator_id': ad_request.initiator_id, 'message': ad_request.message, 'requirements': ad_request.requirements,
         'payment_amount': ad_request.payment_amount, 'status': ad_request.status, 'last_offer_by': ad_request.last_offer_by,
+        'version': ad_request.version,
         'created_at': ad_request.created_at.isoformat() if ad_request.created_at else None,
         'updated_at': ad_request.updated_at.isoformat() if ad_request.updated_at else None,
         # Include basic related info (avoid large joins for now)
@@ -122,6 +321,18 @@ def serialize_ad_request_detail(ad_request):
         'influencer_name': ad_request.target_influencer.influencer_name if ad_request.target_influencer else None,
     }
 
+def serialize_latest_action(history_item):
+    return {
+        'user_role': history_item.user_role,
+        'action': history_item.action,
+        'payment_amount': history_item.payment_amount,
+        'created_at': history_item.created_at.isoformat() if history_item.created_at else None,
+    }
+
+def serialize_negotiation_summaries(rows):
+    return [{'ad_request': serialize_ad_request_detail(ad_request), 'latest_action': serialize_latest_action(latest)}
+            for ad_request, latest in rows]
+
 def serialize_negotiation_history(history_item):
     return {
         'id': history_item.id,
@@ -136,42 +347,254 @@ def serialize_negotiation_history(history_item):
         'username': history_item.user.username if history_item.user else None,
     }
 
+# --- Optimistic Concurrency (AdRequest.version) ---
+# Every ORM UPDATE/DELETE of an ad request is conditional on the version it was read at, so
+# of two concurrent negotiation steps only the first changes the row. The other fails at
+# flush, before its history row or notifications are written, and gets a 409.
+def ad_request_conflict(ad_request_id):
+    ad_request = db.session.get(AdRequest, ad_request_id)
+    return jsonify({"message": "Ad Request was changed by someone else; review it and try again",
+                    "ad_request": serialize_ad_request_detail(ad_request) if ad_request else None}), 409
+
+def check_version(ad_request, data):
+    """409 if the client acted on an older `version` of the ad request than the current one."""
+    expected = data.get('version')
+    if expected is not None and str(expected) != str(ad_request.version):
+        return ad_request_conflict(ad_request.id)
+    return None
+
+def save_ad_request(ad_request):
+    """Flushes a change to `ad_request`; returns a 409 response if a concurrent write won."""
+    ad_request_id = ad_request.id
+    try:
+        db.session.flush()
+    except StaleDataError:
+        db.session.rollback()
+        return ad_request_conflict(ad_request_id)
+    return None
+
+# --- Open Ad Request Uniqueness (uq_adrequest_open_pair) ---
+# The partial unique index rejects a second open request for a campaign and influencer, so
+# creation inserts straight away instead of checking with a SELECT first, and concurrent
+# submits cannot both succeed.
+def open_pair_conflict(error):
+    """True if an IntegrityError comes from uq_adrequest_open_pair."""
+    message = str(error.orig)
+    return 'uq_adrequest_open_pair' in message or 'ad_requests.campaign_id, ad_requests.influencer_id' in message
+
+def insert_ad_requests(campaign_id, influencer_ids, make, attempts=3):
+    """Flushes `make(influencer_id)` for every id. Returns (created ad requests, ids that
+    already have an open request).
+
+    Must be the first write of the transaction: on a conflict it is rolled back, the
+    conflicting ids are looked up in one query and the others are inserted again.
+    """
+    remaining, conflicts = list(influencer_ids), set()
+    for _ in range(attempts):
+        created = [make(influencer_id) for influencer_id in remaining]
+        db.session.add_all(created)
+        try:
+            db.session.flush()
+            return created, conflicts
+        except IntegrityError as error:
+            db.session.rollback()
+            if not open_pair_conflict(error): raise
+        taken = {row.influencer_id for row in db.session.query(AdRequest.influencer_id).filter(
+            AdRequest.campaign_id == campaign_id, AdRequest.influencer_id.in_(remaining),
+            AdRequest.status.in_(OPEN_AD_REQUEST_STATUSES))}
+        conflicts |= taken
+        remaining = [influencer_id for influencer_id in remaining if influencer_id not in taken]
+        if not remaining:
+            break
+    else: # Still conflicting with requests that keep appearing and vanishing; report them as taken
+        conflicts.update(remaining)
+    return [], conflicts
+
+# --- Live Updates (see events.py) ---
+def notify_ad_requests(ad_requests, event_type):
+    """Tells the influencer and sponsor of each ad request about a change, as part of the
+    current transaction: a live push to both once it commits, and a queued notification
+    (delivered as a digest) to whichever of them did not make the change. All the queued
+    notifications are written with one executemany."""
+    actor, owners, jobs = get_jwt_identity(), {}, []
+    for ad_request in ad_requests:
+        if ad_request.campaign_id not in owners:
+            owners[ad_request.campaign_id] = campaign_owner(ad_request.campaign_id)
+        parties = {ad_request.influencer_id, owners[ad_request.campaign_id]}
+        payload = {
+            'ad_request_id': ad_request.id, 'campaign_id': ad_request.campaign_id, 'status': ad_request.status,
+            'last_offer_by': ad_request.last_offer_by, 'payment_amount': ad_request.payment_amount,
+            'updated_at': ad_request.updated_at.isoformat() if ad_request.updated_at else None,
+        }
+        publish_after_commit(db.session, parties, event_type, payload)
+        jobs.extend((user_id, event_type, payload) for user_id in parties - {actor})
+    enqueue_notifications(db.session, jobs)
+
+def notify_ad_request(ad_request, event_type):
+    notify_ad_requests([ad_request], event_type)
+
 # --- CLI Command for Admin Creation ---
-@app.cli.command("create-admin")
+@api.cli.command("create-admin")
 def create_admin_command():
     """Creates the admin user from .env variables."""
-    admin_email = Config.ADMIN_EMAIL
-    admin_password = Config.ADMIN_PASSWORD
+    admin_email = current_app.config['ADMIN_EMAIL']
+    admin_password = current_app.config['ADMIN_PASSWORD']
     if not admin_email or not admin_password:
         print("Error: ADMIN_EMAIL and ADMIN_PASSWORD missing in .env")
         return
 
-    with app.app_context():  # Important: establish app context
-        if User.query.filter_by(email=admin_email, role='admin').first():
-            print(f"Admin '{admin_email}' already exists.")
-            return
-
-        admin_user = User(
-            username=Config.ADMIN_USERNAME,  # Use ADMIN_USERNAME from config
-            email=Config.ADMIN_EMAIL,
-            role='admin',
-            is_active=True,
-            sponsor_approved=True
-        )
-        admin_user.set_password(admin_password)
-        db.session.add(admin_user)
-        try:
-            db.session.commit()
-            print(f"Admin user '{admin_email}' created.")
-        except Exception as e:  # Handle potential database errors
-            print(f"Error creating admin user: {e}")
-            db.session.rollback()  # Rollback changes in case of error
+    if User.query.filter_by(email=admin_email, role='admin').first():
+        print(f"Admin '{admin_email}' already exists.")
+        return
+
+    admin_user = User(
+        username=current_app.config['ADMIN_USERNAME'],  # Use ADMIN_USERNAME from config
+        email=admin_email,
+        role='admin',
+        is_active=True,
+        sponsor_approved=True
+    )
+    admin_user.set_password(admin_password)
+    db.session.add(admin_user)
+    try:
+        db.session.commit()
+        print(f"Admin user '{admin_email}' created.")
+    except Exception as e:  # Handle potential database errors
+        print(f"Error creating admin user: {e}")
+        db.session.rollback()  # Rollback changes in case of error
+
+
+@api.cli.command("db-profile")
+def db_profile_command():
+    """Shows the engine profile and the pragmas in effect on a fresh connection."""
+    print(f"Profile: {current_app.config['DB_PROFILE']}")
+    print(f"Engine options: {current_app.config['SQLALCHEMY_ENGINE_OPTIONS']}")
+    with db.engine.connect() as connection:
+        if connection.dialect.name == 'sqlite':
+            for name, value in db_profiles.effective_pragmas(connection).items():
+                print(f"  {name} = {value}")
+
+
+@api.cli.command("sync-replica")
+@click.option('--interval', type=float, default=0, help='Repeat every N seconds (default: sync once).')
+def sync_replica_command(interval):
+    """Stamps the replica heartbeat and, for SQLite files, copies the primary into the replica."""
+    if not replica_configured():
+        print("Error: REPLICA_DATABASE_URL missing in .env")
+        return
+    while True:
+        copied = sync_replica()
+        print(f"{datetime.utcnow():%H:%M:%S} heartbeat stamped" + (", replica copied" if copied else ""))
+        if not interval:
+            break
+        time.sleep(interval)
+
+
+@api.cli.command("import-users")
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, help='Rows per insert batch.')
+@click.option('--rejects', 'rejects_path', type=click.Path(dir_okay=False), help='Write rejected rows here (NDJSON).')
+def import_users_command(path, fmt, batch_size, rejects_path):
+    """Bulk-imports influencers and sponsors from a CSV or NDJSON file."""
+    rejects_file = open(rejects_path, 'w', encoding='utf-8') if rejects_path else None
+
+    def on_reject(number, row, reason):
+        if rejects_file:
+            rejects_file.write(json.dumps({'row': number, 'reason': reason, 'data': row}, default=str) + '\n')
+
+    def on_progress(stats):
+        print(f"{stats.processed} rows: {stats.imported} imported, {stats.rejected} rejected "
+              f"({stats.rows_per_second:.0f} rows/s)")
+
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as stream:
+            stats = import_users(read_rows(stream, fmt or format_for(path)), batch_size, on_reject, on_progress)
+    finally:
+        if rejects_file:
+            rejects_file.close()
+    print(f"Done: {stats.imported} imported, {stats.rejected} rejected.")
+
+
+@api.cli.command("process-notifications")
+@click.option('--loop', is_flag=True, help='Keep running, one round every --interval seconds.')
+@click.option('--interval', type=float, default=10, show_default=True)
+def process_notifications_command(loop, interval):
+    """Delivers due notification digests from the outbox (local stand-in for the Celery worker)."""
+    while True:
+        result = process_outbox()
+        if any(result.values()):
+            print(f"{datetime.utcnow():%H:%M:%S} sent {result['sent']}, retried {result['retried']}, failed {result['failed']}")
+        if not loop:
+            break
+        time.sleep(interval)
+
+
+@api.cli.command("refresh-feeds")
+@click.option('--loop', is_flag=True, help='Keep running, one round every --interval seconds.')
+@click.option('--interval', type=float, default=None, help='Seconds between rounds (default: FEED_REFRESH_SECONDS).')
+def refresh_feeds_command(loop, interval):
+    """Builds missing or expired influencer feeds and folds changed campaigns into the rest
+    (local stand-in for the Celery worker)."""
+    interval = interval if interval is not None else current_app.config['FEED_REFRESH_SECONDS']
+    while True:
+        while True: # Until a round has nothing left to build
+            result = refresh_feeds()
+            if any(result.values()):
+                print(f"{datetime.utcnow():%H:%M:%S} built {result['built']}, refreshed {result['refreshed']}")
+            if not result['built']:
+                break
+        if not loop:
+            break
+        time.sleep(interval)
+
+
+@api.cli.command("rebuild-counters")
+@click.option('--verify', is_flag=True, help="Only report drift between stored and actual counts.")
+def rebuild_counters_command(verify):
+    """Recomputes the platform counters from the users, campaigns and ad_requests tables."""
+    if verify:
+        drift = diff_counters()
+        if not drift:
+            print("Counters are consistent.")
+        for name, (stored, actual) in sorted(drift.items()):
+            print(f"{name}: stored={stored} actual={actual}")
+        return
+    totals = rebuild_counters()
+    print(f"Rebuilt {len(totals)} counters.")
+
+
+@api.cli.command("backfill-rollups")
+def backfill_rollups_command():
+    """Rebuilds the daily chart rollups from the users, campaigns and ad_requests tables."""
+    totals = backfill_rollups()
+    print(f"Backfilled {len(totals)} daily rollup rows.")
+
+
+@api.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Repopulates the influencer full-text search index from the users table."""
+    if not fts_available(db.engine):
+        print("Full-text search index requires SQLite FTS5; nothing to rebuild.")
+        return
+    print(f"Indexed {rebuild_search_index()} influencers.")
+
+
+@api.cli.command("rebuild-user-trigrams")
+def rebuild_user_trigrams_command():
+    """Rebuilds the trigram index used by the admin user search."""
+    print(f"Indexed {rebuild_trigram_index()} users.")
 
 
 # --- Routes ---
 
 # == Authentication ==
-@app.route('/api/register', methods=['POST'])
+def server_busy():
+    response = jsonify({"message": "Server busy, please retry shortly"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@api.route('/api/register', methods=['POST'])
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -193,7 +616,8 @@ def register():
         return jsonify({"message": "Invalid role"}), 400
 
     user = User(username=username, email=email, role=role)  # Store email!
-    user.set_password(password)  # Ensure proper password hashing (see previous responses)
+    try: user.password_hash = hash_password(password)
+    except PasswordPoolBusy: return server_busy()
     message = ""
 
     if role == 'sponsor':
@@ -212,7 +636,7 @@ def register():
     db.session.commit()
     return jsonify({"message": message, "user_id": user.id}), 201  # Return user ID
 
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -231,8 +655,15 @@ def login():
 
 
 
-    if not user or not user.check_password(password):
-        return jsonify({"message": "Invalid credentials"}), 401
+    try:
+        if not user or not verify_password(user.password_hash, password):
+            return jsonify({"message": "Invalid credentials"}), 401
+        # Transparently upgrade hashes made with an older method/cost
+        if needs_rehash(user.password_hash):
+            user.password_hash = hash_password(password)
+            db.session.commit()
+    except PasswordPoolBusy:
+        return server_busy()
 
     # ... (rest of the login logic remains the same)
     if not user.is_active:
@@ -247,15 +678,16 @@ def login():
 
 
 # == Profile Management ==
-@app.route('/api/profile', methods=['GET'])
+@api.route('/api/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
-    user_id = get_jwt_identity()
-    user = db.session.get(User, user_id)
+    user = current_identity().user # Cached snapshot, no query on a warm cache
     if not user: return jsonify({"message": "User not found"}), 404
-    return jsonify(serialize_user_profile(user)), 200
+    validators = Validators('profile', user.id, user.updated_at, last_modified=user.updated_at)
+    if user.updated_at and (not_modified := validators.not_modified()): return not_modified
+    return validators.apply((jsonify(serialize_user_profile(user)), 200))
 
-@app.route('/api/profile', methods=['PUT'])
+@api.route('/api/profile', methods=['PUT'])
 @jwt_required()
 def update_profile():
     user_id = get_jwt_identity()
@@ -278,8 +710,9 @@ def update_profile():
     db.session.commit()
     return jsonify({"message": "Profile updated successfully", "profile": serialize_user_profile(user)}), 200
 
-@app.route('/api/influencers/<int:influencer_id>/profile', methods=['GET'])
+@api.route('/api/influencers/<int:influencer_id>/profile', methods=['GET'])
 @jwt_required() # Any logged-in user can view public profile
+@cached_response(timeout=PROFILE_CACHE_TTL, scopes=('users',))
 def get_public_influencer_profile(influencer_id):
     user = User.query.filter_by(id=influencer_id, role='influencer', is_active=True).first()
     if not user: return jsonify({"message": "Active influencer not found"}), 404
@@ -288,36 +721,53 @@ def get_public_influencer_profile(influencer_id):
                     'niche': user.niche, 'reach': user.reach }), 200
 
 # == Admin Actions ==
-@app.route('/api/admin/stats', methods=['GET'])
+@api.route('/api/admin/cache-stats', methods=['GET'])
 @jwt_required()
 @admin_required
+def get_cache_stats():
+    """Response cache hits/misses per endpoint for this worker process."""
+    return jsonify(cache_stats()), 200
+
+@api.route('/api/admin/replica-status', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_replica_status():
+    """Read-replica lag and routing decisions for this worker process."""
+    return jsonify(replica_status()), 200
+
+@api.route('/api/admin/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+@replica_reads
 def get_admin_stats():
-    # Basic counts - can be expanded with date ranges, etc.
-    total_users = db.session.query(func.count(User.id)).scalar()
-    active_sponsors = User.query.filter_by(role='sponsor', is_active=True, sponsor_approved=True).count()
-    pending_sponsors = User.query.filter_by(role='sponsor', sponsor_approved=False).count()
-    active_influencers = User.query.filter_by(role='influencer', is_active=True).count()
-    public_campaigns = Campaign.query.filter_by(visibility='public').count()
-    private_campaigns = Campaign.query.filter_by(visibility='private').count()
-    flagged_users = User.query.filter_by(is_flagged=True).count()
-    flagged_campaigns = Campaign.query.filter_by(is_flagged=True).count()
-    ad_request_stats = db.session.query(AdRequest.status, func.count(AdRequest.id)).group_by(AdRequest.status).all()
+    # Read from the incrementally maintained counters (one small SELECT, no table scans)
+    counters = CounterSnapshot.load()
+    total_users = counters.count('user')
+    active_sponsors = counters.count('user', role='sponsor', active=True, approved=True)
+    pending_sponsors = counters.count('user', role='sponsor', approved=False)
+    active_influencers = counters.count('user', role='influencer', active=True)
+    public_campaigns = counters.count('campaign', visibility='public')
+    private_campaigns = counters.count('campaign', visibility='private')
+    flagged_users = counters.count('user', flagged=True)
+    flagged_campaigns = counters.count('campaign', flagged=True)
+    ad_request_stats = counters.group('ad_request', 'status')
 
     return jsonify({
         'total_users': total_users, 'active_sponsors': active_sponsors, 'pending_sponsors': pending_sponsors,
         'active_influencers': active_influencers, 'public_campaigns': public_campaigns, 'private_campaigns': private_campaigns,
         'flagged_users': flagged_users, 'flagged_campaigns': flagged_campaigns,
-        'ad_requests_by_status': dict(ad_request_stats)
+        'ad_requests_by_status': ad_request_stats
     }), 200
 
-@app.route('/api/admin/pending_sponsors', methods=['GET'])
+@api.route('/api/admin/pending_sponsors', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
 def admin_get_pending_sponsors():
     pending = User.query.filter_by(role='sponsor', sponsor_approved=False, is_active=True).all()
     return jsonify([serialize_user_profile(user) for user in pending]), 200
 
-@app.route('/api/admin/sponsors/<int:sponsor_id>/approve', methods=['PATCH'])
+@api.route('/api/admin/sponsors/<int:sponsor_id>/approve', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_approve_sponsor(sponsor_id):
@@ -329,7 +779,7 @@ def admin_approve_sponsor(sponsor_id):
     db.session.commit()
     return jsonify({"message": "Sponsor approved"}), 200
 
-@app.route('/api/admin/sponsors/<int:sponsor_id>/reject', methods=['PATCH'])
+@api.route('/api/admin/sponsors/<int:sponsor_id>/reject', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_reject_sponsor(sponsor_id):
@@ -341,7 +791,7 @@ def admin_reject_sponsor(sponsor_id):
     db.session.commit()
     return jsonify({"message": "Sponsor rejected and deactivated"}), 200
 
-@app.route('/api/admin/users/<int:user_id>/flag', methods=['PATCH'])
+@api.route('/api/admin/users/<int:user_id>/flag', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_flag_user(user_id):
@@ -351,7 +801,7 @@ def admin_flag_user(user_id):
     db.session.commit()
     return jsonify({"message": "User flagged"}), 200
 
-@app.route('/api/admin/users/<int:user_id>/unflag', methods=['PATCH'])
+@api.route('/api/admin/users/<int:user_id>/unflag', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_unflag_user(user_id):
@@ -361,7 +811,7 @@ def admin_unflag_user(user_id):
     db.session.commit()
     return jsonify({"message": "User unflagged"}), 200
 
-@app.route('/api/admin/campaigns/<int:campaign_id>/flag', methods=['PATCH'])
+@api.route('/api/admin/campaigns/<int:campaign_id>/flag', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_flag_campaign(campaign_id):
@@ -371,7 +821,7 @@ def admin_flag_campaign(campaign_id):
     db.session.commit()
     return jsonify({"message": "Campaign flagged"}), 200
 
-@app.route('/api/admin/campaigns/<int:campaign_id>/unflag', methods=['PATCH'])
+@api.route('/api/admin/campaigns/<int:campaign_id>/unflag', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_unflag_campaign(campaign_id):
@@ -382,7 +832,7 @@ def admin_unflag_campaign(campaign_id):
     return jsonify({"message": "Campaign unflagged"}), 200
 
 # == Sponsor: Campaign Management ==
-@app.route('/api/sponsor/campaigns', methods=['POST'])
+@api.route('/api/sponsor/campaigns', methods=['POST'])
 @jwt_required()
 @sponsor_required
 def sponsor_create_campaign():
@@ -402,24 +852,34 @@ def sponsor_create_campaign():
     db.session.add(campaign); db.session.commit()
     return jsonify({"message": "Campaign created", "campaign": serialize_campaign_detail(campaign)}), 201
 
-@app.route('/api/sponsor/campaigns', methods=['GET'])
+@api.route('/api/sponsor/campaigns', methods=['GET'])
 @jwt_required()
 @sponsor_required
+@replica_reads
 def sponsor_get_campaigns():
     sponsor_id = get_jwt_identity()
+    count, max_id, last_updated = db.session.query(
+        func.count(Campaign.id), func.max(Campaign.id), func.max(Campaign.updated_at)
+    ).filter(Campaign.sponsor_id == sponsor_id).one()
+    # No Last-Modified here: deleting a campaign does not move max(updated_at), the ETag's count does
+    validators = Validators('sponsor_campaigns', sponsor_id, count, max_id, last_updated)
+    if not_modified := validators.not_modified(): return not_modified
     campaigns = Campaign.query.filter_by(sponsor_id=sponsor_id).order_by(Campaign.created_at.desc()).all()
-    return jsonify([serialize_campaign_detail(c) for c in campaigns]), 200
+    return validators.apply((jsonify([serialize_campaign_detail(c) for c in campaigns]), 200))
 
-@app.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['GET'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['GET'])
 @jwt_required()
 @sponsor_required
 def sponsor_get_campaign(campaign_id):
     sponsor_id = get_jwt_identity()
+    updated_at = db.session.query(Campaign.updated_at).filter_by(id=campaign_id, sponsor_id=sponsor_id).scalar()
+    validators = Validators('campaign', campaign_id, updated_at, last_modified=updated_at)
+    if updated_at and (not_modified := validators.not_modified()): return not_modified
     campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
     if not campaign: return jsonify({"message": "Campaign not found or access denied"}), 404
-    return jsonify(serialize_campaign_detail(campaign)), 200
+    return validators.apply((jsonify(serialize_campaign_detail(campaign)), 200))
 
-@app.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['PUT'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['PUT'])
 @jwt_required()
 @sponsor_required
 def sponsor_update_campaign(campaign_id):
@@ -445,7 +905,7 @@ def sponsor_update_campaign(campaign_id):
     db.session.commit()
     return jsonify({"message": "Campaign updated", "campaign": serialize_campaign_detail(campaign)}), 200
 
-@app.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['DELETE'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>', methods=['DELETE'])
 @jwt_required()
 @sponsor_required
 def sponsor_delete_campaign(campaign_id):
@@ -456,7 +916,7 @@ def sponsor_delete_campaign(campaign_id):
     return jsonify({"message": "Campaign deleted"}), 200
 
 # == Sponsor: Ad Request Management ==
-@app.route('/api/sponsor/campaigns/<int:campaign_id>/ad_requests', methods=['POST'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>/ad_requests', methods=['POST'])
 @jwt_required()
 @sponsor_required
 def sponsor_create_ad_request(campaign_id):
@@ -472,21 +932,13 @@ def sponsor_create_ad_request(campaign_id):
     try: payment = float(data['payment_amount'])
     except (ValueError, TypeError): return jsonify({"message": "Invalid payment amount"}), 400
 
-    # Check if a pending/accepted request already exists for this combo? Optional.
-    existing_request = AdRequest.query.filter_by(
-        campaign_id=campaign.id,
-        influencer_id=influencer.id,
-        status='Pending' # Or status in ['Pending', 'Accepted', 'Negotiating'] ?
-    ).first()
-    if existing_request:
-        return jsonify({"message": "Pending ad request already exists for this influencer on this campaign"}), 409
-
-    ad_request = AdRequest(
-        campaign_id=campaign.id, influencer_id=influencer.id, initiator_id=sponsor_id, last_offer_by='sponsor',
+    created, _ = insert_ad_requests(campaign_id, [influencer.id], lambda influencer_id: AdRequest(
+        campaign_id=campaign_id, influencer_id=influencer_id, initiator_id=sponsor_id, last_offer_by='sponsor',
         message=data.get('message'), requirements=data['requirements'], payment_amount=payment, status='Pending'
-    )
-    db.session.add(ad_request)
-    db.session.flush()  # Get the ad_request ID before committing
+    ))
+    if not created:
+        return jsonify({"message": "Pending ad request already exists for this influencer on this campaign"}), 409
+    ad_request = created[0]
     
     # Create initial history record
     history = NegotiationHistory(
@@ -499,42 +951,120 @@ def sponsor_create_ad_request(campaign_id):
         requirements=data['requirements']
     )
     db.session.add(history)
-    
+    notify_ad_request(ad_request, 'ad_request.created')
+
     db.session.commit()
     return jsonify({"message": "Ad request created", "ad_request": serialize_ad_request_detail(ad_request)}), 201
 
-@app.route('/api/sponsor/ad_requests', methods=['GET']) # Get all ad requests initiated by sponsor
+BULK_AD_REQUEST_LIMIT = 500
+
+@api.route('/api/sponsor/campaigns/<int:campaign_id>/ad_requests/bulk', methods=['POST'])
+@jwt_required()
+@sponsor_required
+def sponsor_bulk_create_ad_requests(campaign_id):
+    """Creates one Pending ad request per influencer id with shared terms, in one transaction.
+    Returns a result per id with the status code the single-item endpoint would have used."""
+    sponsor_id = get_jwt_identity()
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=sponsor_id).first()
+    if not campaign: return jsonify({"message": "Campaign not found/denied"}), 404
+
+    data = request.get_json()
+    required = ['influencer_ids', 'requirements', 'payment_amount']
+    if not all(f in data for f in required): return jsonify({"message": "Missing fields"}), 400
+    influencer_ids = data['influencer_ids']
+    if not isinstance(influencer_ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in influencer_ids):
+        return jsonify({"message": "influencer_ids must be a list of ids"}), 400
+    influencer_ids = list(dict.fromkeys(influencer_ids)) # Drop repeats, keep order
+    if not influencer_ids: return jsonify({"message": "No influencer ids given"}), 400
+    if len(influencer_ids) > BULK_AD_REQUEST_LIMIT:
+        return jsonify({"message": f"At most {BULK_AD_REQUEST_LIMIT} influencers per request"}), 400
+    try: payment = float(data['payment_amount'])
+    except (ValueError, TypeError): return jsonify({"message": "Invalid payment amount"}), 400
+
+    # One set-based lookup each for the influencers and their open requests on this campaign,
+    # instead of queries per influencer; the insert still catches pairs opened since
+    active = {row.id for row in db.session.query(User.id).filter(
+        User.id.in_(influencer_ids), User.role == 'influencer', User.is_active == True)}
+    already_open = {row.influencer_id for row in db.session.query(AdRequest.influencer_id).filter(
+        AdRequest.campaign_id == campaign_id, AdRequest.influencer_id.in_(active),
+        AdRequest.status.in_(OPEN_AD_REQUEST_STATUSES))} if active else set()
+
+    def make(influencer_id):
+        return AdRequest(
+            campaign_id=campaign_id, influencer_id=influencer_id, initiator_id=sponsor_id, last_offer_by='sponsor',
+            message=data.get('message'), requirements=data['requirements'], payment_amount=payment, status='Pending'
+        )
+    # ORM flush for the ad requests so the counter, rollup and cache hooks see them,
+    # then the history rows in a single executemany
+    created, conflicts = insert_ad_requests(
+        campaign_id, [i for i in influencer_ids if i in active and i not in already_open], make)
+    conflicts |= already_open
+
+    created_ids = {ad_request.influencer_id: ad_request.id for ad_request in created}
+    results = []
+    for influencer_id in influencer_ids:
+        if influencer_id not in active:
+            results.append({'influencer_id': influencer_id, 'status': 404, 'message': "Active influencer not found"})
+        elif influencer_id in conflicts:
+            results.append({'influencer_id': influencer_id, 'status': 409,
+                            'message': "Pending ad request already exists for this influencer on this campaign"})
+        else:
+            results.append({'influencer_id': influencer_id, 'status': 201, 'message': "Ad request created",
+                            'ad_request_id': created_ids[influencer_id]})
+
+    if created:
+        db.session.execute(NegotiationHistory.__table__.insert(), [{
+            'ad_request_id': ad_request.id, 'user_id': sponsor_id, 'user_role': 'sponsor', 'action': 'propose',
+            'message': data.get('message'), 'payment_amount': payment, 'requirements': data['requirements'],
+        } for ad_request in created])
+        notify_ad_requests(created, 'ad_request.created')
+        db.session.commit()
+
+    return jsonify({
+        "message": f"{len(created)} of {len(influencer_ids)} ad requests created",
+        "created": len(created), "failed": len(influencer_ids) - len(created), "results": results
+    }), 201 if created else 200
+
+@api.route('/api/sponsor/ad_requests', methods=['GET']) # Get all ad requests initiated by sponsor
 @jwt_required()
 @sponsor_required
+@replica_reads
 def sponsor_get_all_ad_requests():
     sponsor_id = get_jwt_identity()
     status_filter = request.args.get('status')
     campaign_id_filter = request.args.get('campaign_id')
 
     query = AdRequest.query.join(Campaign).filter(Campaign.sponsor_id == sponsor_id) # Filter by sponsor via campaign
+    query = with_ad_request_relations(query, campaign_joined=True)
 
     if status_filter: query = query.filter(AdRequest.status == status_filter)
     if campaign_id_filter:
          try: query = query.filter(AdRequest.campaign_id == int(campaign_id_filter))
          except ValueError: pass
 
-    requests = query.order_by(AdRequest.updated_at.desc()).all()
-    return jsonify([serialize_ad_request_detail(r) for r in requests]), 200
+    per_page = get_page_size()
+    try: requests, next_cursor = keyset_paginate(query, AD_REQUEST_FEED_ORDER, request.args.get('cursor'), per_page)
+    except ValueError: return jsonify({"message": "Invalid cursor"}), 400
+    return jsonify({
+        'ad_requests': [serialize_ad_request_detail(r) for r in requests],
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
 
-@app.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['PUT']) # Sponsor responds to negotiation
+@api.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['PUT']) # Sponsor responds to negotiation
 @jwt_required()
 @sponsor_required
 def sponsor_negotiate_ad_request(ad_request_id):
     sponsor_id = get_jwt_identity()
     ad_request = db.session.get(AdRequest, ad_request_id)
     if not ad_request: return jsonify({"message": "Ad Request not found"}), 404
-    if ad_request.campaign.sponsor_id != sponsor_id: return jsonify({"message": "Access denied"}), 403
+    if not current_identity().owns_campaign(ad_request.campaign_id): return jsonify({"message": "Access denied"}), 403
 
     # Allow sponsor action only if status is 'Negotiating' and last offer was by influencer
     if ad_request.status != 'Negotiating' or ad_request.last_offer_by != 'influencer':
          return jsonify({"message": "Cannot modify request now or not sponsor's turn"}), 400
 
     data = request.get_json()
+    if conflict := check_version(ad_request, data): return conflict
     action = data.get('action') # 'accept' (accept influencer's offer), 'reject', 'negotiate' (counter-offer)
 
     # Create history record
@@ -575,12 +1105,13 @@ def sponsor_negotiate_ad_request(ad_request_id):
         return jsonify({"message": "Invalid action. Use 'accept', 'reject', or 'negotiate'."}), 400
 
     ad_request.updated_at = datetime.utcnow()
+    if conflict := save_ad_request(ad_request): return conflict
+    notify_ad_request(ad_request, 'ad_request.updated')
     db.session.commit()
-    # Add notification logic later
     return jsonify({"message": message, "ad_request": serialize_ad_request_detail(ad_request)}), 200
 
 
-@app.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['DELETE'])
+@api.route('/api/sponsor/ad_requests/<int:ad_request_id>', methods=['DELETE'])
 @jwt_required()
 @sponsor_required
 def sponsor_delete_ad_request(ad_request_id):
@@ -588,25 +1119,34 @@ def sponsor_delete_ad_request(ad_request_id):
     ad_request = db.session.get(AdRequest, ad_request_id)
     if not ad_request: return jsonify({"message": "Ad Request not found"}), 404
     # Check ownership via campaign
-    if ad_request.campaign.sponsor_id != sponsor_id: return jsonify({"message": "Access denied"}), 403
+    if not current_identity().owns_campaign(ad_request.campaign_id): return jsonify({"message": "Access denied"}), 403
     if ad_request.status not in ['Pending', 'Rejected']: return jsonify({"message": "Cannot delete active request"}), 400
 
-    db.session.delete(ad_request); db.session.commit()
+    db.session.delete(ad_request)
+    if conflict := save_ad_request(ad_request): return conflict
+    notify_ad_request(ad_request, 'ad_request.deleted')
+    db.session.commit()
     return jsonify({"message": "Ad Request deleted"}), 200
 
 # == Influencer: Ad Request Management ==
-@app.route('/api/influencer/ad_requests', methods=['GET'])
+@api.route('/api/influencer/ad_requests', methods=['GET'])
 @jwt_required()
 @influencer_required
+@replica_reads
 def influencer_get_ad_requests():
     influencer_id = get_jwt_identity()
     status_filter = request.args.get('status')
-    query = AdRequest.query.filter_by(influencer_id=influencer_id)
+    query = with_ad_request_relations(AdRequest.query.filter_by(influencer_id=influencer_id))
     if status_filter: query = query.filter(AdRequest.status == status_filter)
-    requests = query.order_by(AdRequest.updated_at.desc()).all()
-    return jsonify([serialize_ad_request_detail(r) for r in requests]), 200
+    per_page = get_page_size()
+    try: requests, next_cursor = keyset_paginate(query, AD_REQUEST_FEED_ORDER, request.args.get('cursor'), per_page)
+    except ValueError: return jsonify({"message": "Invalid cursor"}), 400
+    return jsonify({
+        'ad_requests': [serialize_ad_request_detail(r) for r in requests],
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
 
-@app.route('/api/influencer/ad_requests/<int:ad_request_id>', methods=['PATCH'])
+@api.route('/api/influencer/ad_requests/<int:ad_request_id>', methods=['PATCH'])
 @jwt_required()
 @influencer_required
 def influencer_action_ad_request(ad_request_id):
@@ -623,6 +1163,7 @@ def influencer_action_ad_request(ad_request_id):
          return jsonify({"message": f"Cannot action request in status '{ad_request.status}' or not influencer's turn"}), 400
 
     data = request.get_json()
+    if conflict := check_version(ad_request, data): return conflict
     action = data.get('action') # 'accept', 'reject', 'negotiate'
 
     # Create history record
@@ -659,12 +1200,13 @@ def influencer_action_ad_request(ad_request_id):
         return jsonify({"message": "Invalid action. Use 'accept', 'reject', or 'negotiate'."}), 400
 
     ad_request.updated_at = datetime.utcnow()
+    if conflict := save_ad_request(ad_request): return conflict
+    notify_ad_request(ad_request, 'ad_request.updated')
     db.session.commit()
-    # Add notification logic later
     return jsonify({"message": message, "ad_request": serialize_ad_request_detail(ad_request)}), 200
 
 # == Influencer: Apply to Public Campaigns ==
-@app.route('/api/influencer/campaigns/<int:campaign_id>/apply', methods=['POST'])
+@api.route('/api/influencer/campaigns/<int:campaign_id>/apply', methods=['POST'])
 @jwt_required()
 @influencer_required
 def influencer_apply_campaign(campaign_id):
@@ -681,19 +1223,13 @@ def influencer_apply_campaign(campaign_id):
     try: payment = float(payment_amount)
     except (ValueError, TypeError): return jsonify({"message": "Invalid payment amount"}), 400
 
-    # Check if already applied/request exists
-    existing_request = AdRequest.query.filter_by(
-        campaign_id=campaign.id, influencer_id=influencer_id, status='Pending'
-    ).first()
-    if existing_request: return jsonify({"message": "You already have a pending application for this campaign"}), 409
-
-    ad_request = AdRequest(
-        campaign_id=campaign.id, influencer_id=influencer_id, initiator_id=influencer_id, # Influencer initiated
+    created, _ = insert_ad_requests(campaign_id, [influencer_id], lambda influencer_id: AdRequest(
+        campaign_id=campaign_id, influencer_id=influencer_id, initiator_id=influencer_id, # Influencer initiated
         last_offer_by='influencer', message=message, requirements=requirements,
         payment_amount=payment, status='Pending' # Sponsor needs to accept/reject this application
-    )
-    db.session.add(ad_request)
-    db.session.flush()  # Get the ad_request ID before committing
+    ))
+    if not created: return jsonify({"message": "You already have a pending application for this campaign"}), 409
+    ad_request = created[0]
     
     # Create initial history record
     history = NegotiationHistory(
@@ -706,28 +1242,51 @@ def influencer_apply_campaign(campaign_id):
         requirements=requirements
     )
     db.session.add(history)
-    
+    notify_ad_request(ad_request, 'ad_request.created')
+
     db.session.commit()
-    # Add notification to sponsor later
     return jsonify({"message": "Application submitted successfully", "ad_request": serialize_ad_request_detail(ad_request)}), 201
 
 
 # == Search Routes ==
-@app.route('/api/search/influencers', methods=['GET'])
+@api.route('/api/search/influencers', methods=['GET'])
 @jwt_required() # Any logged-in user can search
+@replica_reads
+@cached_response(timeout=SEARCH_CACHE_TTL, scopes=('users',))
 def search_influencers():
+    """Full-text influencer search (`q`, `niche`) ranked by relevance and reach, cursor-paginated."""
     query = User.query.filter_by(role='influencer', is_active=True, is_flagged=False) # Exclude flagged
-    if niche := request.args.get('niche'): query = query.filter(User.niche.ilike(f'%{niche}%'))
     if category := request.args.get('category'): query = query.filter(User.category == category)
     if reach_min_str := request.args.get('reach_min'):
         try: query = query.filter(User.reach >= int(reach_min_str))
         except (ValueError, TypeError): pass
-    # Add pagination later
-    influencers = query.order_by(User.reach.desc()).limit(50).all()
-    return jsonify([serialize_user_profile(i) for i in influencers]), 200
 
-@app.route('/api/search/campaigns', methods=['GET'])
+    terms, niche = request.args.get('q'), request.args.get('niche')
+    match_parts = [m for m in (build_match_query(terms), build_match_query(niche, field='niche')) if m]
+    use_fts = bool(match_parts) and fts_available(db.engine)
+    if use_fts:
+        query, score = matching_influencers(query, ' AND '.join(match_parts))
+        order, row_values = (score, User.id), lambda row: [row.score, row.User.id]
+    else:
+        # No text query (or no FTS5 on this backend): filter with LIKE and order by reach
+        for term, field in ((terms, User.influencer_name), (niche, User.niche)):
+            if term: query = query.filter(field.ilike(f'%{term}%'))
+        reach = func.coalesce(User.reach, 0)
+        order, row_values = (reach, User.id), lambda user: [user.reach or 0, user.id]
+
+    per_page = get_page_size()
+    try: rows, next_cursor = keyset_paginate(query, order, request.args.get('cursor'), per_page, row_values)
+    except ValueError: return jsonify({"message": "Invalid cursor"}), 400
+    influencers = [row.User for row in rows] if use_fts else rows
+    return jsonify({
+        'influencers': [serialize_user_profile(i) for i in influencers],
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
+
+@api.route('/api/search/campaigns', methods=['GET'])
 @jwt_required() # Any logged-in user can search public campaigns
+@replica_reads
+@cached_response(timeout=SEARCH_CACHE_TTL, scopes=('campaigns',))
 def search_campaigns():
     query = Campaign.query.filter_by(visibility='public', is_flagged=False) # Exclude flagged
     if budget_min_str := request.args.get('budget_min'):
@@ -738,50 +1297,123 @@ def search_campaigns():
     campaigns = query.order_by(Campaign.created_at.desc()).limit(50).all()
     return jsonify([serialize_campaign_detail(c) for c in campaigns]), 200
 
+# == Influencer: Campaign Feed (see feeds.py) ==
+@api.route('/api/influencer/feed', methods=['GET'])
+@jwt_required()
+@influencer_required
+@replica_reads
+def influencer_campaign_feed():
+    """Public campaigns ranked for the caller (`budget_min`), cursor-paginated. Reads the list
+    `refresh_feeds` maintains; `building` is set until the first one has been built."""
+    influencer_id = get_jwt_identity()
+    query = db.session.query(Campaign, CampaignFeedEntry.score) \
+        .join(CampaignFeedEntry, CampaignFeedEntry.campaign_id == Campaign.id) \
+        .filter(CampaignFeedEntry.influencer_id == influencer_id,
+                Campaign.visibility == 'public', Campaign.is_flagged == False)
+    if budget_min_str := request.args.get('budget_min'):
+        try: query = query.filter(Campaign.budget >= float(budget_min_str))
+        except (ValueError, TypeError): pass
+
+    per_page = get_page_size()
+    try: rows, next_cursor = keyset_paginate(query, (CampaignFeedEntry.score, CampaignFeedEntry.campaign_id),
+                                             request.args.get('cursor'), per_page, lambda row: [row.score, row.Campaign.id])
+    except ValueError: return jsonify({"message": "Invalid cursor"}), 400
+    return jsonify({
+        'campaigns': [{**serialize_campaign_detail(campaign), 'score': score} for campaign, score in rows],
+        'building': not rows and db.session.get(CampaignFeedList, influencer_id) is None,
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
+
+# == Recommendations (see matching.py) ==
+MAX_RECOMMENDATIONS = 100
+
+@api.route('/api/sponsor/campaigns/<int:campaign_id>/recommendations', methods=['GET'])
+@jwt_required()
+@sponsor_required
+@replica_reads
+def sponsor_campaign_recommendations(campaign_id):
+    """Best-matching active influencers for a campaign (`limit`, default 20) with their score breakdown."""
+    campaign = Campaign.query.filter_by(id=campaign_id, sponsor_id=get_jwt_identity()).first()
+    if not campaign: return jsonify({"message": "Campaign not found or access denied"}), 404
+    limit = max(1, min(request.args.get('limit', 20, type=int), MAX_RECOMMENDATIONS))
+
+    ranked = recommend_influencers(campaign, limit)
+    ids = [user_id for user_id, _, _ in ranked] or [0]
+    users = {user.id: user for user in User.query.filter(User.id.in_(ids))}
+    requested = {user_id for (user_id,) in db.session.query(AdRequest.influencer_id)
+                 .filter(AdRequest.campaign_id == campaign_id, AdRequest.influencer_id.in_(ids))}
+    return jsonify({'campaign_id': campaign_id, 'recommendations': [
+        {**serialize_user_profile(users[user_id]), 'score': score, 'score_components': components,
+         'already_requested': user_id in requested}
+        for user_id, score, components in ranked if user_id in users
+    ]}), 200
+
 # == ChartJS Data Endpoints ==
-@app.route('/api/charts/user-growth', methods=['GET'])
+DISTRIBUTION_COLORS = [
+    (255, 99, 132),
+    (54, 162, 235),
+    (255, 206, 86),
+    (75, 192, 192),
+    (153, 102, 255),
+]
+DEFAULT_BUDGET_EDGES = [0, 1000, 5000, 10000, 50000, float('inf')]
+
+def histogram_chart(column, query, default_edges=DEFAULT_BUDGET_EDGES, prefix=''):
+    """Pie/Doughnut ChartJS payload for a one-pass histogram of `column`.
+
+    Query params: `bins` (explicit edges, e.g. '0,1000,5000,inf'), or `scale` = 'log' or
+    'quantile' with `bin_count` (default 5). Without them `default_edges` is used.
+    """
+    bin_count = request.args.get('bin_count', 5, type=int)
+    scale = request.args.get('scale')
+    try:
+        if not 1 <= bin_count <= MAX_BINS: raise ValueError("bin_count out of range")
+        if bins := request.args.get('bins'): edges = parse_edges(bins)
+        elif scale == 'log': edges = log_edges(column, bin_count, query)
+        elif scale == 'quantile': edges = quantile_edges(column, bin_count, query)
+        elif scale: raise ValueError("Unknown scale")
+        else: edges = default_edges
+    except ValueError as e:
+        return jsonify({"message": f"Invalid histogram parameters: {e}"}), 400
+
+    counts = histogram(column, edges, query)
+    colors = [DISTRIBUTION_COLORS[i % len(DISTRIBUTION_COLORS)] for i in range(len(counts))]
+    chart_data = {
+        'labels': bin_labels(edges, prefix),
+        'edges': [None if edge in (float('inf'), float('-inf')) else edge for edge in edges], # open ends
+        'datasets': [{
+            'data': counts,
+            'backgroundColor': ['rgba(%d, %d, %d, 0.6)' % c for c in colors],
+            'borderColor': ['rgba(%d, %d, %d, 1)' % c for c in colors],
+            'borderWidth': 1
+        }]
+    }
+    return jsonify(chart_data), 200
+
+def get_chart_window():
+    """(start, end) datetimes covering the last `months` months (default 6)."""
+    months = request.args.get('months', 6, type=int)
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=30 * months)
+    return start_date, end_date
+
+@api.route('/api/charts/user-growth', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('users',))
 def chart_user_growth():
     """Returns time-series data of user registrations for ChartJS"""
     # Get time period from query params (default: last 6 months)
-    months = int(request.args.get('months', 6))
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30 * months)
-    
-    # Query users by role and registration date
-    influencers_by_month = db.session.query(
-        func.strftime('%Y-%m', User.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        User.role == 'influencer',
-        User.created_at >= start_date,
-        User.created_at <= end_date
-    ).group_by('month').order_by('month').all()
-    
-    sponsors_by_month = db.session.query(
-        func.strftime('%Y-%m', User.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        User.role == 'sponsor',
-        User.created_at >= start_date,
-        User.created_at <= end_date
-    ).group_by('month').order_by('month').all()
+    start_date, end_date = get_chart_window()
+    rollups = RollupWindow.load(start_date, end_date)
     
     # Generate all months in range (for complete labels even if no data)
-    all_months = []
-    current = start_date.replace(day=1)
-    while current <= end_date:
-        all_months.append(current.strftime('%Y-%m'))
-        # Move to next month
-        if current.month == 12:
-            current = current.replace(year=current.year + 1, month=1)
-        else:
-            current = current.replace(month=current.month + 1)
+    all_months = month_labels(start_date, end_date)
     
-    # Convert query results to dict for easier lookup
-    inf_data = {m: c for m, c in influencers_by_month}
-    spo_data = {m: c for m, c in sponsors_by_month}
+    # Monthly totals from the daily rollups
+    inf_data = rollups.monthly('user', role='influencer')
+    spo_data = rollups.monthly('user', role='sponsor')
     
     # Format data for ChartJS
     chart_data = {
@@ -804,72 +1436,43 @@ def chart_user_growth():
     
     return jsonify(chart_data), 200
 
-@app.route('/api/charts/campaign-distribution', methods=['GET'])
+@api.route('/api/charts/campaign-distribution', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('campaigns',))
 def chart_campaign_distribution():
     """Returns budget distribution data of campaigns for ChartJS"""
-    # Define budget ranges for grouping
-    ranges = [
-        (0, 1000),
-        (1000, 5000),
-        (5000, 10000),
-        (10000, 50000),
-        (50000, float('inf'))
-    ]
-    
-    range_labels = [
-        'Under $1K',
-        '$1K-$5K',
-        '$5K-$10K',
-        '$10K-$50K',
-        'Over $50K'
-    ]
-    
-    # Count campaigns in each budget range
-    counts = []
-    for i, (min_val, max_val) in enumerate(ranges):
-        if max_val == float('inf'):
-            count = Campaign.query.filter(Campaign.budget >= min_val).count()
-        else:
-            count = Campaign.query.filter(Campaign.budget >= min_val, Campaign.budget < max_val).count()
-        counts.append(count)
-    
-    # Prepare data for ChartJS Pie/Doughnut chart
-    chart_data = {
-        'labels': range_labels,
-        'datasets': [{
-            'data': counts,
-            'backgroundColor': [
-                'rgba(255, 99, 132, 0.6)',
-                'rgba(54, 162, 235, 0.6)',
-                'rgba(255, 206, 86, 0.6)',
-                'rgba(75, 192, 192, 0.6)',
-                'rgba(153, 102, 255, 0.6)',
-            ],
-            'borderColor': [
-                'rgba(255, 99, 132, 1)',
-                'rgba(54, 162, 235, 1)',
-                'rgba(255, 206, 86, 1)',
-                'rgba(75, 192, 192, 1)',
-                'rgba(153, 102, 255, 1)',
-            ],
-            'borderWidth': 1
-        }]
-    }
-    
-    return jsonify(chart_data), 200
+    return histogram_chart(Campaign.budget, Campaign.query, prefix='$')
 
-@app.route('/api/charts/ad-request-status', methods=['GET'])
+@api.route('/api/charts/payment-distribution', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('ad_requests',))
+def chart_payment_distribution():
+    """Returns payment amount distribution of ad requests for ChartJS"""
+    return histogram_chart(AdRequest.payment_amount, AdRequest.query, prefix='$')
+
+@api.route('/api/charts/reach-distribution', methods=['GET'])
+@jwt_required()
+@admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('users',))
+def chart_reach_distribution():
+    """Returns reach distribution of influencers for ChartJS"""
+    return histogram_chart(User.reach, User.query.filter_by(role='influencer'),
+                           default_edges=[0, 1000, 10000, 100000, 1000000, float('inf')])
+
+@api.route('/api/charts/ad-request-status', methods=['GET'])
+@jwt_required()
+@admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('ad_requests',))
 def chart_ad_request_status():
     """Returns distribution of ad request statuses for ChartJS"""
     # Get counts by status
-    status_counts = db.session.query(
-        AdRequest.status,
-        func.count().label('count')
-    ).group_by(AdRequest.status).all()
+    status_counts = CounterSnapshot.load().group('ad_request', 'status').items()
     
     # Convert to lists for ChartJS
     statuses = [status for status, _ in status_counts]
@@ -899,48 +1502,23 @@ def chart_ad_request_status():
     
     return jsonify(chart_data), 200
 
-@app.route('/api/charts/campaign-activity', methods=['GET'])
+@api.route('/api/charts/campaign-activity', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('campaigns', 'ad_requests'))
 def chart_campaign_activity():
     """Returns time-series data of campaign creation and ad requests for ChartJS"""
     # Get time period from query params (default: last 6 months)
-    months = int(request.args.get('months', 6))
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30 * months)
-    
-    # Query campaigns by creation date
-    campaigns_by_month = db.session.query(
-        func.strftime('%Y-%m', Campaign.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        Campaign.created_at >= start_date,
-        Campaign.created_at <= end_date
-    ).group_by('month').order_by('month').all()
-    
-    # Query ad requests by creation date
-    requests_by_month = db.session.query(
-        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        AdRequest.created_at >= start_date,
-        AdRequest.created_at <= end_date
-    ).group_by('month').order_by('month').all()
+    start_date, end_date = get_chart_window()
+    rollups = RollupWindow.load(start_date, end_date)
     
     # Generate all months in range
-    all_months = []
-    current = start_date.replace(day=1)
-    while current <= end_date:
-        all_months.append(current.strftime('%Y-%m'))
-        # Move to next month
-        if current.month == 12:
-            current = current.replace(year=current.year + 1, month=1)
-        else:
-            current = current.replace(month=current.month + 1)
+    all_months = month_labels(start_date, end_date)
     
-    # Convert query results to dict for easier lookup
-    camp_data = {m: c for m, c in campaigns_by_month}
-    req_data = {m: c for m, c in requests_by_month}
+    # Monthly totals from the daily rollups
+    camp_data = rollups.monthly('campaign')
+    req_data = rollups.monthly('ad_request')
     
     # Format data for ChartJS
     chart_data = {
@@ -965,49 +1543,23 @@ def chart_campaign_activity():
     
     return jsonify(chart_data), 200
 
-@app.route('/api/charts/conversion-rates', methods=['GET'])
+@api.route('/api/charts/conversion-rates', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('ad_requests',))
 def chart_conversion_rates():
     """Returns conversion rates from ad requests to accepted partnerships"""
     # Get time period from query params (default: last 6 months)
-    months = int(request.args.get('months', 6))
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=30 * months)
-    
-    # Group by month and count total requests
-    total_by_month = db.session.query(
-        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        AdRequest.created_at >= start_date,
-        AdRequest.created_at <= end_date
-    ).group_by('month').order_by('month').all()
-    
-    # Group by month and count accepted requests
-    accepted_by_month = db.session.query(
-        func.strftime('%Y-%m', AdRequest.created_at).label('month'),
-        func.count().label('count')
-    ).filter(
-        AdRequest.created_at >= start_date,
-        AdRequest.created_at <= end_date,
-        AdRequest.status == 'Accepted'
-    ).group_by('month').order_by('month').all()
+    start_date, end_date = get_chart_window()
+    rollups = RollupWindow.load(start_date, end_date)
     
     # Generate all months in range
-    all_months = []
-    current = start_date.replace(day=1)
-    while current <= end_date:
-        all_months.append(current.strftime('%Y-%m'))
-        # Move to next month
-        if current.month == 12:
-            current = current.replace(year=current.year + 1, month=1)
-        else:
-            current = current.replace(month=current.month + 1)
+    all_months = month_labels(start_date, end_date)
     
-    # Convert query results to dict for easier lookup
-    total_data = {m: c for m, c in total_by_month}
-    accepted_data = {m: c for m, c in accepted_by_month}
+    # Monthly totals from the daily rollups
+    total_data = rollups.monthly('ad_request')
+    accepted_data = rollups.monthly('ad_request', status='Accepted')
     
     # Calculate conversion rates (as percentage)
     conversion_rates = []
@@ -1033,28 +1585,32 @@ def chart_conversion_rates():
     
     return jsonify(chart_data), 200
 
-@app.route('/api/charts/dashboard-summary', methods=['GET'])
+@api.route('/api/charts/dashboard-summary', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
+@cached_response(timeout=CHART_CACHE_TTL, scopes=('users', 'campaigns', 'ad_requests'))
 def chart_dashboard_summary():
     """Returns summarized data for dashboard charts"""
+    counters = CounterSnapshot.load()
+
     # Get stats for different user types
-    total_influencers = User.query.filter_by(role='influencer').count()
-    active_influencers = User.query.filter_by(role='influencer', is_active=True).count()
+    total_influencers = counters.count('user', role='influencer')
+    active_influencers = counters.count('user', role='influencer', active=True)
     
-    total_sponsors = User.query.filter_by(role='sponsor').count()
-    approved_sponsors = User.query.filter_by(role='sponsor', sponsor_approved=True).count()
+    total_sponsors = counters.count('user', role='sponsor')
+    approved_sponsors = counters.count('user', role='sponsor', approved=True)
     
     # Get campaign stats
-    public_campaigns = Campaign.query.filter_by(visibility='public').count()
-    private_campaigns = Campaign.query.filter_by(visibility='private').count()
+    public_campaigns = counters.count('campaign', visibility='public')
+    private_campaigns = counters.count('campaign', visibility='private')
     
     # Get ad request stats
-    total_requests = AdRequest.query.count()
-    accepted_requests = AdRequest.query.filter_by(status='Accepted').count()
-    pending_requests = AdRequest.query.filter_by(status='Pending').count()
-    rejected_requests = AdRequest.query.filter_by(status='Rejected').count()
-    negotiating_requests = AdRequest.query.filter_by(status='Negotiating').count()
+    total_requests = counters.count('ad_request')
+    accepted_requests = counters.count('ad_request', status='Accepted')
+    pending_requests = counters.count('ad_request', status='Pending')
+    rejected_requests = counters.count('ad_request', status='Rejected')
+    negotiating_requests = counters.count('ad_request', status='Negotiating')
     
     # Prepare data for multiple chart types
     chart_data = {
@@ -1102,29 +1658,63 @@ def chart_dashboard_summary():
     
     return jsonify(chart_data), 200
 
+# == Live Updates ==
+@api.route('/api/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string']) # EventSource cannot set headers: ?jwt=<token>
+def stream_events():
+    """Server-Sent Events for the caller's ad requests: ad_request.created/updated/deleted, and
+    `resync` when events since Last-Event-ID were lost. Reconnects resume from Last-Event-ID."""
+    config = current_app.config
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    # The generator outlives the request context, so everything it needs is bound here
+    stream = event_stream(events.get_broker(), get_jwt_identity(), last_id,
+                          config['EVENT_HEARTBEAT_SECONDS'], config['EVENT_STREAM_MAX_SECONDS'])
+    response = Response(stream, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # Don't let nginx buffer the stream
+    return response
+
+
 # == Negotiation History Endpoints ==
-@app.route('/api/ad_requests/<int:ad_request_id>/history', methods=['GET'])
+@api.route('/api/ad_requests/<int:ad_request_id>/history', methods=['GET'])
 @jwt_required()
+@replica_reads
 def get_negotiation_history(ad_request_id):
     """Get negotiation history for an ad request (available to both parties involved)"""
-    user_id = get_jwt_identity()
-    user_role = get_jwt().get('role')
+    identity = current_identity()
+    user_id, user_role = identity.user_id, identity.role
     
-    # Find the ad request
-    ad_request = db.session.get(AdRequest, ad_request_id)
-    if not ad_request:
+    # Find the ad request (access-check columns and validator metadata only)
+    meta = db.session.query(
+        AdRequest.influencer_id, AdRequest.updated_at, Campaign.sponsor_id, Campaign.updated_at.label('campaign_updated_at'),
+        User.updated_at.label('influencer_updated_at')
+    ).join(Campaign, AdRequest.campaign_id == Campaign.id).join(User, AdRequest.influencer_id == User.id) \
+     .filter(AdRequest.id == ad_request_id).first()
+    if not meta:
         return jsonify({"message": "Ad request not found"}), 404
     
     # Check if user is authorized to view this history (either the sponsor or the influencer)
-    is_sponsor = user_role == 'sponsor' and ad_request.campaign.sponsor_id == user_id
-    is_influencer = user_role == 'influencer' and ad_request.influencer_id == user_id
+    is_sponsor = user_role == 'sponsor' and meta.sponsor_id == user_id
+    is_influencer = user_role == 'influencer' and meta.influencer_id == user_id
     is_admin = user_role == 'admin'
     
     if not (is_sponsor or is_influencer or is_admin):
         return jsonify({"message": "You are not authorized to view this negotiation history"}), 403
+
+    history_count, history_max_id = db.session.query(
+        func.count(NegotiationHistory.id), func.max(NegotiationHistory.id)
+    ).filter(NegotiationHistory.ad_request_id == ad_request_id).one()
+    validators = Validators('history', ad_request_id, meta.updated_at, meta.campaign_updated_at,
+                            meta.influencer_updated_at, history_count, history_max_id,
+                            last_modified=max(filter(None, (meta.updated_at, meta.campaign_updated_at,
+                                                            meta.influencer_updated_at)), default=None))
+    if not_modified := validators.not_modified(): return not_modified
+
+    ad_request = with_ad_request_relations(AdRequest.query.filter_by(id=ad_request_id)).one()
     
     # Get history sorted by creation date
-    history = NegotiationHistory.query.filter_by(ad_request_id=ad_request_id).order_by(NegotiationHistory.created_at).all()
+    history = with_history_relations(NegotiationHistory.query.filter_by(ad_request_id=ad_request_id)) \
+        .order_by(NegotiationHistory.created_at).all()
     
     # Include ad request details for context
     result = {
@@ -1132,11 +1722,12 @@ def get_negotiation_history(ad_request_id):
         'history': [serialize_negotiation_history(item) for item in history]
     }
     
-    return jsonify(result), 200
+    return validators.apply((jsonify(result), 200))
 
-@app.route('/api/sponsor/campaigns/<int:campaign_id>/negotiation_summary', methods=['GET'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>/negotiation_summary', methods=['GET'])
 @jwt_required()
 @sponsor_required
+@replica_reads
 def sponsor_campaign_negotiation_summary(campaign_id):
     """Get summary of negotiations for a sponsor's campaign"""
     sponsor_id = get_jwt_identity()
@@ -1146,66 +1737,77 @@ def sponsor_campaign_negotiation_summary(campaign_id):
     if not campaign:
         return jsonify({"message": "Campaign not found or access denied"}), 404
     
-    # Get all ad requests for this campaign
-    ad_requests = AdRequest.query.filter_by(campaign_id=campaign_id).all()
-    
-    # For each ad request, get the latest negotiation history
-    results = []
-    for ad_request in ad_requests:
-        latest_history = NegotiationHistory.query.filter_by(ad_request_id=ad_request.id).order_by(NegotiationHistory.created_at.desc()).first()
-        
-        if latest_history:
-            results.append({
-                'ad_request': serialize_ad_request_detail(ad_request),
-                'latest_action': {
-                    'user_role': latest_history.user_role,
-                    'action': latest_history.action,
-                    'payment_amount': latest_history.payment_amount,
-                    'created_at': latest_history.created_at.isoformat() if latest_history.created_at else None,
-                }
-            })
-    
-    return jsonify(results), 200
+    query = with_latest_negotiation(AdRequest.query.filter_by(campaign_id=campaign_id))
+
+    # Page through ad requests together with their latest negotiation action (one statement per page)
+    per_page = get_page_size()
+    try:
+        rows, next_cursor = keyset_paginate(
+            query, AD_REQUEST_FEED_ORDER, request.args.get('cursor'), per_page,
+            row_values=lambda row: [row[0].updated_at, row[0].id])
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
 
-@app.route('/api/influencer/negotiations', methods=['GET'])
+    return jsonify({
+        'negotiations': serialize_negotiation_summaries(rows),
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
+
+@api.route('/api/influencer/negotiations', methods=['GET'])
 @jwt_required()
 @influencer_required
+@replica_reads
 def influencer_negotiations():
     """Get all negotiations the influencer is involved in"""
     influencer_id = get_jwt_identity()
     
-    # Get all ad requests where this user is the influencer
-    ad_requests = AdRequest.query.filter_by(influencer_id=influencer_id).all()
-    
-    # For each ad request, get the latest negotiation
-    results = []
-    for ad_request in ad_requests:
-        latest_history = NegotiationHistory.query.filter_by(ad_request_id=ad_request.id).order_by(NegotiationHistory.created_at.desc()).first()
-        
-        if latest_history:
-            results.append({
-                'ad_request': serialize_ad_request_detail(ad_request),
-                'latest_action': {
-                    'user_role': latest_history.user_role,
-                    'action': latest_history.action,
-                    'payment_amount': latest_history.payment_amount,
-                    'created_at': latest_history.created_at.isoformat() if latest_history.created_at else None,
-                }
-            })
-    
-    return jsonify(results), 200
+    query = with_latest_negotiation(AdRequest.query.filter_by(influencer_id=influencer_id))
+
+    # Page through ad requests together with their latest negotiation action (one statement per page)
+    per_page = get_page_size()
+    try:
+        rows, next_cursor = keyset_paginate(
+            query, AD_REQUEST_FEED_ORDER, request.args.get('cursor'), per_page,
+            row_values=lambda row: [row[0].updated_at, row[0].id])
+    except ValueError:
+        return jsonify({"message": "Invalid cursor"}), 400
+
+    return jsonify({
+        'negotiations': serialize_negotiation_summaries(rows),
+        'pagination': serialize_cursor_pagination(per_page, next_cursor)
+    }), 200
 
 # Simple Health Check
-@app.route('/api/health', methods=['GET'])
+@api.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "OK"}), 200
 
 
 # == Admin Actions (Additions/Modifications) ==
 
-@app.route('/api/admin/users', methods=['GET'])
+def filter_users(query, role=None, flagged=None, status=None):
+    """Applies the admin user-list filters: role, flagged (bool) and status."""
+    if role and role in ['sponsor', 'influencer']:
+        query = query.filter(User.role == role)
+
+    if flagged is not None:
+        query = query.filter(User.is_flagged == flagged)
+
+    if status:
+        if status == 'active':
+            query = query.filter(User.is_active == True)
+        elif status == 'inactive':
+            query = query.filter(User.is_active == False)
+        elif status == 'pending_approval':
+            query = query.filter(User.role == 'sponsor', User.sponsor_approved == False, User.is_active == True)
+        elif status == 'approved':
+             query = query.filter(User.role == 'sponsor', User.sponsor_approved == True, User.is_active == True)
+    return query
+
+@api.route('/api/admin/users', methods=['GET'])
 @jwt_required()
 @admin_required
+@replica_reads
 def admin_list_users():
     """List and search users with filters and pagination."""
     try:
@@ -1219,32 +1821,24 @@ def admin_list_users():
         query = User.query.filter(User.role != 'admin') # Exclude admin itself
 
         # Apply Filters
-        if role_filter and role_filter in ['sponsor', 'influencer']:
-            query = query.filter(User.role == role_filter)
-
-        if flagged_filter is not None:
-            query = query.filter(User.is_flagged == (flagged_filter.lower() == 'true'))
-
-        if status_filter:
-            if status_filter == 'active':
-                query = query.filter(User.is_active == True)
-            elif status_filter == 'inactive':
-                query = query.filter(User.is_active == False)
-            elif status_filter == 'pending_approval':
-                query = query.filter(User.role == 'sponsor', User.sponsor_approved == False, User.is_active == True)
-            elif status_filter == 'approved':
-                 query = query.filter(User.role == 'sponsor', User.sponsor_approved == True, User.is_active == True)
-
-        # Apply Search (simple search on username, sponsor/influencer name)
-        if search_term:
-            search_like = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    User.username.ilike(search_like),
-                    User.company_name.ilike(search_like),
-                    User.influencer_name.ilike(search_like)
-                )
-            )
+        flagged = None if flagged_filter is None else flagged_filter.lower() == 'true'
+        query = filter_users(query, role_filter, flagged, status_filter)
+
+        # Apply Search (trigram index over username, sponsor/influencer name; typo tolerant)
+        matches = trigram_matches(search_term) if search_term else None
+        if matches is not None:
+            query = query.join(matches, matches.c.user_id == User.id) \
+                         .order_by(matches.c.hits.desc(), User.created_at.desc())
+            page, per_page = max(page, 1), max(1, min(per_page, MAX_PAGE_SIZE))
+            users = query.limit(per_page).offset((page - 1) * per_page).all()
+            # Count at most SEARCH_COUNT_LIMIT matches; beyond that the total is a lower bound
+            total = db.session.query(func.count()).select_from(
+                query.order_by(None).limit(SEARCH_COUNT_LIMIT + 1).subquery()).scalar()
+            return jsonify({
+                'users': [serialize_user_profile(user) for user in users],
+                'pagination': serialize_estimated_pagination(page, per_page, min(total, SEARCH_COUNT_LIMIT),
+                                                             estimated=total > SEARCH_COUNT_LIMIT)
+            }), 200
 
         # Apply Sorting (optional, e.g., by creation date or username)
         query = query.order_by(User.created_at.desc())
@@ -1262,7 +1856,7 @@ def admin_list_users():
         return jsonify({"message": "An error occurred while fetching users."}), 500
 
 
-@app.route('/api/admin/users/<int:user_id>/deactivate', methods=['PATCH'])
+@api.route('/api/admin/users/<int:user_id>/deactivate', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_deactivate_user(user_id):
@@ -1276,7 +1870,7 @@ def admin_deactivate_user(user_id):
     db.session.commit()
     return jsonify({"message": "User deactivated successfully"}), 200
 
-@app.route('/api/admin/users/<int:user_id>/activate', methods=['PATCH'])
+@api.route('/api/admin/users/<int:user_id>/activate', methods=['PATCH'])
 @jwt_required()
 @admin_required
 def admin_activate_user(user_id):
@@ -1295,16 +1889,152 @@ def admin_activate_user(user_id):
     return jsonify({"message": "User activated successfully"}), 200
 
 
+# == Admin: Bulk User Import ==
+IMPORT_REJECTS_LIMIT = 1000 # Rejected rows listed in the response; the count is always exact
+
+@api.route('/api/admin/users/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def admin_import_users():
+    """Bulk-imports users from an uploaded CSV/NDJSON `file` (format from the extension or
+    the `format` field). Same validation as register; sponsors still need approval."""
+    upload = request.files.get('file')
+    if not upload: return jsonify({"message": "No file uploaded"}), 400
+    fmt = request.form.get('format') or format_for(upload.filename)
+    if fmt not in ('csv', 'ndjson'): return jsonify({"message": "format must be csv or ndjson"}), 400
+    batch_size = max(1, min(request.form.get('batch_size', IMPORT_BATCH_SIZE, type=int), 5000))
+
+    rejects = []
+    def on_reject(number, row, reason):
+        if len(rejects) < IMPORT_REJECTS_LIMIT:
+            rejects.append({'row': number, 'reason': reason, 'data': row})
+
+    def on_progress(stats):
+        current_app.logger.info("User import: %s", stats.as_dict())
+
+    stats = import_users(read_rows(codecs.iterdecode(upload.stream, 'utf-8-sig'), fmt), batch_size, on_reject, on_progress)
+    return jsonify({
+        "message": f"{stats.imported} users imported, {stats.rejected} rejected", **stats.as_dict(),
+        "rejects": rejects, "rejects_truncated": stats.rejected > len(rejects)
+    }), 200
+
+
+# == Admin: Bulk Moderation ==
+def bulk_moderation_target(data, model, filter_query):
+    """(action, ids) from a bulk moderation body with either `ids` or a `filter` object,
+    or (None, error response)."""
+    action = data.get('action')
+    if action not in ACTIONS[model]:
+        return None, (jsonify({"message": f"Unknown action, expected one of: {', '.join(ACTIONS[model])}"}), 400)
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return None, (jsonify({"message": "ids must be a list of ids"}), 400)
+        return action, list(dict.fromkeys(ids))
+    filters = data.get('filter')
+    if not isinstance(filters, dict) or not filters:
+        return None, (jsonify({"message": "Provide ids or a non-empty filter"}), 400)
+    query = filter_query(filters)
+    if query is None: return None, (jsonify({"message": "Invalid filter"}), 400)
+    return action, [row.id for row in query]
+
+def user_filter_query(filters):
+    flagged = filters.get('flagged')
+    if isinstance(flagged, str): flagged = flagged.lower() == 'true'
+    query = filter_users(db.session.query(User.id).filter(User.role != 'admin'),
+                         filters.get('role'), flagged, filters.get('status'))
+    if filters.get('search'):
+        matches = trigram_matches(filters['search'])
+        if matches is None: return None
+        query = query.join(matches, matches.c.user_id == User.id)
+    return query
+
+def campaign_filter_query(filters):
+    query = db.session.query(Campaign.id)
+    if filters.get('visibility') in ('public', 'private'): query = query.filter(Campaign.visibility == filters['visibility'])
+    if filters.get('flagged') is not None: query = query.filter(Campaign.is_flagged == bool(filters['flagged']))
+    if filters.get('sponsor_id') is not None: query = query.filter(Campaign.sponsor_id == filters['sponsor_id'])
+    if filters.get('search'): query = query.filter(Campaign.name.ilike(f"%{filters['search']}%"))
+    return query
+
+def bulk_moderate(model, filter_query):
+    action, ids = bulk_moderation_target(request.get_json() or {}, model, filter_query)
+    if action is None: return ids # Error response
+    affected = moderate(model, action, ids)
+    db.session.commit()
+    return jsonify({"message": f"{action}: {affected} of {len(ids)} updated", "action": action,
+                    "matched": len(ids), "affected": affected}), 200
+
+@api.route('/api/admin/users/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+def admin_bulk_moderate_users():
+    """flag/unflag/activate/deactivate/approve/reject users by `ids` or `filter`
+    (role, flagged, status, search). Only rows the action changes are counted."""
+    return bulk_moderate(User, user_filter_query)
+
+@api.route('/api/admin/campaigns/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+def admin_bulk_moderate_campaigns():
+    """flag/unflag campaigns by `ids` or `filter` (visibility, flagged, sponsor_id, search)."""
+    return bulk_moderate(Campaign, campaign_filter_query)
+
+
 # Keep existing flag/unflag endpoints as they are functionally correct [1]
-# @app.route('/api/admin/users/<int:user_id>/flag', methods=['PATCH']) ...
-# @app.route('/api/admin/users/<int:user_id>/unflag', methods=['PATCH']) ...
+# @api.route('/api/admin/users/<int:user_id>/flag', methods=['PATCH']) ...
+# @api.route('/api/admin/users/<int:user_id>/unflag', methods=['PATCH']) ...
+
+
+# == Exports ==
+def parse_export_date(value, end=False):
+    """ISO date/datetime from a query arg; a bare `to` date includes that whole day."""
+    parsed = datetime.fromisoformat(value)
+    return parsed + timedelta(days=1) if end and len(value) == 10 else parsed
+
+def export_response(dataset, sponsor_id=None):
+    """Streams `dataset` as CSV (default) or NDJSON, gzipped with ?gzip=1. Filters:
+    campaign_id, status, from, to (created_at, ISO dates)."""
+    if dataset not in EXPORT_FIELDS: return jsonify({"message": "Unknown export"}), 404
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS: return jsonify({"message": "format must be csv or ndjson"}), 400
+    try:
+        start = parse_export_date(request.args['from']) if request.args.get('from') else None
+        end = parse_export_date(request.args['to'], end=True) if request.args.get('to') else None
+    except ValueError: return jsonify({"message": "Invalid date, expected YYYY-MM-DD"}), 400
+    gzip = request.args.get('gzip') == '1'
+
+    chunks = stream_export(dataset, fmt, gzip=gzip, sponsor_id=sponsor_id,
+                           campaign_id=request.args.get('campaign_id', type=int),
+                           status=request.args.get('status'), start=start, end=end)
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d}.{fmt}" + ('.gz' if gzip else '')
+    response = Response(stream_with_context(chunks), mimetype='application/gzip' if gzip else FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@api.route('/api/admin/export/<dataset>', methods=['GET'])
+@jwt_required()
+@admin_required
+@replica_reads
+def admin_export(dataset):
+    """Exports ad_requests or negotiation_history across all campaigns."""
+    return export_response(dataset)
+
+@api.route('/api/sponsor/export/<dataset>', methods=['GET'])
+@jwt_required()
+@sponsor_required
+@replica_reads
+def sponsor_export(dataset):
+    """Exports ad_requests or negotiation_history of the sponsor's own campaigns."""
+    return export_response(dataset, sponsor_id=get_jwt_identity())
 
 
 # == Sponsor: Handling Influencer Applications ==
 
-@app.route('/api/sponsor/campaigns/<int:campaign_id>/applications', methods=['GET'])
+@api.route('/api/sponsor/campaigns/<int:campaign_id>/applications', methods=['GET'])
 @jwt_required()
 @sponsor_required
+@replica_reads
 def sponsor_get_campaign_applications(campaign_id):
     """Get AdRequests initiated by influencers for a specific campaign."""
     sponsor_id = get_jwt_identity()
@@ -1320,7 +2050,7 @@ def sponsor_get_campaign_applications(campaign_id):
     per_page = request.args.get('per_page', 10, type=int)
 
     # Query AdRequests for this campaign initiated by influencers
-    query = AdRequest.query.filter(
+    query = with_ad_request_relations(AdRequest.query).filter(
         AdRequest.campaign_id == campaign_id,
         AdRequest.initiator_id == AdRequest.influencer_id # Ensure influencer started it
     )
@@ -1336,7 +2066,7 @@ def sponsor_get_campaign_applications(campaign_id):
         'pagination': serialize_pagination(pagination)
     }), 200
 
-@app.route('/api/sponsor/applications/<int:ad_request_id>/accept', methods=['PATCH'])
+@api.route('/api/sponsor/applications/<int:ad_request_id>/accept', methods=['PATCH'])
 @jwt_required()
 @sponsor_required
 def sponsor_accept_application(ad_request_id):
@@ -1347,7 +2077,7 @@ def sponsor_accept_application(ad_request_id):
     if not ad_request:
         return jsonify({"message": "Application (Ad Request) not found"}), 404
     # Verify ownership via campaign
-    if ad_request.campaign.sponsor_id != sponsor_id:
+    if not current_identity().owns_campaign(ad_request.campaign_id):
         return jsonify({"message": "Access denied"}), 403
     # Verify it's a pending application initiated by the influencer
     if not (ad_request.status == 'Pending' and ad_request.initiator_id == ad_request.influencer_id):
@@ -1367,16 +2097,16 @@ def sponsor_accept_application(ad_request_id):
         requirements=ad_request.requirements
     )
     db.session.add(history)
+    if conflict := save_ad_request(ad_request): return conflict
+    notify_ad_request(ad_request, 'ad_request.updated')
     db.session.commit()
 
-    # Add notification logic here if implemented
-
     return jsonify({
         "message": "Influencer application accepted",
         "ad_request": serialize_ad_request_detail(ad_request)
     }), 200
 
-@app.route('/api/sponsor/applications/<int:ad_request_id>/reject', methods=['PATCH'])
+@api.route('/api/sponsor/applications/<int:ad_request_id>/reject', methods=['PATCH'])
 @jwt_required()
 @sponsor_required
 def sponsor_reject_application(ad_request_id):
@@ -1387,7 +2117,7 @@ def sponsor_reject_application(ad_request_id):
     if not ad_request:
         return jsonify({"message": "Application (Ad Request) not found"}), 404
     # Verify ownership via campaign
-    if ad_request.campaign.sponsor_id != sponsor_id:
+    if not current_identity().owns_campaign(ad_request.campaign_id):
         return jsonify({"message": "Access denied"}), 403
     # Verify it's a pending application initiated by the influencer
     if not (ad_request.status == 'Pending' and ad_request.initiator_id == ad_request.influencer_id):
@@ -1407,8 +2137,8 @@ def sponsor_reject_application(ad_request_id):
         requirements=ad_request.requirements
     )
     db.session.add(history)
+    if conflict := save_ad_request(ad_request): return conflict
+    notify_ad_request(ad_request, 'ad_request.updated')
     db.session.commit()
 
-    # Add notification logic here if implemented
-
     return jsonify({"message": "Influencer application rejected"}), 200
@@ -0,0 +1,182 @@
+# bench_concurrency.py
+"""Concurrency benchmark for the database engine profiles (see db_profiles.py).
+
+For each profile, a scratch SQLite file is migrated and seeded with one sponsor, and one
+influencer with a negotiating ad request per thread. Each thread then runs the real routes
+for a fixed time. It mixes ad-request list reads with counter-offers, which alternate
+between the influencer's PATCH and the sponsor's PUT. Every write takes the database's
+single write lock, so the threads contend the way negotiation bursts do in production.
+
+Reported per profile:
+- throughput of reads and writes;
+- failed requests, e.g. "database is locked";
+- request latency percentiles;
+- lock-wait percentiles. This is the time taken by the first write statement of each
+  transaction, which is when SQLite acquires the write lock and where busy_timeout waits.
+
+Usage: python bench_concurrency.py [--profiles wal,default] [--threads 8] [--seconds 10] [--write-ratio 0.3]
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from sqlalchemy import event
+
+from app import create_app
+from config import Config
+from db_profiles import PROFILES
+from models import db, User, Campaign, AdRequest
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _ms(samples):
+    return ' '.join(f"p{p}={percentile(samples, p) * 1000:.1f}ms" for p in (50, 95, 99)) + \
+        f" max={max(samples, default=0) * 1000:.1f}ms"
+
+
+def _seed(threads):
+    """One sponsor, one campaign, and per thread an influencer with a negotiating ad request
+    awaiting their answer. Returns [(ad request id, influencer id)] and the sponsor."""
+    sponsor = User(username='bench_sponsor', email='bench_sponsor@example.com', password_hash='x',
+                   role='sponsor', sponsor_approved=True, company_name='Bench')
+    db.session.add(sponsor)
+    db.session.flush()
+    campaign = Campaign(name='Benchmark', budget=100000, visibility='public', sponsor_id=sponsor.id)
+    db.session.add(campaign)
+    db.session.flush()
+    pairs = []
+    for n in range(threads):
+        influencer = User(username=f'bench_influencer_{n}', email=f'bench_influencer_{n}@example.com',
+                          password_hash='x', role='influencer', category='Tech', niche='Gadgets', reach=1000)
+        db.session.add(influencer)
+        db.session.flush()
+        ad_request = AdRequest(campaign_id=campaign.id, influencer_id=influencer.id, initiator_id=sponsor.id,
+                               requirements='One post', payment_amount=1000, status='Negotiating', last_offer_by='sponsor')
+        db.session.add(ad_request)
+        db.session.flush()
+        pairs.append((ad_request.id, influencer))
+    db.session.commit()
+    return pairs, sponsor
+
+def _track_lock_waits(engine, waits):
+    """Appends to `waits` the duration of the first write statement of every transaction."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if not conn.info.get('writing') and statement.lstrip().upper().startswith(WRITES):
+            conn.info['write_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop('write_started', None)
+        if started is not None:
+            waits.append(time.perf_counter() - started)
+            conn.info['writing'] = True
+
+    @event.listens_for(engine, 'handle_error')
+    def failed(context):
+        started = context.connection.info.pop('write_started', None) if context.connection is not None else None
+        if started is not None:
+            waits.append(time.perf_counter() - started)
+
+    @event.listens_for(engine, 'commit')
+    @event.listens_for(engine, 'rollback')
+    def ended(conn):
+        conn.info.pop('writing', None)
+
+
+def run_profile(profile, threads, seconds, write_ratio):
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+            DB_PROFILE = profile
+            DB_POOL_SIZE = threads
+            REPLICA_DATABASE_URL = None
+            EVENT_BROKER = 'memory'
+        app = create_app(BenchConfig)
+        app.logger.disabled = True # Failed requests are counted, not logged
+        waits, latencies, counts, failures = [], {'read': [], 'write': []}, {'read': 0, 'write': 0}, {}
+        with app.app_context():
+            upgrade(directory=MIGRATIONS)
+            pairs, sponsor = _seed(threads)
+            sponsor_auth = {'Authorization': 'Bearer ' + create_access_token(identity=sponsor.id, additional_claims={'role': 'sponsor'})}
+            work = [(ad_request_id, {'Authorization': 'Bearer ' + create_access_token(
+                identity=influencer.id, additional_claims={'role': 'influencer'})}) for ad_request_id, influencer in pairs]
+            _track_lock_waits(db.engine, waits)
+
+        start = threading.Barrier(threads + 1)
+        lock = threading.Lock()
+
+        def worker(ad_request_id, influencer_auth):
+            client, turn, offer = app.test_client(), 'influencer', 1000
+            rng = random.Random(ad_request_id)
+            start.wait()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                kind = 'write' if rng.random() < write_ratio else 'read'
+                began = time.perf_counter()
+                if kind == 'read':
+                    status = client.get('/api/influencer/ad_requests', headers=influencer_auth).status_code
+                else:
+                    offer += 1
+                    body = {'action': 'negotiate', 'payment_amount': offer}
+                    if turn == 'influencer':
+                        status = client.patch(f'/api/influencer/ad_requests/{ad_request_id}', json=body,
+                                              headers=influencer_auth).status_code
+                    else:
+                        status = client.put(f'/api/sponsor/ad_requests/{ad_request_id}', json=body,
+                                            headers=sponsor_auth).status_code
+                    if status == 200:
+                        turn = 'sponsor' if turn == 'influencer' else 'influencer'
+                elapsed = time.perf_counter() - began
+                with lock:
+                    latencies[kind].append(elapsed)
+                    if status == 200:
+                        counts[kind] += 1
+                    else:
+                        failures[status] = failures.get(status, 0) + 1
+
+        pool = [threading.Thread(target=worker, args=item) for item in work]
+        for thread in pool:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"== {profile} ({threads} threads, {seconds}s, {write_ratio:.0%} writes)")
+    print(f"  throughput: {(counts['read'] + counts['write']) / elapsed:.1f} req/s "
+          f"(reads {counts['read'] / elapsed:.1f}/s, writes {counts['write'] / elapsed:.1f}/s)")
+    print(f"  failed: {sum(failures.values())}" + (f" {failures}" if failures else ''))
+    print(f"  read latency:  {_ms(latencies['read'])}")
+    print(f"  write latency: {_ms(latencies['write'])}")
+    print(f"  lock wait:     {_ms(waits)} over {len(waits)} transactions")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Read/negotiation-write benchmark per DB_PROFILE.')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma-separated profiles (default: all).')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3, help='Share of operations that are writes.')
+    args = parser.parse_args()
+    for name in args.profiles.split(','):
+        if name not in PROFILES:
+            parser.error(f"Unknown profile {name!r}, expected one of {', '.join(PROFILES)}")
+        run_profile(name, args.threads, args.seconds, args.write_ratio)
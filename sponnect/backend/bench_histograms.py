@@ -0,0 +1,111 @@
+# bench_histograms.py
+"""Histogram benchmark (see histograms.py).
+
+Seeds a scratch SQLite file with one sponsor and --rows campaigns whose budgets are
+log-normally spread between tens and millions of dollars, then times, on the default
+campaign-budget bins:
+- `histogram`: one scan with a conditional COUNT per inner edge;
+- one COUNT query per bin, as the chart endpoints used to run (five for the defaults);
+- `log_edges` and `quantile_edges` followed by `histogram`, the `scale` variants.
+Both ways of counting are checked to agree before anything is reported.
+
+Usage: python bench_histograms.py [--rows 1000000] [--repeats 5]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from flask_migrate import upgrade
+
+from app import create_app, DEFAULT_BUDGET_EDGES
+from config import Config
+from histograms import histogram, log_edges, quantile_edges
+from models import db, User, Campaign
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+INSERT_BATCH = 50_000
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _ms(samples):
+    return ' '.join(f"p{p}={percentile(samples, p) * 1000:.1f}ms" for p in (50, 95)) + \
+        f" max={max(samples, default=0) * 1000:.1f}ms"
+
+
+def _seed(rows):
+    sponsor = User(username='bench_sponsor', email='bench_sponsor@example.com', password_hash='x',
+                   role='sponsor', sponsor_approved=True, company_name='Bench')
+    db.session.add(sponsor)
+    db.session.commit()
+    rng, now, campaigns = random.Random(1), datetime.utcnow(), Campaign.__table__
+    for start in range(0, rows, INSERT_BATCH):
+        db.session.execute(campaigns.insert(), [
+            {'name': f'Campaign {n}', 'budget': round(rng.lognormvariate(8.5, 1.5), 2), 'visibility': 'public',
+             'is_flagged': False, 'start_date': now, 'created_at': now, 'updated_at': now, 'sponsor_id': sponsor.id}
+            for n in range(start, min(rows, start + INSERT_BATCH))])
+        db.session.commit()
+
+def _per_bin_counts(column, edges, query):
+    counts = []
+    for low, high in zip(edges, edges[1:]):
+        bin_query = query.filter(column >= low)
+        if high != float('inf'):
+            bin_query = bin_query.filter(column < high)
+        counts.append(bin_query.count())
+    return counts
+
+def _time(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - began)
+    return samples, result
+
+
+def run(rows, repeats):
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+            REPLICA_DATABASE_URL = None
+            EVENT_BROKER = 'memory'
+        app = create_app(BenchConfig)
+        with app.app_context():
+            upgrade(directory=MIGRATIONS)
+            began = time.perf_counter()
+            _seed(rows)
+            seeded = time.perf_counter() - began
+            column, edges = Campaign.budget, DEFAULT_BUDGET_EDGES
+
+            one_pass, counts = _time(lambda: histogram(column, edges, Campaign.query), repeats)
+            per_bin, expected = _time(lambda: _per_bin_counts(column, edges, Campaign.query), repeats)
+            if counts != expected:
+                raise SystemExit(f"histogram {counts} != per-bin counts {expected}")
+            log_scale, _ = _time(lambda: histogram(column, log_edges(column, 5, Campaign.query), Campaign.query), repeats)
+            quantile_scale, _ = _time(
+                lambda: histogram(column, quantile_edges(column, 5, Campaign.query), Campaign.query), repeats)
+            db.session.remove()
+            db.engine.dispose()
+
+    print(f"== {rows} campaigns (seeded in {seeded:.1f}s), bins {edges}, {repeats} repeats")
+    print(f"  counts:                     {counts}")
+    print(f"  histogram (one scan):       {_ms(one_pass)}")
+    print(f"  COUNT per bin ({len(edges) - 1} queries):  {_ms(per_bin)}")
+    print(f"  log_edges + histogram:      {_ms(log_scale)}")
+    print(f"  quantile_edges + histogram: {_ms(quantile_scale)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='One-scan histogram vs one COUNT query per bin.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeats)
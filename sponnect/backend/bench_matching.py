@@ -0,0 +1,82 @@
+# bench_matching.py
+"""Ranking benchmark for the recommendation index (see matching.py).
+
+Fills a MatchIndex with synthetic influencers, without a database: categories and niches
+drawn from a vocabulary of a few thousand words, log-normal reach, random acceptance
+counts, and a typical fee for most of them. Then times `rank` for campaigns of a few
+words, the way the recommendations route calls it once the index is loaded.
+
+Reported:
+- the fill and posting-list build times;
+- rank latency percentiles, for campaigns matching common and rare words;
+- the same with REINDEX_FRACTION of the rows changed since the build, the worst case
+  before the posting lists are rebuilt.
+
+Usage: python bench_matching.py [--rows 1000000] [--calls 200] [--k 20]
+"""
+import argparse
+import itertools
+import random
+import time
+
+import matching
+from matching import MatchIndex
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _ms(samples):
+    return ' '.join(f"p{p}={percentile(samples, p) * 1000:.1f}ms" for p in (50, 95, 99)) + \
+        f" max={max(samples, default=0) * 1000:.1f}ms"
+
+
+def _profile(rng, words, weights):
+    # Zipfian word choice: the most common word is in about one profile in six
+    pick = lambda: rng.choices(words, cum_weights=weights)[0]
+    return (pick(), ' '.join(pick() for _ in range(rng.randint(1, 4))), int(rng.lognormvariate(8, 2)),
+            rng.randrange(20), rng.randrange(20), None if rng.random() < 0.2 else rng.uniform(50, 5000),
+            rng.random() > 0.05)
+
+def _time_ranks(index, rng, words, calls, k):
+    samples = []
+    for _ in range(calls):
+        text = ' '.join(rng.choice(words[:50] if rng.random() < 0.5 else words) for _ in range(rng.randint(3, 12)))
+        began = time.perf_counter()
+        index._rank(text, rng.uniform(100, 10000), k)
+        samples.append(time.perf_counter() - began)
+    return samples
+
+
+def run(rows, calls, k):
+    rng = random.Random(1)
+    words = [f'word{n:04d}' for n in range(5000)]
+    weights = list(itertools.accumulate(1 / (n + 1) for n in range(len(words))))
+    index = MatchIndex()
+    began = time.perf_counter()
+    for user_id in range(1, rows + 1):
+        index._set_row(user_id, *_profile(rng, words, weights))
+    filled = time.perf_counter() - began
+    began = time.perf_counter()
+    index._build_postings()
+    built = time.perf_counter() - began
+
+    print(f"== {rows} rows, {len(index._vocab)} tokens, k={k}")
+    print(f"  fill: {filled:.1f}s  posting lists: {built * 1000:.0f}ms")
+    index._rank('warm up', 1000, k)
+    print(f"  rank:                  {_ms(_time_ranks(index, rng, words, calls, k))}")
+    for user_id in rng.sample(range(1, rows + 1), int(matching.REINDEX_FRACTION * rows)):
+        index._set_row(user_id, *_profile(rng, words, weights))
+    print(f"  rank, {len(index._changed)} rows changed: {_ms(_time_ranks(index, rng, words, calls, k))}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MatchIndex ranking benchmark on synthetic influencers.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--k', type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.calls, args.k)
@@ -0,0 +1,112 @@
+# bench_passwords.py
+"""Login-throughput benchmark for the password pool (see passwords.py).
+
+For each PASSWORD_POOL_WORKERS value, a fresh pool is started and a fixed number of
+client threads call `verify_password` back to back for a fixed time, the way concurrent
+logins do. Calls rejected with PasswordPoolBusy are what the login route answers with a
+503 with Retry-After: 1, so a shed client waits --retry-after seconds before its next
+login.
+
+Reported per pool size:
+- verified logins per second, in total and per CPU core;
+- the share of calls shed with a 503;
+- latency percentiles of the verified calls, queueing included.
+
+Usage: python bench_passwords.py [--workers 1,2,4] [--threads 64] [--seconds 10] [--max-queue 32]
+                                 [--iterations 260000] [--retry-after 1]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import passwords
+from app import create_app
+from config import Config
+from passwords import PasswordPoolBusy, hash_password, verify_password
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _ms(samples):
+    return ' '.join(f"p{p}={percentile(samples, p) * 1000:.1f}ms" for p in (50, 95, 99)) + \
+        f" max={max(samples, default=0) * 1000:.1f}ms"
+
+
+def _reset_pool():
+    """Drops the process-wide pool so the next call sizes a new one from the config."""
+    if passwords._pool is not None:
+        passwords._pool.shutdown(wait=True)
+    passwords._pool = passwords._slots = None
+
+
+def run_workers(workers, threads, seconds, max_queue, iterations, retry_after):
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(directory, 'bench.db')
+            REPLICA_DATABASE_URL = None
+            EVENT_BROKER = 'memory'
+            PASSWORD_POOL_WORKERS = workers
+            PASSWORD_POOL_MAX_QUEUE = max_queue
+            PASSWORD_HASH_ITERATIONS = iterations
+        app = create_app(BenchConfig)
+        _reset_pool()
+        with app.app_context():
+            password_hash = hash_password('correct horse battery staple')
+
+        start = threading.Barrier(threads + 1)
+        lock = threading.Lock()
+        latencies, shed = [], [0]
+
+        def client():
+            with app.app_context():
+                start.wait()
+                deadline = time.perf_counter() + seconds
+                while time.perf_counter() < deadline:
+                    began = time.perf_counter()
+                    try:
+                        verify_password(password_hash, 'correct horse battery staple')
+                    except PasswordPoolBusy:
+                        with lock:
+                            shed[0] += 1
+                        time.sleep(retry_after)
+                        continue
+                    elapsed = time.perf_counter() - began
+                    with lock:
+                        latencies.append(elapsed)
+
+        pool = [threading.Thread(target=client) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - began
+        _reset_pool()
+
+    cores = os.cpu_count() or 1
+    calls = len(latencies) + shed[0]
+    print(f"== {workers} workers, queue {max_queue} ({threads} threads, {seconds}s, {cores} cores, {iterations} iterations)")
+    print(f"  verified: {len(latencies) / elapsed:.1f} logins/s ({len(latencies) / elapsed / cores:.1f} logins/s/core)")
+    print(f"  shed (503): {shed[0]} of {calls} calls ({shed[0] / calls if calls else 0:.1%})")
+    print(f"  latency: {_ms(latencies)}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='verify_password throughput and 503 shedding per pool size.')
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1, 2 * (os.cpu_count() or 1)})),
+                        help='Comma-separated PASSWORD_POOL_WORKERS values (default: 1, 2, cores, 2x cores).')
+    parser.add_argument('--threads', type=int, default=64, help='Concurrent clients.')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--max-queue', type=int, default=Config.PASSWORD_POOL_MAX_QUEUE)
+    parser.add_argument('--iterations', type=int, default=Config.PASSWORD_HASH_ITERATIONS)
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Seconds a shed client waits, as the 503 asks.')
+    args = parser.parse_args()
+    for workers in args.workers.split(','):
+        run_workers(int(workers), args.threads, args.seconds, args.max_queue, args.iterations, args.retry_after)
@@ -0,0 +1,95 @@
+# bench_startup.py
+"""Cold-start benchmark for the application factory.
+
+Each command runs in a fresh interpreter, so module imports, create_app() and the first
+request or CLI command are timed the way a new worker process or a deploy hook pays
+them. The database is a scratch SQLite file, migrated once and copied before every run,
+so `flask create-admin` creates the admin each time instead of finding it.
+
+Commands:
+- import: `import app`, the cost of the module imports alone;
+- health: create_app() and one GET /api/health through the test client;
+- create-admin: `flask create-admin`, which also hashes the admin password.
+
+Reported per command: wall-clock percentiles over the runs, and failed runs.
+
+Usage: python bench_startup.py [--runs 10] [--commands import,health,create-admin]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from flask_migrate import upgrade
+
+from app import create_app
+from config import Config
+from models import db
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS = os.path.join(BACKEND, 'migrations')
+COMMANDS = {
+    'import': [sys.executable, '-c', 'import app'],
+    'health': [sys.executable, '-c', "from app import create_app; "
+               "assert create_app().test_client().get('/api/health').status_code == 200"],
+    'create-admin': [sys.executable, '-m', 'flask', 'create-admin'],
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+def _ms(samples):
+    return ' '.join(f"p{p}={percentile(samples, p) * 1000:.1f}ms" for p in (50, 95, 99)) + \
+        f" max={max(samples, default=0) * 1000:.1f}ms"
+
+
+def _migrated_database(directory):
+    path = os.path.join(directory, 'template.db')
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+        REPLICA_DATABASE_URL = None
+        EVENT_BROKER = 'memory'
+    app = create_app(BenchConfig)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        db.engine.dispose()
+    return path
+
+def run_command(name, runs, template, directory):
+    database = os.path.join(directory, 'bench.db')
+    env = dict(os.environ, FLASK_APP='app.py', DATABASE_URL='sqlite:///' + database, REPLICA_DATABASE_URL='')
+    samples, failures = [], []
+    for _ in range(runs):
+        shutil.copy(template, database)
+        began = time.perf_counter()
+        result = subprocess.run(COMMANDS[name], cwd=BACKEND, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - began
+        if result.returncode == 0 and 'Error' not in result.stdout:
+            samples.append(elapsed)
+        else:
+            failures.append((result.stdout + result.stderr).strip().splitlines()[-1:])
+
+    print(f"== {name} ({runs} runs)")
+    print(f"  wall clock: {_ms(samples)}")
+    print(f"  failed: {len(failures)}" + (f" {failures[0]}" if failures else ''))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fresh-process timings of app import, first request and create-admin.')
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--commands', default=','.join(COMMANDS), help='Comma-separated commands (default: all).')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        template = _migrated_database(directory)
+        for name in args.commands.split(','):
+            if name not in COMMANDS:
+                parser.error(f"Unknown command {name!r}, expected one of {', '.join(COMMANDS)}")
+            run_command(name, args.runs, template, directory)
@@ -14,9 +14,65 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(BASE_DIR, 'sponnect_app.db') # Changed DB name
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine profile (see db_profiles.py): 'wal' (default), 'durable' or 'default'
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'wal')
+    SQLITE_PRAGMAS = os.environ.get('SQLITE_PRAGMAS', '') # Overrides, e.g. "synchronous=FULL,busy_timeout=10000"
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800)) # Server databases only
+
+    # Read replica for @replica_reads views (see replicas.py); unset = everything uses the primary
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG', 10)) # seconds; beyond this reads go to the primary
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 15)) # read-your-writes window after a commit
+    REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('REPLICA_LAG_CHECK_INTERVAL', 1))
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES_HOURS', 1)))
 
     ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@sponnect.com')
     ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'password')
     DEBUG = os.environ.get('FLASK_DEBUG') == '1'
+    # Adds X-SQL-Statement-Count to every response (for N+1 checks in tests/dev)
+    SQL_STATEMENT_COUNT_HEADER = os.environ.get('SQL_STATEMENT_COUNT_HEADER') == '1'
+
+    # Response cache (see response_cache.py). Use CACHE_TYPE=RedisCache + CACHE_REDIS_URL
+    # to share the cache and its invalidation generations across workers.
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'response_cache.LRUCache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    CACHE_THRESHOLD = int(os.environ.get('CACHE_THRESHOLD', 2000))
+
+    # Live updates over SSE (see events.py). EVENT_BROKER=redis shares events across workers.
+    EVENT_BROKER = os.environ.get('EVENT_BROKER', 'memory')
+    EVENT_REDIS_URL = os.environ.get('EVENT_REDIS_URL') or os.environ.get('CACHE_REDIS_URL')
+    EVENT_BUFFER_SIZE = int(os.environ.get('EVENT_BUFFER_SIZE', 100)) # events kept per user for Last-Event-ID resume
+    EVENT_HEARTBEAT_SECONDS = int(os.environ.get('EVENT_HEARTBEAT_SECONDS', 15))
+    EVENT_STREAM_MAX_SECONDS = int(os.environ.get('EVENT_STREAM_MAX_SECONDS', 300)) # clients reconnect after this
+
+    # Notification outbox (see notifications.py): 'log', 'mail' (MAIL_* below) or 'webhook'
+    NOTIFICATION_SINK = os.environ.get('NOTIFICATION_SINK', 'log')
+    NOTIFICATION_WEBHOOK_URL = os.environ.get('NOTIFICATION_WEBHOOK_URL')
+    NOTIFICATION_DIGEST_SECONDS = int(os.environ.get('NOTIFICATION_DIGEST_SECONDS', 60)) # at most one digest per user per window
+    NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 200)) # users per worker round
+    NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 6))
+    NOTIFICATION_RETRY_BASE_SECONDS = int(os.environ.get('NOTIFICATION_RETRY_BASE_SECONDS', 30))
+    MAIL_SERVER = os.environ.get('MAIL_SERVER', 'localhost')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 25))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') == '1'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'no-reply@sponnect.com')
+    # Influencer campaign feeds (see feeds.py), maintained by the worker or `flask refresh-feeds --loop`
+    FEED_REFRESH_SECONDS = int(os.environ.get('FEED_REFRESH_SECONDS', 30)) # how soon campaign changes reach feeds
+    FEED_BUILD_BATCH_SIZE = int(os.environ.get('FEED_BUILD_BATCH_SIZE', 200)) # lists (re)built per round
+    # Celery worker (worker.py); the default filesystem broker needs no Redis/RabbitMQ locally
+    CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'filesystem://')
+    CELERY_BROKER_FOLDER = os.environ.get('CELERY_BROKER_FOLDER', os.path.join(BASE_DIR, 'instance', 'celery'))
+
+    # Password hashing (see passwords.py). Raising the cost rehashes stored passwords on next login.
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'sha256')
+    PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 260000))
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', 0)) # 0 = one per CPU
+    PASSWORD_POOL_MAX_QUEUE = int(os.environ.get('PASSWORD_POOL_MAX_QUEUE', 32))
@@ -0,0 +1,146 @@
+# counters.py
+"""Incrementally maintained platform counters.
+
+Every User, Campaign and AdRequest falls into exactly one bucket per entity, named by its
+dimensions (role/active/approved/flagged, visibility/flagged, status). The after_flush
+hook `_track_counter_changes` moves rows between buckets in the same transaction as the
+write, so the admin stats and dashboard endpoints read a few dozen counter rows instead of
+running COUNT(*) scans. Bulk `query.update()`/`query.delete()` bypass the hook; callers
+doing those must call `apply_deltas` themselves (as moderation.py does) or run
+`flask rebuild-counters`. `flask rebuild-counters --verify` reports any drift.
+"""
+from collections import Counter
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import db, User, Campaign, AdRequest, PlatformCounter
+
+
+def _flag(value):
+    return '1' if value else '0'
+
+def _approval(value):
+    return 'none' if value is None else _flag(value)
+
+# Dimensions per tracked model: attribute -> (dimension name, formatter)
+DIMENSIONS = {
+    User: ('user', [('role', 'role', str), ('is_active', 'active', _flag),
+                    ('sponsor_approved', 'approved', _approval), ('is_flagged', 'flagged', _flag)]),
+    Campaign: ('campaign', [('visibility', 'visibility', str), ('is_flagged', 'flagged', _flag)]),
+    AdRequest: ('ad_request', [('status', 'status', str)]),
+}
+
+
+def counter_name(entity, dims):
+    return entity + ''.join(f':{key}={value}' for key, value in dims)
+
+def parse_counter_name(name):
+    entity, *parts = name.split(':')
+    return entity, dict(part.split('=', 1) for part in parts)
+
+def bucket_for_values(model, values, dimensions=DIMENSIONS):
+    """Counter name for a row of `model` whose attributes have the given values."""
+    entity, dims = dimensions[model]
+    return counter_name(entity, [(dim, fmt(values[attr])) for attr, dim, fmt in dims])
+
+def attribute_values(obj, attrs, committed=False):
+    """Current values of `attrs` on `obj`, or their pre-flush values when `committed` is set."""
+    state = inspect(obj)
+    values = {}
+    for attr in attrs:
+        value = getattr(obj, attr)
+        if committed:
+            history = state.attrs[attr].history
+            if history.deleted:
+                value = history.deleted[0]
+        values[attr] = value
+    return values
+
+def _bucket(obj, committed=False):
+    model = type(obj)
+    attrs = [attr for attr, _, _ in DIMENSIONS[model][1]]
+    return bucket_for_values(model, attribute_values(obj, attrs, committed))
+
+
+def increment(connection, table, keys, delta):
+    """Adds `delta` to the `value` of the row matching `keys`, inserting it if missing."""
+    condition = db.and_(*(table.c[key] == value for key, value in keys.items()))
+    result = connection.execute(table.update().where(condition).values(value=table.c.value + delta))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**keys, value=delta))
+
+def apply_deltas(connection, deltas):
+    """Adds each delta to its counter row, creating missing rows."""
+    for name, delta in deltas.items():
+        if delta:
+            increment(connection, PlatformCounter.__table__, {'name': name}, delta)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_counter_changes(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if type(obj) in DIMENSIONS:
+            deltas[_bucket(obj)] += 1
+    for obj in session.dirty:
+        if type(obj) in DIMENSIONS and session.is_modified(obj, include_collections=False):
+            old, new = _bucket(obj, committed=True), _bucket(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    for obj in session.deleted:
+        if type(obj) in DIMENSIONS:
+            deltas[_bucket(obj, committed=True)] -= 1
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+class CounterSnapshot:
+    """All counter rows, loaded with a single SELECT, with helpers to sum matching buckets."""
+
+    def __init__(self, rows):
+        self._rows = [(*parse_counter_name(name), value) for name, value in rows]
+
+    @classmethod
+    def load(cls):
+        return cls(db.session.query(PlatformCounter.name, PlatformCounter.value).all())
+
+    def count(self, entity, **dims):
+        """Sum of all `entity` buckets matching `dims` (booleans match '1'/'0', None matches 'none')."""
+        wanted = {key: _approval(value) if value is None or isinstance(value, bool) else str(value)
+                  for key, value in dims.items()}
+        return sum(value for row_entity, row_dims, value in self._rows
+                   if row_entity == entity and all(row_dims.get(k) == v for k, v in wanted.items()))
+
+    def group(self, entity, dim):
+        """{dimension value: count} for one dimension of `entity`, skipping empty buckets."""
+        totals = Counter()
+        for row_entity, row_dims, value in self._rows:
+            if row_entity == entity:
+                totals[row_dims[dim]] += value
+        return {key: value for key, value in totals.items() if value}
+
+
+def compute_counters():
+    """Counts every bucket from scratch with one GROUP BY per tracked model."""
+    totals = Counter()
+    for model, (_, dims) in DIMENSIONS.items():
+        columns = [getattr(model, attr) for attr, _, _ in dims]
+        for *values, count in db.session.query(*columns, db.func.count()).group_by(*columns):
+            totals[bucket_for_values(model, dict(zip((attr for attr, _, _ in dims), values)))] += count
+    return totals
+
+def rebuild_counters():
+    """Replaces the stored counters with freshly computed ones. Returns the new values."""
+    totals = compute_counters()
+    PlatformCounter.query.delete()
+    db.session.add_all(PlatformCounter(name=name, value=value) for name, value in totals.items())
+    db.session.commit()
+    return totals
+
+def diff_counters():
+    """{name: (stored, actual)} for every bucket where the stored counter has drifted."""
+    stored = dict(db.session.query(PlatformCounter.name, PlatformCounter.value).all())
+    actual = compute_counters()
+    return {name: (stored.get(name, 0), actual.get(name, 0))
+            for name in set(stored) | set(actual) if stored.get(name, 0) != actual.get(name, 0)}
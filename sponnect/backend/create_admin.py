@@ -1,12 +1,12 @@
 # create_admin.py
-from app import app, Config
+from app import create_app, Config
 from models import db, User
 
 if __name__ == '__main__':
     admin_email = Config.ADMIN_EMAIL
     admin_password = Config.ADMIN_PASSWORD
 
-    with app.app_context():
+    with create_app().app_context():
         if not admin_email or not admin_password:
             print("Error: ADMIN_EMAIL/PASSWORD missing in .env")
         elif User.query.filter_by(email=admin_email, role='admin').first():
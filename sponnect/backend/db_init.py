@@ -1,14 +1,9 @@
 # db_init.py
-from app import app
-from flask_migrate import Migrate, init, migrate, upgrade
-from models import db
+from app import create_app
+from flask_migrate import upgrade
 
 if __name__ == '__main__':
-    with app.app_context():
-        # Init migrations directory
-        init()
-        # Create initial migration
-        migrate(message='Initial migration')
-        # Apply migration
+    with create_app().app_context():
+        # Apply all migrations (creates the schema on a fresh database)
         upgrade()
-        print("Database initialized successfully!") 
\ No newline at end of file
+        print("Database initialized successfully!")
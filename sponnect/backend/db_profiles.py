@@ -0,0 +1,101 @@
+# db_profiles.py
+"""Database engine profiles: per-connection SQLite pragmas and per-backend pool settings.
+
+DB_PROFILE selects one of PROFILES. Its pragmas are applied to every new SQLite connection
+(busy_timeout first, so switching to WAL waits for other writers instead of failing), and
+SQLITE_PRAGMAS overrides individual values, e.g. "synchronous=FULL,cache_size=-131072".
+File databases get a small QueuePool so connections and their page cache are reused
+across requests; server databases get the same pool sizes plus pre-ping and recycling.
+"""
+import re
+import sqlite3
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
+
+PROFILES = {
+    # SQLite's own defaults: rollback journal, writers fail at once with "database is locked"
+    'default': {},
+    # Readers never block the writer and vice versa; a commit survives a crash of the app,
+    # though the last transactions may be lost on power failure
+    'wal': {
+        'busy_timeout': 5000, # ms a connection waits for a lock before failing
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536, # KiB (64 MiB) per connection
+        'mmap_size': 268435456, # 256 MiB
+        'temp_store': 'MEMORY',
+    },
+    # WAL with an fsync on every commit
+    'durable': {
+        'busy_timeout': 5000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -65536,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def parse_pragmas(value):
+    """'name=value,name=value' -> {name: value}."""
+    pragmas = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        name, sep, setting = item.partition('=')
+        if not sep or not name.strip().isidentifier() or not re.fullmatch(r'-?\w+', setting.strip()):
+            raise ValueError(f"Invalid SQLITE_PRAGMAS entry {item!r}, expected name=value")
+        pragmas[name.strip().lower()] = setting.strip()
+    return pragmas
+
+def sqlite_pragmas(config):
+    """Pragmas of the configured profile with SQLITE_PRAGMAS overrides applied."""
+    name = config.get('DB_PROFILE', 'wal')
+    if name not in PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {name!r}, expected one of {', '.join(PROFILES)}")
+    return {**PROFILES[name], **parse_pragmas(config.get('SQLITE_PRAGMAS'))}
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the backend of SQLALCHEMY_DATABASE_URI."""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    pool = {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+    }
+    if url.get_backend_name() != 'sqlite':
+        return {**pool, 'pool_pre_ping': True, 'pool_recycle': config.get('DB_POOL_RECYCLE', 1800)}
+    if url.database in (None, '', ':memory:'):
+        return {} # Flask-SQLAlchemy pins in-memory databases to a single StaticPool connection
+    # A pooled connection is only ever used by one thread at a time
+    return {**pool, 'poolclass': QueuePool, 'connect_args': {'check_same_thread': False}}
+
+
+def init_app(app):
+    """Resolves the profile into app.config. Explicit SQLALCHEMY_ENGINE_OPTIONS win."""
+    app.config['SQLITE_PRAGMA_SETTINGS'] = sqlite_pragmas(app.config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not has_app_context():
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in current_app.config.get('SQLITE_PRAGMA_SETTINGS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+def effective_pragmas(connection):
+    """Current values of the profile's pragmas on `connection` (for `flask db-profile`)."""
+    return {
+        name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+        for name in current_app.config.get('SQLITE_PRAGMA_SETTINGS', {})
+    }
@@ -0,0 +1,174 @@
+# events.py
+"""Per-user Server-Sent Events for negotiation updates.
+
+Routes call `publish_after_commit` while their transaction is open; the events are handed
+to the broker only once it commits, so clients never hear about writes that were rolled
+back. Each user has a bounded event log in the broker. A stream reads it from the
+client's Last-Event-ID, sends a comment line as heartbeat when idle, and ends after
+EVENT_STREAM_MAX_SECONDS so EventSource reconnects (and the token is checked again). When
+the requested id is no longer in the log, the stream starts with a `resync` event telling
+the client to refetch its lists.
+
+EVENT_BROKER selects the backend: 'memory' (default) keeps logs in this process, which is
+enough for a single worker; 'redis' uses one Redis stream per user (EVENT_REDIS_URL) so
+every worker sees every event.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class MemoryBroker:
+    """In-process pub/sub. Event ids are '<process epoch>-<sequence>', so ids from another
+    process (or from before a restart) are recognised and answered with a resync."""
+
+    def __init__(self, buffer_size=100):
+        self._epoch = str(time.time_ns())
+        self._sequence = 0
+        self._logs = {}
+        self._evicted = {} # user id -> sequence of the newest event dropped from their log
+        self._buffer_size = buffer_size
+        self._changed = threading.Condition()
+
+    def publish(self, user_id, event_type, data):
+        with self._changed:
+            self._sequence += 1
+            event_id = f'{self._epoch}-{self._sequence}'
+            log = self._logs.setdefault(user_id, deque(maxlen=self._buffer_size))
+            if len(log) == log.maxlen:
+                self._evicted[user_id] = log[0][0]
+            log.append((self._sequence, event_id, event_type, data))
+            self._changed.notify_all()
+        return event_id
+
+    def _parse(self, event_id):
+        epoch, _, sequence = (event_id or '').partition('-')
+        return int(sequence) if epoch == self._epoch and sequence.isdigit() else None
+
+    def latest_id(self, user_id):
+        with self._changed:
+            return f'{self._epoch}-{self._sequence}'
+
+    def missed(self, user_id, last_id):
+        """True if events after `last_id` are no longer in the user's log."""
+        sequence = self._parse(last_id)
+        with self._changed:
+            return sequence is None or self._evicted.get(user_id, 0) > sequence
+
+    def read(self, user_id, last_id, timeout):
+        """Events after `last_id`, waiting up to `timeout` seconds for one. Returns
+        (events, new last id)."""
+        sequence = self._parse(last_id) or 0
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                events = [e for e in self._logs.get(user_id, ()) if e[0] > sequence]
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+        return [(event_id, event_type, data) for _, event_id, event_type, data in events], \
+            events[-1][1] if events else last_id
+
+
+class RedisBroker:
+    """Cross-worker pub/sub on Redis streams, one capped stream per user."""
+
+    def __init__(self, url, buffer_size=100):
+        import redis # Optional dependency, only needed for this backend
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._buffer_size = buffer_size
+
+    @staticmethod
+    def _key(user_id):
+        return f'events:user:{user_id}'
+
+    def publish(self, user_id, event_type, data):
+        return self._redis.xadd(self._key(user_id), {'type': event_type, 'data': json.dumps(data)},
+                                maxlen=self._buffer_size, approximate=True)
+
+    def latest_id(self, user_id):
+        latest = self._redis.xrevrange(self._key(user_id), count=1)
+        return latest[0][0] if latest else '0-0'
+
+    def missed(self, user_id, last_id):
+        """True if the stream is at its cap and starts after `last_id` (entries were trimmed)."""
+        key = self._key(user_id)
+        try:
+            last = _stream_id(last_id)
+        except ValueError: # Not a stream id
+            return True
+        first = self._redis.xrange(key, count=1)
+        return bool(first) and _stream_id(first[0][0]) > last and self._redis.xlen(key) >= self._buffer_size
+
+    def read(self, user_id, last_id, timeout):
+        reply = self._redis.xread({self._key(user_id): last_id}, count=100, block=max(1, int(timeout * 1000)))
+        events = [(event_id, fields['type'], json.loads(fields['data']))
+                  for _, entries in reply for event_id, fields in entries]
+        return events, events[-1][0] if events else last_id
+
+def _stream_id(value):
+    millis, _, sequence = (value or '').partition('-')
+    return int(millis), int(sequence or 0)
+
+
+def init_app(app):
+    size = app.config['EVENT_BUFFER_SIZE']
+    if app.config['EVENT_BROKER'] == 'redis':
+        broker = RedisBroker(app.config['EVENT_REDIS_URL'], size)
+    else:
+        broker = MemoryBroker(size)
+    app.extensions['events'] = broker
+
+def get_broker():
+    return current_app.extensions['events']
+
+
+def publish_after_commit(session, user_ids, event_type, data):
+    """Queues an event for `user_ids`, published if and when the session commits."""
+    session.info.setdefault('pending_events', []).append((set(user_ids), event_type, data))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    pending = session.info.pop('pending_events', None)
+    if not pending or not has_app_context():
+        return
+    broker = get_broker()
+    for user_ids, event_type, data in pending:
+        for user_id in user_ids:
+            try:
+                broker.publish(user_id, event_type, data)
+            except Exception: # Never fail a committed write over a lost push; clients resync
+                current_app.logger.exception("Publishing %s to user %s failed", event_type, user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_events(session):
+    session.info.pop('pending_events', None)
+
+
+def _format(event_id, event_type, data):
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+def event_stream(broker, user_id, last_id, heartbeat, max_seconds):
+    """SSE text for one user until `max_seconds` have passed."""
+    yield 'retry: 3000\n\n'
+    if not last_id:
+        last_id = broker.latest_id(user_id) # Only events from now on
+    elif broker.missed(user_id, last_id):
+        last_id = broker.latest_id(user_id)
+        yield _format(last_id, 'resync', {})
+    deadline = time.monotonic() + max_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, last_id = broker.read(user_id, last_id, min(heartbeat, remaining))
+        if not events:
+            yield ': heartbeat\n\n'
+        for event_id, event_type, data in events:
+            yield _format(event_id, event_type, data)
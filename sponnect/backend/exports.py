@@ -0,0 +1,100 @@
+# exports.py
+"""Streaming CSV/NDJSON exports of ad requests and negotiation history.
+
+Exports select plain columns rather than ORM objects, fetch them EXPORT_BATCH_SIZE rows at a
+time (`yield_per`, which uses a server-side cursor where the driver has one) and encode
+rows into ~64 KiB chunks as they arrive, optionally through an incremental gzip
+compressor. Memory use therefore stays flat however many rows an export has.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from models import db, User, Campaign, AdRequest, NegotiationHistory
+
+EXPORT_BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024 # characters buffered before a chunk is sent
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# dataset -> [(field, column)]
+EXPORT_FIELDS = {
+    'ad_requests': [
+        ('id', AdRequest.id), ('campaign_id', AdRequest.campaign_id), ('campaign_name', Campaign.name),
+        ('sponsor_id', Campaign.sponsor_id), ('influencer_id', AdRequest.influencer_id),
+        ('influencer_name', User.influencer_name), ('initiator_id', AdRequest.initiator_id),
+        ('status', AdRequest.status), ('payment_amount', AdRequest.payment_amount),
+        ('requirements', AdRequest.requirements), ('message', AdRequest.message),
+        ('last_offer_by', AdRequest.last_offer_by), ('created_at', AdRequest.created_at),
+        ('updated_at', AdRequest.updated_at),
+    ],
+    'negotiation_history': [
+        ('id', NegotiationHistory.id), ('ad_request_id', NegotiationHistory.ad_request_id),
+        ('campaign_id', AdRequest.campaign_id), ('sponsor_id', Campaign.sponsor_id),
+        ('user_id', NegotiationHistory.user_id), ('user_role', NegotiationHistory.user_role),
+        ('action', NegotiationHistory.action), ('payment_amount', NegotiationHistory.payment_amount),
+        ('requirements', NegotiationHistory.requirements), ('message', NegotiationHistory.message),
+        ('ad_request_status', AdRequest.status), ('created_at', NegotiationHistory.created_at),
+    ],
+}
+
+
+def export_query(dataset, sponsor_id=None, campaign_id=None, status=None, start=None, end=None):
+    """Rows of `dataset` in id order. `status` filters on the ad request's status and
+    [start, end) on the exported row's created_at."""
+    columns = [column for _, column in EXPORT_FIELDS[dataset]]
+    if dataset == 'ad_requests':
+        model = AdRequest
+        query = db.session.query(*columns) \
+            .join(Campaign, AdRequest.campaign_id == Campaign.id) \
+            .outerjoin(User, AdRequest.influencer_id == User.id)
+    else:
+        model = NegotiationHistory
+        query = db.session.query(*columns) \
+            .join(AdRequest, NegotiationHistory.ad_request_id == AdRequest.id) \
+            .join(Campaign, AdRequest.campaign_id == Campaign.id)
+
+    if sponsor_id is not None: query = query.filter(Campaign.sponsor_id == sponsor_id)
+    if campaign_id is not None: query = query.filter(AdRequest.campaign_id == campaign_id)
+    if status: query = query.filter(AdRequest.status == status)
+    if start: query = query.filter(model.created_at >= start)
+    if end: query = query.filter(model.created_at < end)
+    return query.order_by(model.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def encode_rows(rows, fields, fmt):
+    """Text chunks of the rows in `fmt` ('csv' with a header row, or 'ndjson')."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+    for row in rows:
+        if writer:
+            writer.writerow(['' if value is None else _value(value) for value in row])
+        else:
+            buffer.write(json.dumps(dict(zip(fields, map(_value, row)))))
+            buffer.write('\n')
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Compresses text chunks into a gzip stream as they are produced."""
+    compressor = zlib.compressobj(wbits=31) # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(dataset, fmt, gzip=False, **filters):
+    fields = [field for field, _ in EXPORT_FIELDS[dataset]]
+    chunks = encode_rows(export_query(dataset, **filters), fields, fmt)
+    return gzip_chunks(chunks) if gzip else (chunk.encode() for chunk in chunks)
@@ -0,0 +1,202 @@
+# feeds.py
+"""Personalized public-campaign feeds for influencers.
+
+An influencer's feed holds the FEED_SIZE best public, unflagged campaigns they have not
+applied to, ranked by `score_campaign`: how well their category and niche fit the
+campaign's text, its budget, and whether they have worked with its sponsor before. The
+list lives in campaign_feed_entries and is paged with a keyset on (score, campaign_id),
+so a page is one index range scan however many campaigns exist; the GET never scores.
+
+Lists are computed off the request path by `refresh_feeds`, one round every
+FEED_REFRESH_SECONDS (the Celery beat task in worker.py, or `flask refresh-feeds --loop`):
+- influencers without a list, with one older than FEED_MAX_AGE or with a profile change
+  get it (re)built, FEED_BUILD_BATCH_SIZE per round, from one tokenized pass over the
+  eligible campaigns shared by the whole batch;
+- campaigns changed since the last round (one range read on idx_campaign_updated,
+  usually empty) are rescored into every built list, dropped from them when no longer
+  public and unflagged, and each list is trimmed back to FEED_SIZE.
+Bulk moderation UPDATEs set updated_at too, so they need no special handling. An
+after_flush hook does the cheap, per-row parts: a new ad request takes its campaign out
+of the influencer's list, a deleted campaign leaves every list, and a change to an
+influencer's category or niche marks their list for rebuilding in the next round.
+"""
+import heapq
+import math
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, bindparam, event, inspect, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import db, User, Campaign, AdRequest, CampaignFeedList, CampaignFeedEntry
+from matching import tokenize
+
+FEED_SIZE = 200
+FEED_MAX_AGE = timedelta(days=1)
+REFRESH_OVERLAP = timedelta(seconds=5) # re-checks campaigns committed late with an earlier updated_at
+CHUNK_SIZE = 500 # ids per IN list
+COMMIT_EVERY = 100 # lists written per transaction
+STALE = datetime(1970, 1, 1) # built_at of a list whose influencer's profile changed
+WEIGHTS = {'fit': 0.60, 'budget': 0.25, 'sponsor': 0.15}
+BUDGET_CEILING = 1_000_000 # budget scores grow with log(budget) and reach 1 here
+PROFILE_FIELDS = ('category', 'niche')
+
+users = User.__table__
+campaigns = Campaign.__table__
+ad_requests = AdRequest.__table__
+feed_lists = CampaignFeedList.__table__
+feed_entries = CampaignFeedEntry.__table__
+
+
+def profile_tokens(category, niche):
+    return set(tokenize(category)) | set(tokenize(niche))
+
+def campaign_tokens(name, description, goals):
+    return set(tokenize(' '.join(filter(None, (name, description, goals)))))
+
+def budget_score(budget):
+    return min(1.0, math.log1p(max(budget or 0, 0)) / math.log1p(BUDGET_CEILING))
+
+def score_campaign(profile, tokens, budget, known_sponsor):
+    fit = len(profile & tokens) / len(profile) if profile else 0.0
+    return round(WEIGHTS['fit'] * fit + WEIGHTS['budget'] * budget_score(budget) + WEIGHTS['sponsor'] * known_sponsor, 6)
+
+
+# --- Scoring ---
+def _campaign_rows(connection, query):
+    """[(id, tokens, budget, sponsor id, eligible, updated_at)], each campaign tokenized once."""
+    query = query.with_only_columns(
+        campaigns.c.id, campaigns.c.name, campaigns.c.description, campaigns.c.goals, campaigns.c.budget,
+        campaigns.c.sponsor_id, campaigns.c.visibility, campaigns.c.is_flagged, campaigns.c.updated_at)
+    return [(row.id, campaign_tokens(row.name, row.description, row.goals), row.budget, row.sponsor_id,
+             row.visibility == 'public' and not row.is_flagged, row.updated_at) for row in connection.execute(query)]
+
+def _scorer(connection, influencer_id):
+    """score(campaign row) for the influencer, or None for campaigns they cannot be offered."""
+    profile = profile_tokens(*connection.execute(
+        select(users.c.category, users.c.niche).where(users.c.id == influencer_id)).first())
+    applied = {campaign_id for (campaign_id,) in connection.execute(
+        select(ad_requests.c.campaign_id).where(ad_requests.c.influencer_id == influencer_id))}
+    sponsors = {sponsor_id for (sponsor_id,) in connection.execute(
+        select(campaigns.c.sponsor_id).distinct()
+        .select_from(ad_requests.join(campaigns, ad_requests.c.campaign_id == campaigns.c.id))
+        .where(ad_requests.c.influencer_id == influencer_id))}
+
+    def score(row):
+        campaign_id, tokens, budget, sponsor_id, eligible, _ = row
+        if not eligible or campaign_id in applied:
+            return None
+        return score_campaign(profile, tokens, budget, sponsor_id in sponsors)
+    return score
+
+def _insert_entries(connection, influencer_id, scored):
+    if scored:
+        connection.execute(feed_entries.insert(), [
+            {'influencer_id': influencer_id, 'campaign_id': campaign_id, 'score': score} for score, campaign_id in scored])
+
+def _trim(connection, influencer_id):
+    """Deletes the influencer's entries ranked below FEED_SIZE."""
+    cutoff = connection.execute(
+        select(feed_entries.c.score, feed_entries.c.campaign_id)
+        .where(feed_entries.c.influencer_id == influencer_id)
+        .order_by(feed_entries.c.score.desc(), feed_entries.c.campaign_id.desc())
+        .offset(FEED_SIZE - 1).limit(1)).first()
+    if cutoff is not None:
+        connection.execute(feed_entries.delete().where(
+            feed_entries.c.influencer_id == influencer_id,
+            or_(feed_entries.c.score < cutoff.score,
+                and_(feed_entries.c.score == cutoff.score, feed_entries.c.campaign_id < cutoff.campaign_id))))
+
+
+# --- Building and refreshing ---
+def build_feed(connection, influencer_id, rows, built_at):
+    """Replaces the influencer's list with the top FEED_SIZE of the campaign `rows`."""
+    score = _scorer(connection, influencer_id)
+    top = heapq.nlargest(FEED_SIZE, ((value, row[0]) for row in rows if (value := score(row)) is not None))
+    connection.execute(feed_entries.delete().where(feed_entries.c.influencer_id == influencer_id))
+    connection.execute(feed_lists.delete().where(feed_lists.c.influencer_id == influencer_id))
+    _insert_entries(connection, influencer_id, top)
+    connection.execute(feed_lists.insert(), {'influencer_id': influencer_id, 'built_at': built_at, 'refreshed_at': built_at})
+
+def refresh_feed(connection, influencer_id, changed):
+    """Rescores the `changed` campaign rows in a built list and trims it to FEED_SIZE."""
+    score = _scorer(connection, influencer_id)
+    ids = [row[0] for row in changed]
+    for start in range(0, len(ids), CHUNK_SIZE):
+        connection.execute(feed_entries.delete().where(
+            feed_entries.c.influencer_id == influencer_id, feed_entries.c.campaign_id.in_(ids[start:start + CHUNK_SIZE])))
+    _insert_entries(connection, influencer_id, [(value, row[0]) for row in changed if (value := score(row)) is not None])
+    _trim(connection, influencer_id)
+
+def _commit():
+    try:
+        db.session.commit()
+    except IntegrityError: # Another runner wrote the same list; the next round redoes it
+        db.session.rollback()
+
+def refresh_feeds(batch_size=None):
+    """One maintenance round. Returns {'built': lists, 'refreshed': lists}."""
+    batch_size = batch_size or current_app.config['FEED_BUILD_BATCH_SIZE']
+    started = datetime.utcnow()
+    result = {'built': 0, 'refreshed': 0}
+
+    # Missing, expired or stale lists of active influencers
+    to_build = [user_id for (user_id,) in db.session.execute(
+        select(users.c.id).select_from(users.outerjoin(feed_lists, feed_lists.c.influencer_id == users.c.id))
+        .where(users.c.role == 'influencer', users.c.is_active == True,
+               or_(feed_lists.c.built_at == None, feed_lists.c.built_at < started - FEED_MAX_AGE))
+        .order_by(feed_lists.c.built_at, users.c.id).limit(batch_size))]
+    if to_build:
+        rows = _campaign_rows(db.session.connection(), select(campaigns).where(
+            campaigns.c.visibility == 'public', campaigns.c.is_flagged == False))
+        for n, influencer_id in enumerate(to_build, 1):
+            build_feed(db.session.connection(), influencer_id, rows, started)
+            if n % COMMIT_EVERY == 0:
+                _commit()
+        _commit()
+        result['built'] = len(to_build)
+
+    # Campaigns changed since each remaining list's last refresh
+    lists = db.session.execute(select(feed_lists.c.influencer_id, feed_lists.c.refreshed_at)
+                               .where(feed_lists.c.refreshed_at < started)).fetchall()
+    if lists:
+        since = min(refreshed_at for _, refreshed_at in lists) - REFRESH_OVERLAP
+        changed = _campaign_rows(db.session.connection(), select(campaigns).where(campaigns.c.updated_at >= since))
+        for influencer_id, refreshed_at in lists:
+            rows = [row for row in changed if row[5] >= refreshed_at - REFRESH_OVERLAP]
+            if rows:
+                refresh_feed(db.session.connection(), influencer_id, rows)
+                result['refreshed'] += 1
+                if result['refreshed'] % COMMIT_EVERY == 0:
+                    _commit()
+        ids = [influencer_id for influencer_id, _ in lists]
+        for start in range(0, len(ids), CHUNK_SIZE):
+            db.session.execute(feed_lists.update().where(
+                feed_lists.c.influencer_id.in_(ids[start:start + CHUNK_SIZE]), feed_lists.c.refreshed_at < started)
+                .values(refreshed_at=started))
+        _commit()
+    return result
+
+
+# --- Per-row upkeep ---
+@event.listens_for(Session, 'after_flush')
+def _sync_feeds(session, flush_context):
+    removed = [obj.id for obj in session.deleted if isinstance(obj, Campaign)]
+    applied = [{'i': obj.influencer_id, 'c': obj.campaign_id} for obj in session.new if isinstance(obj, AdRequest)]
+    stale = [obj.id for obj in session.dirty if isinstance(obj, User)
+             and any(inspect(obj).attrs[f].history.has_changes() for f in PROFILE_FIELDS)]
+    deleted = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if not (removed or applied or stale or deleted):
+        return
+    connection = session.connection()
+    if removed:
+        connection.execute(feed_entries.delete().where(feed_entries.c.campaign_id.in_(removed)))
+    if applied:
+        connection.execute(feed_entries.delete().where(and_(
+            feed_entries.c.influencer_id == bindparam('i'), feed_entries.c.campaign_id == bindparam('c'))), applied)
+    if stale: # Keeps serving the old list until the next round rebuilds it
+        connection.execute(feed_lists.update().where(feed_lists.c.influencer_id.in_(stale)).values(built_at=STALE))
+    if deleted:
+        connection.execute(feed_entries.delete().where(feed_entries.c.influencer_id.in_(deleted)))
+        connection.execute(feed_lists.delete().where(feed_lists.c.influencer_id.in_(deleted)))
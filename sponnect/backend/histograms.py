@@ -0,0 +1,94 @@
+# histograms.py
+"""Single-pass histograms over a numeric column.
+
+`histogram` counts, in one aggregate query, how many values lie below each inner edge
+(one conditional COUNT per edge) and takes the differences, so any number of bins costs
+one scan instead of one COUNT query per range. There is no GROUP BY, so the scanned
+values are not sorted or hashed into buckets either.
+
+Bin edges can be given explicitly, spaced logarithmically between the column's min and
+max, or placed at quantiles of the column, which also takes a single ordered scan (an
+ntile window).
+"""
+import math
+from sqlalchemy import case, func
+
+from models import db
+
+MAX_BINS = 50
+
+
+def histogram(column, edges, query=None):
+    """Counts of `column` values per bin [edges[i], edges[i+1]).
+
+    The first edge may be float('-inf') and the last float('inf') for open-ended bins.
+    Values below a finite first edge or at/above a finite last edge are ignored. Returns a
+    list of len(edges) - 1 counts.
+    """
+    query = query if query is not None else db.session.query()
+    query = query.with_entities(*(func.count(case((column < edge, 1))) for edge in edges[1:-1]), func.count())
+    # NULLs are never counted; the filter also keeps the column's table in the FROM clause
+    query = query.filter(column.isnot(None) if math.isinf(edges[0]) else column >= edges[0])
+    if not math.isinf(edges[-1]):
+        query = query.filter(column < edges[-1])
+    below = list(query.one()) # values below each inner edge, then all of them
+    return [high - low for low, high in zip([0] + below, below)]
+
+
+def parse_edges(text):
+    """Parses '0,1000,5000,inf' into a strictly increasing list of edges. Only the first
+    edge may be -inf and only the last inf; NaN is rejected."""
+    edges = [float(part) for part in text.split(',') if part.strip()]
+    if not 2 <= len(edges) <= MAX_BINS + 1 or any(a >= b for a, b in zip(edges, edges[1:])):
+        raise ValueError("Bin edges must be 2 or more strictly increasing numbers")
+    # NaN passes the ordering check (every comparison with it is False), which already
+    # keeps -inf first and inf last
+    if not all(math.isfinite(edge) for edge in edges[1:-1]) or math.isnan(edges[0]) or math.isnan(edges[-1]):
+        raise ValueError("Bin edges must be finite, except a leading -inf and a trailing inf")
+    return edges
+
+def log_edges(column, bin_count, query=None):
+    """`bin_count` logarithmically spaced bins covering the positive values of `column`."""
+    query = query if query is not None else db.session.query()
+    low, high = query.with_entities(func.min(column), func.max(column)).filter(column > 0).one()
+    if low is None:
+        return [0, float('inf')]
+    if low == high:
+        return [low, float('inf')]
+    ratio = (high / low) ** (1 / bin_count)
+    return [low * ratio ** i for i in range(bin_count)] + [float('inf')]
+
+def quantile_edges(column, bin_count, query=None):
+    """Edges at the 1/bin_count quantiles of `column` (duplicates collapsed): the smallest
+    value of each of `bin_count` equal-sized tiles of the sorted values."""
+    query = query if query is not None else db.session.query()
+    tiles = query.with_entities(column.label('value'), func.ntile(bin_count).over(order_by=column).label('tile')) \
+        .filter(column.isnot(None)).subquery()
+    edges = []
+    for (edge,) in query.session.query(func.min(tiles.c.value)).group_by(tiles.c.tile).order_by(tiles.c.tile):
+        if not edges or edge > edges[-1]:
+            edges.append(edge)
+    if not edges:
+        return [0, float('inf')]
+    return edges + [float('inf')]
+
+
+def _format_value(value, prefix):
+    for size, suffix in ((1_000_000, 'M'), (1_000, 'K')):
+        if abs(value) >= size:
+            return f"{prefix}{value / size:g}{suffix}"
+    return f"{prefix}{value:g}"
+
+def bin_labels(edges, prefix=''):
+    """Human-readable labels, e.g. 'Under $1K', '$1K-$5K', 'Over $50K'."""
+    labels = []
+    for low, high in zip(edges, edges[1:]):
+        if math.isinf(low) and math.isinf(high):
+            labels.append("All")
+        elif math.isinf(high):
+            labels.append(f"Over {_format_value(low, prefix)}")
+        elif low == 0 or math.isinf(low):
+            labels.append(f"Under {_format_value(high, prefix)}")
+        else:
+            labels.append(f"{_format_value(low, prefix)}-{_format_value(high, prefix)}")
+    return labels
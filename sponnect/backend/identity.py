@@ -0,0 +1,111 @@
+# identity.py
+"""Request-scoped caller identity.
+
+`current_identity()` reads the JWT that `@jwt_required()` already verified (decoding it
+only if nothing has yet) and memoizes an Identity on `g`, so role checks never decode
+the token twice. The caller's User row and campaign ownership are served from small
+process-local LRUs with a short TTL (USER_CACHE_TTL, CAMPAIGN_OWNER_CACHE_TTL). Commits
+that change a user, or delete a campaign, evict the affected entries in this process at
+once; other workers see the change when their entry expires.
+"""
+from itertools import chain
+from types import SimpleNamespace
+
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, User, Campaign
+from response_cache import LRUCache
+
+USER_CACHE_SIZE = 5000
+USER_CACHE_TTL = 30 # seconds
+CAMPAIGN_OWNER_CACHE_SIZE = 20000
+CAMPAIGN_OWNER_CACHE_TTL = 30 # seconds
+
+_users = LRUCache(threshold=USER_CACHE_SIZE, default_timeout=USER_CACHE_TTL)
+# A campaign's sponsor never changes, but a deleted campaign's id can be reused (SQLite
+# reuses the highest id), so other workers must not keep an owner longer than the TTL
+_campaign_owners = LRUCache(threshold=CAMPAIGN_OWNER_CACHE_SIZE, default_timeout=CAMPAIGN_OWNER_CACHE_TTL)
+_MISSING = object()
+
+
+def _snapshot(user):
+    """Detached, read-only copy of a User's columns (safe to share across sessions)."""
+    return SimpleNamespace(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+
+def load_user(user_id):
+    """Cached read-only snapshot of a user, or None if they do not exist."""
+    snapshot = _users.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        snapshot = _snapshot(user) if user else _MISSING
+        _users.set(user_id, snapshot)
+    return None if snapshot is _MISSING else snapshot
+
+def campaign_owner(campaign_id):
+    """Sponsor id of a campaign, or None if it does not exist."""
+    owner = _campaign_owners.get(campaign_id)
+    if owner is None:
+        owner = db.session.query(Campaign.sponsor_id).filter_by(id=campaign_id).scalar()
+        if owner is not None:
+            _campaign_owners.set(campaign_id, owner)
+    return owner
+
+
+class Identity:
+    """The authenticated caller: id and role from the token, User row loaded on demand."""
+
+    def __init__(self, user_id, role):
+        self.user_id = user_id
+        self.role = role
+
+    @property
+    def user(self):
+        return load_user(self.user_id)
+
+    def owns_campaign(self, campaign_id):
+        return campaign_owner(campaign_id) == self.user_id
+
+def current_identity():
+    identity = g.get('identity')
+    if identity is None:
+        try:
+            claims = get_jwt()
+        except RuntimeError: # Not verified yet in this request
+            verify_jwt_in_request()
+            claims = get_jwt()
+        identity = g.identity = Identity(get_jwt_identity(), claims.get('role'))
+    return identity
+
+
+def _pending_evictions(session):
+    return session.info.setdefault('identity_evict', {'users': set(), 'campaigns': set()})
+
+def evict_users(session, user_ids):
+    """Evicts users changed by statements the flush hook cannot see (bulk UPDATE), on commit."""
+    _pending_evictions(session)['users'].update(user_ids)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_evictions(session, flush_context):
+    evict = _pending_evictions(session)
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            evict['users'].add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Campaign):
+            evict['campaigns'].add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _evict_committed(session):
+    evict = session.info.pop('identity_evict', None)
+    if evict:
+        for user_id in evict['users']:
+            _users.delete(user_id)
+        for campaign_id in evict['campaigns']:
+            _campaign_owners.delete(campaign_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_evictions(session):
+    session.info.pop('identity_evict', None)
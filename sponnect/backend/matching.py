@@ -0,0 +1,314 @@
+# matching.py
+"""Campaign-to-influencer recommendations.
+
+Every influencer is one row of a process-local NumPy feature matrix: token ids of their
+category and niche, a reach score, a smoothed acceptance rate and their typical fee, the
+last two taken from their past ad requests. Ranking a campaign touches as little of the
+matrix as possible:
+- the campaign-independent part of every score (reach and acceptance, and the neutral
+  payment score of influencers without a fee history) is kept precomputed per row, with
+  ineligible rows at -inf;
+- the payment term is one float32 multiply-and-clip over the rows with a fee;
+- category and niche matches come from token -> rows posting lists, so only the rows
+  sharing a token with the campaign's name, description and goals are touched;
+- the top K of a strided sample bounds the K-th best score, so only the rows above that
+  bound are sorted, and the score breakdown is computed for the K best only.
+
+The matrix is built on first use and then refreshed incrementally. Commits in this
+process mark the influencers they touch (profile changes and their ad requests), and
+every REFRESH_SECONDS the rows changed by other workers are found by updated_at; only
+those influencers are reloaded before the next ranking. Rows reloaded since the posting
+lists were built are matched directly from their tokens, and the lists are rebuilt once
+those exceed REINDEX_FRACTION of the rows.
+
+NumPy is imported where the matrix is allocated and ranked, not at module level, so the
+app (and feeds.py, which shares `tokenize`) starts without it until the first ranking.
+"""
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, event, func
+from sqlalchemy.orm import Session
+
+from models import db, User, AdRequest
+
+CATEGORY_SLOTS = 2 # token ids kept per influencer for the category...
+NICHE_SLOTS = 4 # ...and for the niche (0 = empty slot)
+WEIGHTS = {'category': 0.30, 'niche': 0.30, 'reach': 0.20, 'acceptance': 0.10, 'payment': 0.10}
+REACH_CEILING = 10_000_000 # reach scores grow with log(reach) and reach 1 here
+REFRESH_SECONDS = 60
+REFRESH_OVERLAP = timedelta(seconds=60) # re-checks rows committed late with an earlier updated_at
+REINDEX_FRACTION = 0.01 # rebuild the posting lists once this share of rows changed since
+CHUNK_SIZE = 500 # ids per IN query when reloading rows
+SAMPLE_STRIDE = 64 # every n-th score bounds the top K, see MatchIndex._rank
+STOPWORDS = frozenset('and are for from into our the their this that with will you your'.split())
+
+
+def tokenize(text):
+    """Lowercased words of 3+ characters with a trailing plural 's' removed."""
+    words = re.findall(r'[a-z0-9]+', (text or '').lower())
+    return [word[:-1] if len(word) > 4 and word.endswith('s') else word
+            for word in words if len(word) >= 3 and word not in STOPWORDS]
+
+
+class MatchIndex:
+    """Feature matrix of all influencers; thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = {} # user id -> row
+        self._vocab = {} # token -> id, from 1
+        self._size = 0
+        self._dirty = set()
+        self._watermark = None # updated_at covered by the last load
+        self._checked = 0.0
+        self._postings = None # (category, niche) posting lists, see _build_postings
+        self._changed = set() # rows (re)loaded since the posting lists were built
+        self.ids = None # Arrays are allocated with the first row
+
+    def _allocate(self, capacity):
+        import numpy as np
+        old = self.ids
+        arrays = {
+            'ids': np.zeros(capacity, np.int64),
+            'tokens': np.zeros((capacity, CATEGORY_SLOTS + NICHE_SLOTS), np.int32),
+            'niche_weight': np.zeros(capacity, np.float32), # WEIGHTS['niche'] per matching niche token
+            'reach': np.zeros(capacity, np.float32),
+            'acceptance': np.zeros(capacity, np.float32),
+            'fee': np.full(capacity, np.nan, np.float32), # nan: no past ad requests
+            'inverse_fee': np.zeros(capacity, np.float32), # 1 / max(fee, 1); 0 without a fee
+            'base': np.full(capacity, -np.inf, np.float32), # campaign-independent score; -inf: ineligible
+            'eligible': np.zeros(capacity, bool),
+            'score': np.zeros(capacity, np.float32), # scratch buffers for rank
+            'matched': np.zeros(capacity, bool),
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, array)
+
+    def _token_ids(self, text, slots):
+        ids = [self._vocab.setdefault(token, len(self._vocab) + 1) for token in dict.fromkeys(tokenize(text))]
+        return (ids + [0] * slots)[:slots]
+
+    def _row(self, user_id):
+        row = self._rows.get(user_id)
+        if row is None:
+            if self.ids is None or self._size == len(self.ids):
+                self._allocate(max(1024, 2 * self._size))
+            row = self._rows[user_id] = self._size
+            self.ids[row] = user_id
+            self._size += 1
+        return row
+
+    # --- Loading ---
+    def _set_row(self, user_id, category, niche, reach, accepted_count, rejected_count, fee, eligible):
+        """Stores one influencer's features and the static part of their score."""
+        row = self._row(user_id)
+        if self._postings is not None:
+            self._unindex(row)
+        niche_ids = self._token_ids(niche, NICHE_SLOTS)
+        self.tokens[row] = self._token_ids(category, CATEGORY_SLOTS) + niche_ids
+        self.niche_weight[row] = WEIGHTS['niche'] / max(1, sum(1 for token_id in niche_ids if token_id))
+        self.reach[row] = min(1.0, math.log1p(max(reach or 0, 0)) / math.log1p(REACH_CEILING))
+        # Smoothed towards 1/2, so one decision does not make a 0% or 100% influencer
+        self.acceptance[row] = ((accepted_count or 0) + 1) / ((accepted_count or 0) + (rejected_count or 0) + 2)
+        self.fee[row] = math.nan if fee is None else fee
+        self.inverse_fee[row] = 0.0 if fee is None else 1.0 / max(fee, 1.0)
+        self.eligible[row] = eligible
+        # No fee history: a neutral 1/2 payment score, whatever the budget
+        self.base[row] = (WEIGHTS['reach'] * self.reach[row] + WEIGHTS['acceptance'] * self.acceptance[row]
+                          + (WEIGHTS['payment'] * 0.5 if fee is None else 0.0)) if eligible else -math.inf
+        self._changed.add(row)
+
+    def _load(self, user_ids=None):
+        """(Re)loads the given influencers, or all of them."""
+        if user_ids is None:
+            self._load_chunk(None)
+            return
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), CHUNK_SIZE):
+            self._load_chunk(user_ids[start:start + CHUNK_SIZE])
+
+    def _load_chunk(self, user_ids):
+        users = db.session.query(User.id, User.category, User.niche, User.reach, User.is_active, User.is_flagged) \
+            .filter(User.role == 'influencer')
+        accepted = AdRequest.status == 'Accepted'
+        stats = db.session.query(
+            AdRequest.influencer_id,
+            func.sum(case((accepted, 1), else_=0)),
+            func.sum(case((AdRequest.status == 'Rejected', 1), else_=0)),
+            func.avg(case((accepted, AdRequest.payment_amount))),
+            func.avg(AdRequest.payment_amount),
+        ).group_by(AdRequest.influencer_id)
+        if user_ids is not None:
+            users = users.filter(User.id.in_(user_ids))
+            stats = stats.filter(AdRequest.influencer_id.in_(user_ids))
+        stats = {row[0]: row[1:] for row in stats}
+
+        seen = set()
+        for user_id, category, niche, reach, is_active, is_flagged in users:
+            seen.add(user_id)
+            accepted_count, rejected_count, accepted_fee, any_fee = stats.get(user_id, (0, 0, None, None))
+            self._set_row(user_id, category, niche, reach, accepted_count, rejected_count,
+                          accepted_fee if accepted_fee is not None else any_fee, bool(is_active) and not is_flagged)
+        for user_id in set(user_ids or ()) - seen: # Deleted, or no longer an influencer
+            if user_id in self._rows:
+                row = self._rows[user_id]
+                self.eligible[row], self.base[row] = False, -math.inf
+
+    def _build_postings(self):
+        """Token id -> rows, for the category and the niche slots: rows sorted by token id
+        (ascending within a token id) and the offset of each token id's run. The niche lists
+        also carry each row's niche weight."""
+        import numpy as np
+        n = self._size
+        postings = []
+        for tokens in (self.tokens[:n, :CATEGORY_SLOTS], self.tokens[:n, CATEGORY_SLOTS:]):
+            token_ids = tokens.ravel()
+            rows = np.repeat(np.arange(n, dtype=np.int32), tokens.shape[1])
+            order = np.argsort(token_ids, kind='stable')
+            starts = np.searchsorted(token_ids[order], np.arange(len(self._vocab) + 2))
+            postings.append((rows[order], starts))
+        niche_rows, niche_starts = postings[1]
+        self._postings = postings[0], (niche_rows, niche_starts, self.niche_weight[niche_rows])
+        self._changed = set()
+
+    def _unindex(self, row):
+        """Zeroes the row's niche weights in the posting lists before its tokens change;
+        rank matches rows changed since the build from their own tokens."""
+        import numpy as np
+        rows, starts, weights = self._postings[1]
+        for token_id in self.tokens[row, CATEGORY_SLOTS:]:
+            if token_id and token_id + 1 < len(starts):
+                start, end = starts[token_id], starts[token_id + 1]
+                at = start + np.searchsorted(rows[start:end], row)
+                if at < end and rows[at] == row:
+                    weights[at] = 0.0
+
+    def mark_dirty(self, user_ids):
+        with self._lock:
+            self._dirty.update(user_ids)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._watermark is None:
+            started = datetime.utcnow()
+            self._load()
+            self._watermark, self._checked = started, now
+            self._dirty.clear()
+        else:
+            if now - self._checked >= REFRESH_SECONDS:
+                started, since = datetime.utcnow(), self._watermark - REFRESH_OVERLAP
+                self._dirty.update(user_id for (user_id,) in db.session.query(User.id).filter(User.updated_at >= since))
+                self._dirty.update(user_id for (user_id,) in db.session.query(AdRequest.influencer_id)
+                                   .filter(AdRequest.updated_at >= since).distinct())
+                self._watermark, self._checked = started, now
+            if self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                self._load(dirty)
+        if self._postings is None or len(self._changed) > REINDEX_FRACTION * self._size:
+            self._build_postings()
+
+    # --- Ranking ---
+    def _rank(self, text, budget, k):
+        """MatchIndex.rank without the refresh; the caller holds the lock."""
+        import numpy as np
+        n = self._size
+        k = min(k, int(self.eligible[:n].sum())) if n else 0
+        if k <= 0:
+            return []
+        hits = sorted({self._vocab[token] for token in tokenize(text) if token in self._vocab})
+        changed = np.fromiter(self._changed, np.int64, len(self._changed))
+        hit = np.zeros(len(self._vocab) + 1, bool)
+        hit[hits] = True
+
+        # Static part, then the payment term: W * min(1, budget / fee) for rows with a fee
+        score = self.score[:n]
+        np.multiply(self.inverse_fee[:n], np.float32(WEIGHTS['payment'] * budget), out=score)
+        np.minimum(score, np.float32(WEIGHTS['payment']), out=score)
+        score += self.base[:n]
+
+        # Text matches: posting lists for rows unchanged since they were built, the rows'
+        # own tokens for the rest
+        (category_rows, category_starts), (niche_rows, niche_starts, niche_weights) = self._postings
+        matched = self.matched[:n]
+        matched[:] = False
+        indexed = [token_id for token_id in hits if token_id + 1 < len(category_starts)]
+        for token_id in indexed:
+            matched[category_rows[category_starts[token_id]:category_starts[token_id + 1]]] = True
+        if len(changed):
+            matched[changed] = hit[self.tokens[changed, :CATEGORY_SLOTS]].any(axis=1)
+        np.add(score, np.float32(WEIGHTS['category']), out=score, where=matched)
+        for token_id in indexed:
+            start, end = niche_starts[token_id], niche_starts[token_id + 1]
+            score[niche_rows[start:end]] += niche_weights[start:end]
+        if len(changed):
+            score[changed] += hit[self.tokens[changed, CATEGORY_SLOTS:]].sum(axis=1) * self.niche_weight[changed]
+
+        # The k best of a strided sample are k real rows, so the lowest of their scores
+        # bounds the k-th best score from below: only rows at or above it are sorted
+        sample = score[::SAMPLE_STRIDE]
+        if len(sample) >= 4 * k:
+            floor = sample[np.argpartition(sample, len(sample) - k)[len(sample) - k:]].min()
+            top = np.flatnonzero(score >= floor)
+        else:
+            top = np.flatnonzero(self.eligible[:n])
+        top = top[np.argsort(-score[top], kind='stable')[:k]]
+        tokens = self.tokens[top]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            components = {
+                'category': hit[tokens[:, :CATEGORY_SLOTS]].any(axis=1).astype(np.float32),
+                'niche': hit[tokens[:, CATEGORY_SLOTS:]].sum(axis=1) * self.niche_weight[top] / WEIGHTS['niche'],
+                'reach': self.reach[top],
+                'acceptance': self.acceptance[top],
+                # Affordability of their typical fee; 1/2 when they have no history
+                'payment': np.nan_to_num(np.minimum(1.0, budget / np.maximum(self.fee[top], 1.0)), nan=0.5),
+            }
+        return [(int(self.ids[row]), round(float(score[row]), 4),
+                 {name: round(float(values[i]), 4) for name, values in components.items()})
+                for i, row in enumerate(top)]
+
+    def rank(self, text, budget, k):
+        """Top `k` eligible influencers for a campaign as [(user id, score, components)],
+        best first."""
+        with self._lock:
+            self._refresh()
+            return self._rank(text, budget, k)
+
+_index = MatchIndex()
+
+def recommend_influencers(campaign, k):
+    """Top `k` influencers for a Campaign, as MatchIndex.rank."""
+    return _index.rank(' '.join(filter(None, (campaign.name, campaign.description, campaign.goals))),
+                       campaign.budget or 0.0, k)
+
+
+# --- Incremental refresh ---
+def mark_influencers(session, user_ids):
+    """Reloads influencers changed by statements the flush hook cannot see (bulk UPDATE), on commit."""
+    session.info.setdefault('match_dirty', set()).update(user_ids)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    dirty = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            dirty.add(obj.id)
+        elif isinstance(obj, AdRequest):
+            dirty.add(obj.influencer_id)
+    if dirty:
+        mark_influencers(session, dirty)
+
+@event.listens_for(Session, 'after_commit')
+def _refresh_committed(session):
+    dirty = session.info.pop('match_dirty', None)
+    if dirty:
+        _index.mark_dirty(dirty)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('match_dirty', None)
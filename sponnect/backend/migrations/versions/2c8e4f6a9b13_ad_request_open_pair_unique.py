@@ -0,0 +1,34 @@
+"""Unique open ad request per campaign and influencer
+
+Revision ID: 2c8e4f6a9b13
+Revises: 9f3b5c7e21d4
+Create Date: 2026-10-18 14:05:33.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8e4f6a9b13'
+down_revision = '9f3b5c7e21d4'
+branch_labels = None
+depends_on = None
+
+OPEN = sa.text("status IN ('Pending', 'Negotiating')")
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT campaign_id, influencer_id, COUNT(*) FROM ad_requests "
+        "WHERE status IN ('Pending', 'Negotiating') GROUP BY campaign_id, influencer_id HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        pairs = ', '.join(f'campaign {c} / influencer {i} ({n})' for c, i, n in duplicates[:20])
+        raise RuntimeError(f"Resolve duplicate open ad requests before upgrading: {pairs}")
+    op.create_index('uq_adrequest_open_pair', 'ad_requests', ['campaign_id', 'influencer_id'], unique=True,
+                    sqlite_where=OPEN, postgresql_where=OPEN)
+
+
+def downgrade():
+    op.drop_index('uq_adrequest_open_pair', table_name='ad_requests')
@@ -0,0 +1,73 @@
+"""Read-path tables and indexes: counters, rollups, search indexes, updated_at columns
+
+Revision ID: 5e8d27b4c6f1
+Revises: a3c91f0d5b2e
+Create Date: 2026-10-18 09:14:03.219870
+
+The new tables start empty; fill them once after upgrading with
+`flask rebuild-counters`, `flask backfill-rollups`, `flask rebuild-search-index` and
+`flask rebuild-user-trigrams`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8d27b4c6f1'
+down_revision = 'a3c91f0d5b2e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.execute('UPDATE users SET updated_at = created_at')
+    op.execute('UPDATE campaigns SET updated_at = created_at')
+
+    op.create_index('idx_adrequest_updated_id', 'ad_requests', ['updated_at', 'id'], unique=False)
+    op.create_index('idx_adrequest_influencer_updated_id', 'ad_requests', ['influencer_id', 'updated_at', 'id'], unique=False)
+    op.create_index('idx_negotiation_request_created', 'negotiation_history', ['ad_request_id', 'created_at'], unique=False)
+
+    op.create_table('platform_counters',
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('daily_rollups',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'name')
+    )
+    op.create_table('user_trigrams',
+        sa.Column('trigram', sa.String(length=3), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('trigram', 'user_id')
+    )
+    op.create_index('ix_user_trigrams_user_id', 'user_trigrams', ['user_id'], unique=False)
+
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS influencer_search USING fts5("
+            "influencer_name, niche, category, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS influencer_search')
+    op.drop_index('ix_user_trigrams_user_id', table_name='user_trigrams')
+    op.drop_table('user_trigrams')
+    op.drop_table('daily_rollups')
+    op.drop_table('platform_counters')
+    op.drop_index('idx_negotiation_request_created', table_name='negotiation_history')
+    op.drop_index('idx_adrequest_influencer_updated_id', table_name='ad_requests')
+    op.drop_index('idx_adrequest_updated_id', table_name='ad_requests')
+    with op.batch_alter_table('campaigns') as batch_op:
+        batch_op.drop_column('updated_at')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('updated_at')
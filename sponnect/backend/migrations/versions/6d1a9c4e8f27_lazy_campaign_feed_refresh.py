@@ -0,0 +1,35 @@
+"""Lazy campaign feed refresh
+
+Revision ID: 6d1a9c4e8f27
+Revises: 2c8e4f6a9b13
+Create Date: 2026-10-18 15:12:47.208561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1a9c4e8f27'
+down_revision = '2c8e4f6a9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Lists built under the old scheme are rebuilt on their next read
+    op.execute('DELETE FROM campaign_feed_entries')
+    op.execute('DELETE FROM campaign_feed_lists')
+    with op.batch_alter_table('campaign_feed_lists') as batch_op:
+        batch_op.drop_column('min_score')
+        batch_op.add_column(sa.Column('refreshed_at', sa.DateTime(), nullable=False))
+    op.create_index('idx_campaign_updated', 'campaigns', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_campaign_updated', table_name='campaigns')
+    op.execute('DELETE FROM campaign_feed_entries')
+    op.execute('DELETE FROM campaign_feed_lists')
+    with op.batch_alter_table('campaign_feed_lists') as batch_op:
+        batch_op.drop_column('refreshed_at')
+        batch_op.add_column(sa.Column('min_score', sa.Float(), nullable=False, server_default='0'))
@@ -0,0 +1,45 @@
+"""Notification outbox
+
+Revision ID: 7b9e3d15a0c8
+Revises: c4f2a81e9d37
+Create Date: 2026-10-18 11:21:54.301927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b9e3d15a0c8'
+down_revision = 'c4f2a81e9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('claim_token', sa.String(length=32), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_notification_outbox_user_id', 'notification_outbox', ['user_id'], unique=False)
+    op.create_index('ix_notification_outbox_claim_token', 'notification_outbox', ['claim_token'], unique=False)
+    op.create_index('idx_outbox_status_available', 'notification_outbox', ['status', 'available_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_outbox_status_available', table_name='notification_outbox')
+    op.drop_index('ix_notification_outbox_claim_token', table_name='notification_outbox')
+    op.drop_index('ix_notification_outbox_user_id', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -0,0 +1,24 @@
+"""Keyset index on ad requests per campaign
+
+Revision ID: 8a4f2d6c1e93
+Revises: 6d1a9c4e8f27
+Create Date: 2026-10-18 15:48:09.517342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f2d6c1e93'
+down_revision = '6d1a9c4e8f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_adrequest_campaign_updated_id', 'ad_requests', ['campaign_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_adrequest_campaign_updated_id', table_name='ad_requests')
@@ -0,0 +1,26 @@
+"""Ad request version column for optimistic concurrency
+
+Revision ID: 9f3b5c7e21d4
+Revises: e1d6a4c83f2b
+Create Date: 2026-10-18 13:40:52.117604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9f3b5c7e21d4'
+down_revision = 'e1d6a4c83f2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ad_requests') as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('ad_requests') as batch_op:
+        batch_op.drop_column('version')
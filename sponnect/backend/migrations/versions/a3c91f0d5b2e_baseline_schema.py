@@ -0,0 +1,121 @@
+"""Baseline schema: users, campaigns, ad_requests, negotiation_history
+
+Revision ID: a3c91f0d5b2e
+Revises: 
+Create Date: 2026-10-18 09:12:41.508312
+
+Databases created before migrations were tracked (by the old `db.create_all()` on import)
+already have this schema: run `flask db stamp a3c91f0d5b2e` once, then `flask db upgrade`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91f0d5b2e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=128), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('sponsor_approved', sa.Boolean(), nullable=True),
+        sa.Column('is_flagged', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('company_name', sa.String(length=100), nullable=True),
+        sa.Column('industry', sa.String(length=100), nullable=True),
+        sa.Column('influencer_name', sa.String(length=100), nullable=True),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('niche', sa.String(length=100), nullable=True),
+        sa.Column('reach', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_role', 'users', ['role'], unique=False)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table('campaigns',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=120), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.Column('end_date', sa.DateTime(), nullable=True),
+        sa.Column('budget', sa.Float(), nullable=False),
+        sa.Column('visibility', sa.String(length=10), nullable=False),
+        sa.Column('goals', sa.Text(), nullable=True),
+        sa.Column('is_flagged', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sponsor_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['sponsor_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_campaign_sponsor_visibility', 'campaigns', ['sponsor_id', 'visibility'], unique=False)
+    op.create_index('ix_campaigns_visibility', 'campaigns', ['visibility'], unique=False)
+    op.create_index('ix_campaigns_sponsor_id', 'campaigns', ['sponsor_id'], unique=False)
+
+    op.create_table('ad_requests',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('influencer_id', sa.Integer(), nullable=False),
+        sa.Column('initiator_id', sa.Integer(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('requirements', sa.Text(), nullable=False),
+        sa.Column('payment_amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('last_offer_by', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id']),
+        sa.ForeignKeyConstraint(['influencer_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['initiator_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ad_requests_status', 'ad_requests', ['status'], unique=False)
+    op.create_index('ix_ad_requests_campaign_id', 'ad_requests', ['campaign_id'], unique=False)
+    op.create_index('idx_adrequest_status', 'ad_requests', ['status'], unique=False)
+    op.create_index('ix_ad_requests_influencer_id', 'ad_requests', ['influencer_id'], unique=False)
+    op.create_index('idx_adrequest_campaign_influencer', 'ad_requests', ['campaign_id', 'influencer_id'], unique=False)
+    op.create_index('ix_ad_requests_initiator_id', 'ad_requests', ['initiator_id'], unique=False)
+
+    op.create_table('negotiation_history',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ad_request_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('user_role', sa.String(length=20), nullable=False),
+        sa.Column('action', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('payment_amount', sa.Float(), nullable=True),
+        sa.Column('requirements', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['ad_request_id'], ['ad_requests.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_negotiation_history_ad_request_id', 'negotiation_history', ['ad_request_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_negotiation_history_ad_request_id', table_name='negotiation_history')
+    op.drop_table('negotiation_history')
+    op.drop_index('ix_ad_requests_initiator_id', table_name='ad_requests')
+    op.drop_index('idx_adrequest_campaign_influencer', table_name='ad_requests')
+    op.drop_index('ix_ad_requests_influencer_id', table_name='ad_requests')
+    op.drop_index('idx_adrequest_status', table_name='ad_requests')
+    op.drop_index('ix_ad_requests_campaign_id', table_name='ad_requests')
+    op.drop_index('ix_ad_requests_status', table_name='ad_requests')
+    op.drop_table('ad_requests')
+    op.drop_index('ix_campaigns_sponsor_id', table_name='campaigns')
+    op.drop_index('ix_campaigns_visibility', table_name='campaigns')
+    op.drop_index('idx_campaign_sponsor_visibility', table_name='campaigns')
+    op.drop_table('campaigns')
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_role', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
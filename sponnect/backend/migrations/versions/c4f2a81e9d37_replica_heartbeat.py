@@ -0,0 +1,28 @@
+"""Replica heartbeat table for read-replica lag
+
+Revision ID: c4f2a81e9d37
+Revises: 5e8d27b4c6f1
+Create Date: 2026-10-18 10:02:17.845113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f2a81e9d37'
+down_revision = '5e8d27b4c6f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('replica_heartbeat',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('beat_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('replica_heartbeat')
@@ -0,0 +1,43 @@
+"""Precomputed influencer campaign feeds
+
+Revision ID: e1d6a4c83f2b
+Revises: 7b9e3d15a0c8
+Create Date: 2026-10-18 13:02:17.508341
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1d6a4c83f2b'
+down_revision = '7b9e3d15a0c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('campaign_feed_lists',
+        sa.Column('influencer_id', sa.Integer(), nullable=False),
+        sa.Column('built_at', sa.DateTime(), nullable=False),
+        sa.Column('min_score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['influencer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('influencer_id')
+    )
+    op.create_table('campaign_feed_entries',
+        sa.Column('influencer_id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['influencer_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('influencer_id', 'campaign_id')
+    )
+    op.create_index('ix_campaign_feed_entries_campaign_id', 'campaign_feed_entries', ['campaign_id'], unique=False)
+    op.create_index('idx_feed_influencer_score', 'campaign_feed_entries', ['influencer_id', 'score', 'campaign_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_feed_influencer_score', table_name='campaign_feed_entries')
+    op.drop_index('ix_campaign_feed_entries_campaign_id', table_name='campaign_feed_entries')
+    op.drop_table('campaign_feed_entries')
+    op.drop_table('campaign_feed_lists')
@@ -1,8 +1,24 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask import g, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
-db = SQLAlchemy()
+
+class RoutingSession(SignallingSession):
+    """Sends reads to the 'replica' bind while the request allows it (see replicas.py).
+    Flushes, and everything after one, always use the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self._flushing and has_request_context() and g.get('read_replica'):
+            return self.app.extensions['sqlalchemy'].db.get_engine(self.app, bind='replica')
+        return super().get_bind(mapper, clause, **kwargs)
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+db = RoutingSQLAlchemy()
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -15,6 +31,7 @@ class User(db.Model):
     sponsor_approved = db.Column(db.Boolean, nullable=True, default=None) # For sponsors: True/False/None
     is_flagged = db.Column(db.Boolean, default=False, nullable=False) # For admin flagging
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Sponsor specific fields
     company_name = db.Column(db.String(100), nullable=True)
@@ -56,6 +73,7 @@ class Campaign(db.Model):
     goals = db.Column(db.Text, nullable=True)
     is_flagged = db.Column(db.Boolean, default=False, nullable=False) # For admin flagging
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     sponsor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
 
     # Relationships
@@ -80,16 +98,136 @@ class AdRequest(db.Model):
     last_offer_by = db.Column(db.String(20), nullable=True) # 'sponsor' or 'influencer' - tracks negotiation turn
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1') # Bumped by every ORM update
 
     # Relationships
     campaign = db.relationship('Campaign', back_populates='ad_requests', foreign_keys=[campaign_id])
     target_influencer = db.relationship('User', back_populates='ad_requests_received', foreign_keys=[influencer_id])
     initiating_user = db.relationship('User', back_populates='ad_requests_initiated', foreign_keys=[initiator_id])
 
+    # UPDATE/DELETE ... WHERE id = ? AND version = ?; a lost race raises StaleDataError at flush
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<AdRequest {self.id} Campaign:{self.campaign_id} Status:{self.status}>'
 
 # Add Indexes
 db.Index('idx_adrequest_campaign_influencer', AdRequest.campaign_id, AdRequest.influencer_id)
+# At most one open ad request per campaign and influencer, enforced by the database
+OPEN_AD_REQUEST_STATUSES = ('Pending', 'Negotiating')
+db.Index('uq_adrequest_open_pair', AdRequest.campaign_id, AdRequest.influencer_id, unique=True,
+         sqlite_where=AdRequest.status.in_(OPEN_AD_REQUEST_STATUSES),
+         postgresql_where=AdRequest.status.in_(OPEN_AD_REQUEST_STATUSES))
 db.Index('idx_adrequest_status', AdRequest.status)
+# Keyset pagination of ad-request feeds on (updated_at, id)
+db.Index('idx_adrequest_updated_id', AdRequest.updated_at, AdRequest.id)
+db.Index('idx_adrequest_influencer_updated_id', AdRequest.influencer_id, AdRequest.updated_at, AdRequest.id)
+db.Index('idx_adrequest_campaign_updated_id', AdRequest.campaign_id, AdRequest.updated_at, AdRequest.id)
 db.Index('idx_campaign_sponsor_visibility', Campaign.sponsor_id, Campaign.visibility)
+# Campaigns changed since an influencer feed's last refresh
+db.Index('idx_campaign_updated', Campaign.updated_at)
+
+class NegotiationHistory(db.Model):
+    __tablename__ = 'negotiation_history'
+    id = db.Column(db.Integer, primary_key=True)
+    ad_request_id = db.Column(db.Integer, db.ForeignKey('ad_requests.id', ondelete='CASCADE'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_role = db.Column(db.String(20), nullable=False)  # 'sponsor' or 'influencer'
+    action = db.Column(db.String(20), nullable=False)  # 'propose', 'counter', 'accept', 'reject'
+    message = db.Column(db.Text, nullable=True)
+    payment_amount = db.Column(db.Float, nullable=True)
+    requirements = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    ad_request = db.relationship('AdRequest', backref=db.backref('negotiation_history', lazy='dynamic', cascade='all, delete-orphan'))
+    user = db.relationship('User')
+    
+    def __repr__(self):
+        return f'<NegotiationHistory {self.id} AdRequest:{self.ad_request_id} Action:{self.action}>'
+
+# Latest-action lookups for the negotiation summaries
+db.Index('idx_negotiation_request_created', NegotiationHistory.ad_request_id, NegotiationHistory.created_at)
+
+class PlatformCounter(db.Model):
+    """Pre-aggregated row counts per dimension bucket (see counters.py)."""
+    __tablename__ = 'platform_counters'
+    name = db.Column(db.String(120), primary_key=True) # e.g. 'user:role=sponsor:active=1:approved=0:flagged=0'
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PlatformCounter {self.name}={self.value}>'
+
+class DailyRollup(db.Model):
+    """Rows created per day and dimension bucket (see rollups.py)."""
+    __tablename__ = 'daily_rollups'
+    day = db.Column(db.Date, primary_key=True)
+    name = db.Column(db.String(120), primary_key=True) # e.g. 'ad_request:status=Accepted'
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyRollup {self.day} {self.name}={self.value}>'
+
+class UserTrigram(db.Model):
+    """Trigram inverted index over searchable user names (see trigrams.py)."""
+    __tablename__ = 'user_trigrams'
+    trigram = db.Column(db.String(3), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f'<UserTrigram {self.trigram!r} User:{self.user_id}>'
+
+class ReplicaHeartbeat(db.Model):
+    """Single row stamped on the primary by `flask sync-replica`; its age on the replica is the lag."""
+    __tablename__ = 'replica_heartbeat'
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<ReplicaHeartbeat {self.beat_at}>'
+
+class NotificationOutbox(db.Model):
+    """Notification jobs written in the same transaction as the change (see notifications.py)."""
+    __tablename__ = 'notification_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False) # e.g. 'ad_request.updated'
+    payload = db.Column(db.Text, nullable=False) # JSON
+    status = db.Column(db.String(20), nullable=False, default='pending') # 'pending', 'processing', 'sent', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow) # Not delivered before this
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<NotificationOutbox {self.id} User:{self.user_id} {self.kind} {self.status}>'
+
+# Due-job scans by the outbox worker
+db.Index('idx_outbox_status_available', NotificationOutbox.status, NotificationOutbox.available_at)
+
+class CampaignFeedList(db.Model):
+    """An influencer's precomputed campaign feed: when it was built from all campaigns and
+    up to when changed campaigns have been folded in since (see feeds.py)."""
+    __tablename__ = 'campaign_feed_lists'
+    influencer_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    built_at = db.Column(db.DateTime, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<CampaignFeedList Influencer:{self.influencer_id} {self.built_at}>'
+
+class CampaignFeedEntry(db.Model):
+    """One ranked campaign in an influencer's feed (see feeds.py)."""
+    __tablename__ = 'campaign_feed_entries'
+    influencer_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id', ondelete='CASCADE'), primary_key=True, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<CampaignFeedEntry Influencer:{self.influencer_id} Campaign:{self.campaign_id} {self.score}>'
+
+# Feed pages: keyset on (score, campaign_id) within one influencer
+db.Index('idx_feed_influencer_score', CampaignFeedEntry.influencer_id, CampaignFeedEntry.score, CampaignFeedEntry.campaign_id)
@@ -0,0 +1,74 @@
+# moderation.py
+"""Set-based admin moderation.
+
+An action is one `UPDATE ... WHERE id IN (...)` per chunk of ids, restricted to rows the
+single-item admin routes would accept and whose value actually changes, so the returned
+counts are exact. Bulk UPDATEs bypass the flush hooks: each chunk first counts its rows per
+counter bucket and applies the deltas itself (moderation never changes a rollup
+dimension), and the touched cache scopes, users and match-index rows are recorded for
+invalidation on commit. Influencer feeds need nothing: they pick up flagged or unflagged
+campaigns through updated_at, which the UPDATE sets from the column's onupdate.
+"""
+from collections import Counter
+from sqlalchemy import and_, or_, func
+
+from models import db, User, Campaign
+from counters import DIMENSIONS, bucket_for_values, apply_deltas
+from response_cache import CACHE_SCOPES, mark_changed
+from identity import evict_users
+from replicas import mark_written
+from matching import mark_influencers
+
+CHUNK_SIZE = 500 # ids per UPDATE, well under SQLite's bound-parameter limit
+
+# model -> action -> (rows the action applies to, values it sets)
+ACTIONS = {
+    User: {
+        'flag': (and_(User.role != 'admin', User.is_flagged == False), {'is_flagged': True}),
+        'unflag': (User.is_flagged == True, {'is_flagged': False}),
+        'deactivate': (and_(User.role != 'admin', User.is_active == True), {'is_active': False}),
+        'activate': (and_(User.role != 'admin', User.is_active == False,
+                          or_(User.role != 'sponsor', User.sponsor_approved == True)), {'is_active': True}),
+        'approve': (and_(User.role == 'sponsor', or_(User.sponsor_approved == None, User.sponsor_approved == False)),
+                    {'sponsor_approved': True, 'is_active': True}),
+        'reject': (and_(User.role == 'sponsor', User.sponsor_approved == False),
+                   {'is_active': False, 'sponsor_approved': None}),
+    },
+    Campaign: {
+        'flag': (Campaign.is_flagged == False, {'is_flagged': True}),
+        'unflag': (Campaign.is_flagged == True, {'is_flagged': False}),
+    },
+}
+
+
+def _counter_deltas(model, condition, values):
+    """Counter moves caused by setting `values` on the rows matching `condition`."""
+    attrs = [attr for attr, _, _ in DIMENSIONS[model][1]]
+    columns = [getattr(model, attr) for attr in attrs]
+    deltas = Counter()
+    for *old, count in db.session.query(*columns, func.count()).filter(condition).group_by(*columns):
+        old = dict(zip(attrs, old))
+        new = {**old, **{attr: value for attr, value in values.items() if attr in old}}
+        deltas[bucket_for_values(model, old)] -= count
+        deltas[bucket_for_values(model, new)] += count
+    return deltas
+
+def moderate(model, action, ids, chunk_size=CHUNK_SIZE):
+    """Applies `action` to the rows of `model` among `ids`. Returns the number of rows
+    changed; the caller commits."""
+    condition, values = ACTIONS[model][action]
+    session = db.session
+    affected = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        where = and_(model.id.in_(chunk), condition)
+        deltas = _counter_deltas(model, where, values)
+        affected += model.query.filter(where).update(values, synchronize_session=False)
+        apply_deltas(session.connection(), deltas)
+        if model is User:
+            evict_users(session, chunk)
+            mark_influencers(session, chunk)
+    if affected:
+        mark_changed(session, CACHE_SCOPES[model.__tablename__])
+        mark_written(session)
+    return affected
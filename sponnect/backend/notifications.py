@@ -0,0 +1,157 @@
+# notifications.py
+"""Outbox-backed notification delivery.
+
+Routes write notification jobs into notification_outbox in the same transaction as the
+change they describe, so a job exists exactly when the change commits and sending never
+adds latency to a request. Each job becomes due NOTIFICATION_DIGEST_SECONDS after it is
+written. A worker (`flask process-notifications`, or the Celery task in worker.py) claims
+every user with a due job together with all of that user's pending jobs, and delivers one
+digest per user, so a burst of counter-offers becomes a single message. Failed digests
+are retried with exponential backoff until NOTIFICATION_MAX_ATTEMPTS, then marked failed.
+
+Claims are made with a random token in a conditional UPDATE, so concurrent workers never
+send the same job twice; a claim older than CLAIM_LEASE_SECONDS (a crashed worker) is
+taken over. Outcomes are recorded with the same token condition, so a worker whose claim
+was taken over mid-delivery cannot overwrite the new owner's state. NOTIFICATION_SINK selects delivery: 'log' (default, for local runs), 'mail'
+(Flask-Mail) or 'webhook' (JSON POST to NOTIFICATION_WEBHOOK_URL).
+"""
+import json
+import random
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from models import db, User, NotificationOutbox
+
+CLAIM_LEASE_SECONDS = 300
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+
+def enqueue_notifications(session, jobs):
+    """Adds the (user id, kind, payload) jobs to the current transaction in one executemany."""
+    due = datetime.utcnow() + timedelta(seconds=current_app.config['NOTIFICATION_DIGEST_SECONDS'])
+    rows = [{'user_id': user_id, 'kind': kind, 'payload': json.dumps(payload), 'status': 'pending',
+             'attempts': 0, 'available_at': due} for user_id, kind, payload in jobs if user_id is not None]
+    if rows:
+        session.execute(NotificationOutbox.__table__.insert(), rows)
+
+
+# --- Sinks ---
+def _digest_lines(jobs):
+    lines = []
+    for job in jobs:
+        data = json.loads(job.payload)
+        change = {'ad_request.created': 'new ad request', 'ad_request.updated': 'updated',
+                  'ad_request.deleted': 'withdrawn'}.get(job.kind, job.kind)
+        lines.append(f"Ad request #{data.get('ad_request_id')} (campaign {data.get('campaign_id')}): {change}, "
+                     f"status {data.get('status')}, offer {data.get('payment_amount')}")
+    return lines
+
+def _send_log(user, jobs):
+    current_app.logger.info("Notification digest for %s: %s", user.email, '; '.join(_digest_lines(jobs)))
+
+def _send_mail(user, jobs):
+    from flask_mail import Message # Optional dependency, only needed for this sink
+    count = len(jobs)
+    message = Message(subject=f"Sponnect: {count} update{'s' if count != 1 else ''} on your ad requests",
+                      recipients=[user.email], body='\n'.join(_digest_lines(jobs)))
+    current_app.extensions['mail'].send(message)
+
+def _send_webhook(user, jobs):
+    body = json.dumps({'user_id': user.id, 'email': user.email, 'notifications': [
+        {'id': job.id, 'kind': job.kind, 'payload': json.loads(job.payload),
+         'created_at': job.created_at.isoformat() if job.created_at else None} for job in jobs]}).encode()
+    request = urllib.request.Request(current_app.config['NOTIFICATION_WEBHOOK_URL'], data=body,
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+
+SINKS = {'log': _send_log, 'mail': _send_mail, 'webhook': _send_webhook}
+
+
+def init_app(app):
+    if app.config['NOTIFICATION_SINK'] not in SINKS:
+        raise ValueError(f"Unknown NOTIFICATION_SINK {app.config['NOTIFICATION_SINK']!r}")
+    if app.config['NOTIFICATION_SINK'] == 'mail':
+        from flask_mail import Mail
+        Mail(app)
+
+
+# --- Worker ---
+def backoff_seconds(attempts):
+    """Delay before retry number `attempts`: base * 2^(attempts-1), +/-20% jitter, capped."""
+    delay = current_app.config['NOTIFICATION_RETRY_BASE_SECONDS'] * 2 ** (attempts - 1)
+    return min(delay, MAX_BACKOFF_SECONDS) * random.uniform(0.8, 1.2)
+
+def _claim(batch_size):
+    """Claims all pending jobs of up to `batch_size` users with a due job. Returns the token."""
+    now = datetime.utcnow()
+    claimable = or_(NotificationOutbox.status == 'pending',
+                    and_(NotificationOutbox.status == 'processing',
+                         NotificationOutbox.claimed_at < now - timedelta(seconds=CLAIM_LEASE_SECONDS)))
+    due_users = [user_id for (user_id,) in db.session.query(NotificationOutbox.user_id)
+                 .filter(claimable, NotificationOutbox.available_at <= now)
+                 .distinct().limit(batch_size)]
+    if not due_users:
+        return None
+    token = uuid.uuid4().hex
+    NotificationOutbox.query.filter(NotificationOutbox.user_id.in_(due_users), claimable) \
+        .update({'status': 'processing', 'claim_token': token, 'claimed_at': now}, synchronize_session=False)
+    db.session.commit()
+    return token
+
+def _finish(job_id, token, **values):
+    """Records a job's outcome if the claim `token` still holds it. Returns whether it did."""
+    outbox = NotificationOutbox.__table__
+    return db.session.execute(outbox.update().where(outbox.c.id == job_id, outbox.c.claim_token == token)
+                              .values(claim_token=None, **values)).rowcount == 1
+
+def process_outbox(batch_size=None):
+    """Delivers one round of digests. Returns {'sent': jobs, 'retried': jobs, 'failed': jobs}."""
+    config = current_app.config
+    token = _claim(batch_size or config['NOTIFICATION_BATCH_SIZE'])
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+    if token is None:
+        return result
+
+    jobs_by_user = defaultdict(list)
+    for job in NotificationOutbox.query.filter_by(claim_token=token).order_by(NotificationOutbox.id):
+        jobs_by_user[job.user_id].append(job)
+    users = {user.id: user for user in User.query.filter(User.id.in_(list(jobs_by_user)))}
+    send = SINKS[config['NOTIFICATION_SINK']]
+
+    for user_id, jobs in jobs_by_user.items():
+        now = datetime.utcnow()
+        lost = 0
+        try:
+            if user_id not in users:
+                raise LookupError("User no longer exists")
+            send(users[user_id], jobs)
+        except Exception as error:
+            current_app.logger.warning("Notification digest for user %s failed: %s", user_id, error)
+            for job in jobs:
+                attempts = job.attempts + 1
+                if attempts >= config['NOTIFICATION_MAX_ATTEMPTS']:
+                    outcome, values = 'failed', {'status': 'failed'}
+                else:
+                    outcome, values = 'retried', {
+                        'status': 'pending', 'available_at': now + timedelta(seconds=backoff_seconds(attempts))}
+                if _finish(job.id, token, attempts=attempts, last_error=str(error)[:1000], **values):
+                    result[outcome] += 1
+                else:
+                    lost += 1
+        else:
+            for job in jobs:
+                if _finish(job.id, token, status='sent', sent_at=now):
+                    result['sent'] += 1
+                else:
+                    lost += 1
+        if lost:
+            current_app.logger.warning("Claim on %s notification job(s) of user %s expired during delivery; "
+                                       "left to the worker that took them over", lost, user_id)
+        db.session.commit() # Per user, so a later failure never re-sends an earlier digest
+    return result
@@ -0,0 +1,92 @@
+# passwords.py
+"""Bounded worker pool for password hashing and verification.
+
+PBKDF2 is deliberately CPU-heavy, and hashlib releases the GIL while it runs, so a small
+thread pool takes it off the request thread without blocking the rest of the worker.
+At most PASSWORD_POOL_WORKERS jobs run and PASSWORD_POOL_MAX_QUEUE more may wait. Beyond
+that `PasswordPoolBusy` is raised immediately so the route can shed load with a 503
+instead of queueing requests until they time out.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+
+_pool = None
+_slots = None
+_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool, _slots, _workers
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = current_app.config
+                _workers = workers = config.get('PASSWORD_POOL_WORKERS') or os.cpu_count() or 1
+                _slots = threading.BoundedSemaphore(workers + config.get('PASSWORD_POOL_MAX_QUEUE', 0))
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+    return _pool, _slots
+
+def _run(fn, *args):
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolBusy()
+    try:
+        future = pool.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def current_method():
+    """Werkzeug method string for new hashes, e.g. 'pbkdf2:sha256:260000'."""
+    config = current_app.config
+    return f"pbkdf2:{config['PASSWORD_HASH_ALGORITHM']}:{config['PASSWORD_HASH_ITERATIONS']}"
+
+def hash_password(password):
+    """Hashes with the configured cost on the pool. Raises PasswordPoolBusy when saturated."""
+    return _run(generate_password_hash, password, current_method(), current_app.config['PASSWORD_SALT_LENGTH'])
+
+def hash_passwords(passwords):
+    """Hashes many passwords in parallel for bulk jobs. Waits for free slots instead of raising
+    PasswordPoolBusy, and keeps at most one job per worker in flight so the queue stays
+    available to interactive logins."""
+    pool, slots = _get_pool()
+    in_flight = threading.BoundedSemaphore(_workers)
+    method, salt_length = current_method(), current_app.config['PASSWORD_SALT_LENGTH']
+
+    def release(_):
+        slots.release()
+        in_flight.release()
+
+    futures = []
+    for password in passwords:
+        in_flight.acquire()
+        slots.acquire()
+        try:
+            future = pool.submit(generate_password_hash, password, method, salt_length)
+        except BaseException:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        futures.append(future)
+    return [future.result() for future in futures]
+
+def verify_password(password_hash, password):
+    """Checks a password on the pool. Raises PasswordPoolBusy when saturated."""
+    return _run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """True if the stored hash was made with a different method or cost than configured."""
+    method = password_hash.split('$', 1)[0]
+    return method != current_method()
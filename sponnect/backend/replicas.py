@@ -0,0 +1,193 @@
+# replicas.py
+"""Read-replica routing for read-only endpoints.
+
+Views decorated with @replica_reads run their queries on the 'replica' bind
+(REPLICA_DATABASE_URL) unless no replica is configured, the replica lags more than
+REPLICA_MAX_LAG seconds (or its lag is unknown), or the caller committed a write in the
+last REPLICA_STICKY_SECONDS, so people always read their own writes from the primary. A
+flush inside the request moves the rest of it to the primary too. Other callers may read
+data up to REPLICA_MAX_LAG old from the replica, but such a response is only stored in the
+response cache when the replica already contains every write that moved the generations
+it is keyed under (see `g.replica_position` in response_cache.py); otherwise a stale
+response could be cached as current after a write.
+
+Lag is the age of the replica_heartbeat row as seen on the replica. `flask sync-replica`
+stamps it on the primary and, when both databases are SQLite files, copies the primary into
+the replica with the SQLite backup API, so a local replica stays in sync by running it with
+--interval. Behind a replicating server database it only has to stamp the heartbeat.
+"""
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from models import db, ReplicaHeartbeat
+from response_cache import cache
+
+
+def init_app(app):
+    url = app.config.get('REPLICA_DATABASE_URL')
+    if url:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), 'replica': url}
+    app.after_request(_mark_sticky)
+
+def replica_configured():
+    return 'replica' in (current_app.config.get('SQLALCHEMY_BINDS') or {})
+
+
+# --- Lag ---
+_lag = {'checked': None, 'seconds': None, 'beat_at': None}
+_lag_lock = threading.Lock()
+
+def _read_heartbeat():
+    table = ReplicaHeartbeat.__table__
+    try:
+        with db.get_engine(bind='replica').connect() as connection:
+            return connection.execute(select(table.c.beat_at).where(table.c.id == 1)).scalar()
+    except SQLAlchemyError: # Unreachable replica or not synced yet
+        return None
+
+def _check_replica():
+    """Refreshes the heartbeat reading at most once per REPLICA_LAG_CHECK_INTERVAL per
+    process; other callers reuse the last one meanwhile."""
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag['checked']
+        if checked is not None and now - checked < current_app.config['REPLICA_LAG_CHECK_INTERVAL']:
+            return
+        _lag['checked'] = now
+    beat_at = _read_heartbeat()
+    with _lag_lock:
+        _lag['beat_at'] = beat_at
+        _lag['seconds'] = None if beat_at is None else max(0.0, (datetime.utcnow() - beat_at).total_seconds())
+
+def replica_lag():
+    """Replica lag in seconds, or None if unknown."""
+    _check_replica()
+    with _lag_lock:
+        return _lag['seconds']
+
+def replica_position():
+    """Primary clock time (epoch ns) the replica is known to contain every commit up to, or
+    None if unknown: the last heartbeat it has applied."""
+    _check_replica()
+    with _lag_lock:
+        beat_at = _lag['beat_at']
+    return None if beat_at is None else int(beat_at.replace(tzinfo=timezone.utc).timestamp() * 1e9)
+
+
+# --- Routing ---
+_routes = Counter()
+_routes_lock = threading.Lock()
+
+def _sticky_key(user_id):
+    return f'replica-sticky:{user_id}'
+
+def _caller_id():
+    identity = g.get('identity')
+    if identity is not None:
+        return identity.user_id
+    try:
+        return get_jwt_identity()
+    except RuntimeError: # No verified token in this request
+        return None
+
+def _route():
+    if not replica_configured():
+        return 'disabled'
+    user_id = _caller_id()
+    if user_id is not None and cache.get(_sticky_key(user_id)):
+        return 'sticky'
+    lag = replica_lag()
+    if lag is None or lag > current_app.config['REPLICA_MAX_LAG']:
+        return 'lagging'
+    return 'replica'
+
+def replica_reads(fn):
+    """Serves a read-only view from the replica when it is safe to. Apply below the auth
+    decorators so the caller is known for read-your-writes stickiness."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        route = _route()
+        with _routes_lock:
+            _routes[route] += 1
+        g.read_replica = route == 'replica'
+        if g.read_replica:
+            g.replica_position = replica_position()
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def mark_written(session):
+    """Records a write the flush hook cannot see (bulk UPDATE), for read-your-writes stickiness."""
+    session.info['replica_wrote'] = True
+
+@event.listens_for(Session, 'after_flush')
+def _pin_to_primary(session, flush_context):
+    mark_written(session)
+    if has_request_context():
+        g.read_replica = False
+
+@event.listens_for(Session, 'after_commit')
+def _note_committed_write(session):
+    if session.info.pop('replica_wrote', None) and has_request_context():
+        g.wrote_primary = True
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_write(session):
+    session.info.pop('replica_wrote', None)
+
+def _mark_sticky(response):
+    if g.get('wrote_primary') and replica_configured():
+        user_id = _caller_id()
+        if user_id is not None:
+            cache.set(_sticky_key(user_id), True, timeout=current_app.config['REPLICA_STICKY_SECONDS'])
+    return response
+
+
+def replica_status():
+    """Routing decisions per outcome for this process and the current lag."""
+    enabled = replica_configured()
+    lag = replica_lag() if enabled else None
+    max_lag = current_app.config['REPLICA_MAX_LAG']
+    with _routes_lock:
+        routed = dict(_routes)
+    return {
+        'enabled': enabled,
+        'lag_seconds': lag,
+        'max_lag_seconds': max_lag,
+        'healthy': lag is not None and lag <= max_lag,
+        'routed': routed,
+    }
+
+
+# --- Sync job ---
+def _sqlite_path(engine):
+    if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        return None
+    return engine.url.database
+
+def sync_replica():
+    """Stamps the heartbeat on the primary, then copies a SQLite primary into a SQLite
+    replica. Returns True if a copy was made."""
+    db.session.merge(ReplicaHeartbeat(id=1, beat_at=datetime.utcnow()))
+    db.session.commit()
+    primary, replica = _sqlite_path(db.engine), _sqlite_path(db.get_engine(bind='replica'))
+    if not (primary and replica):
+        return False
+    source = sqlite3.connect(primary, timeout=30)
+    target = sqlite3.connect(replica, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return True
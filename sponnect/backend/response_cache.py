@@ -0,0 +1,186 @@
+# response_cache.py
+"""Response cache for read-heavy endpoints, invalidated by write generations.
+
+Cached responses are keyed by endpoint, path, query args, caller role and the current
+generation of every data scope ('users', 'campaigns', 'ad_requests') the endpoint reads.
+A session hook records which scopes a transaction touched and, after commit, moves those
+generations forward, so any later read misses and is rebuilt from fresh data. Stale
+entries are never served; they simply age out. A response read from a lagging replica is
+served but not stored unless the replica already holds the writes behind its generations.
+
+The backend is chosen with CACHE_TYPE: the default `response_cache.LRUCache` is a
+process-local LRU for single-node use, and any shared Flask-Caching backend (e.g.
+`RedisCache` with CACHE_REDIS_URL) works for multi-worker deployments because the
+generations live in the cache too.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from itertools import chain
+
+from flask import current_app, g, request, has_app_context
+from flask_caching import Cache
+from flask_caching.backends.base import BaseCache
+from flask_jwt_extended import get_jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+cache = Cache()
+
+# Table name -> cache scope invalidated when rows of that table change
+CACHE_SCOPES = {
+    'users': 'users',
+    'campaigns': 'campaigns',
+    'ad_requests': 'ad_requests',
+    'negotiation_history': 'ad_requests',
+}
+
+
+class LRUCache(BaseCache):
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, threshold=1000, default_timeout=300):
+        super().__init__(default_timeout)
+        self._threshold = threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs.update(threshold=config.get('CACHE_THRESHOLD', 1000))
+        return cls(*args, **kwargs)
+
+    def _expiry(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time.monotonic() + timeout if timeout > 0 else None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = (value, self._expiry(timeout))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._threshold:
+                self._entries.popitem(last=False)
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        return True
+
+
+# --- Generations ---
+def _generation_key(scope):
+    return f'generation:{scope}'
+
+def get_generation(scope):
+    """Current generation of `scope`. Missing generations (first use or evicted) are seeded
+    from the clock, so they never fall back to a value an older cached response used."""
+    generation = cache.get(_generation_key(scope))
+    if generation is None:
+        cache.add(_generation_key(scope), time.time_ns(), timeout=0)
+        generation = cache.get(_generation_key(scope)) or time.time_ns()
+    return generation
+
+def bump_generations(scopes):
+    """Invalidates every cached response that depends on any of `scopes`."""
+    for scope in scopes:
+        cache.set(_generation_key(scope), time.time_ns(), timeout=0)
+
+def mark_changed(session, *scopes):
+    """Records scopes changed by statements the flush hook cannot see (bulk UPDATE/DELETE)."""
+    session.info.setdefault('cache_scopes', set()).update(scopes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_scopes(session, flush_context):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        scope = CACHE_SCOPES.get(getattr(obj, '__tablename__', None))
+        if scope:
+            mark_changed(session, scope)
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_scopes(session):
+    scopes = session.info.pop('cache_scopes', None)
+    if scopes and has_app_context():
+        bump_generations(scopes)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_scopes(session):
+    session.info.pop('cache_scopes', None)
+
+
+# --- Hit/miss statistics (per process) ---
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+_stats_lock = threading.Lock()
+
+def _record(endpoint, outcome):
+    with _stats_lock:
+        _stats[endpoint][outcome] += 1
+
+def cache_stats():
+    with _stats_lock:
+        return {endpoint: dict(counts) for endpoint, counts in _stats.items()}
+
+
+def _cache_key(endpoint, scopes):
+    """(Cache key, the generations it is keyed under)."""
+    args = sorted(request.args.items(multi=True))
+    role = get_jwt().get('role')
+    generations = [get_generation(scope) for scope in scopes]
+    raw = repr((endpoint, request.path, args, role, generations))
+    return 'response:' + hashlib.sha1(raw.encode()).hexdigest(), generations
+
+def _fresh_enough(generations):
+    """False if the response was read from a replica that may predate a write behind one of
+    `generations` (both are primary clock times in ns; see replicas.replica_position)."""
+    if not g.get('read_replica'):
+        return True
+    position = g.get('replica_position')
+    return position is not None and position >= max(generations, default=0)
+
+def cached_response(timeout, scopes):
+    """Caches successful JSON responses of a view for `timeout` seconds.
+
+    Must be applied below the auth decorators so access checks still run on every call.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key, generations = _cache_key(fn.__name__, scopes)
+            cached = cache.get(key)
+            if cached is not None:
+                _record(fn.__name__, 'hits')
+                return current_app.response_class(cached, status=200, mimetype='application/json')
+            _record(fn.__name__, 'misses')
+            response = current_app.make_response(fn(*args, **kwargs))
+            if response.status_code == 200 and _fresh_enough(generations):
+                cache.set(key, response.get_data(), timeout=timeout)
+            return response
+        return wrapper
+    return decorator
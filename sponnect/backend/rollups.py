@@ -0,0 +1,109 @@
+# rollups.py
+"""Daily time-bucket rollups behind the /api/charts/* time series.
+
+Rows are counted per creation day and per bucket (user role, ad request status), and kept
+up to date by an after_flush hook the same way as the platform counters: inserts add to
+the creation day, status changes move the row between buckets of that day, deletes
+subtract. Chart endpoints sum at most a few hundred rollup rows into months, however large
+the underlying tables are. `flask backfill-rollups` rebuilds the table from scratch.
+"""
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db, User, Campaign, AdRequest, DailyRollup
+from counters import bucket_for_values, attribute_values, parse_counter_name, increment
+
+ROLLUP_DIMENSIONS = {
+    User: ('user', [('role', 'role', str)]),
+    Campaign: ('campaign', []),
+    AdRequest: ('ad_request', [('status', 'status', str)]),
+}
+
+
+def _rollup_key(obj, committed=False):
+    """(creation day, bucket name), or None for a row without a creation date: rows from
+    before created_at had a default are left out of the rollups, as in backfill_rollups."""
+    if obj.created_at is None:
+        return None
+    model = type(obj)
+    attrs = [attr for attr, _, _ in ROLLUP_DIMENSIONS[model][1]]
+    name = bucket_for_values(model, attribute_values(obj, attrs, committed), ROLLUP_DIMENSIONS)
+    return obj.created_at.date(), name
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_rollup_changes(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if type(obj) in ROLLUP_DIMENSIONS:
+            deltas[_rollup_key(obj)] += 1
+    for obj in session.dirty:
+        if type(obj) in ROLLUP_DIMENSIONS and session.is_modified(obj, include_collections=False):
+            old, new = _rollup_key(obj, committed=True), _rollup_key(obj)
+            if old != new:
+                deltas[old] -= 1
+                deltas[new] += 1
+    for obj in session.deleted:
+        if type(obj) in ROLLUP_DIMENSIONS:
+            deltas[_rollup_key(obj, committed=True)] -= 1
+
+    deltas.pop(None, None) # Undated rows
+    connection = session.connection() if deltas else None
+    for (day, name), delta in deltas.items():
+        if delta:
+            increment(connection, DailyRollup.__table__, {'day': day, 'name': name}, delta)
+
+
+def month_labels(start_date, end_date):
+    """'YYYY-MM' labels for every month from start_date to end_date inclusive."""
+    labels = []
+    current = start_date.replace(day=1)
+    while current <= end_date:
+        labels.append(current.strftime('%Y-%m'))
+        # Move to next month
+        if current.month == 12:
+            current = current.replace(year=current.year + 1, month=1)
+        else:
+            current = current.replace(month=current.month + 1)
+    return labels
+
+
+class RollupWindow:
+    """Rollup rows between two dates, loaded with one SELECT, summed per month on read."""
+
+    def __init__(self, rows):
+        self._rows = [(day, *parse_counter_name(name), value) for day, name, value in rows]
+
+    @classmethod
+    def load(cls, start_date, end_date):
+        rows = db.session.query(DailyRollup.day, DailyRollup.name, DailyRollup.value) \
+            .filter(DailyRollup.day >= start_date.date(), DailyRollup.day <= end_date.date()).all()
+        return cls(rows)
+
+    def monthly(self, entity, **dims):
+        """{'YYYY-MM': count} of `entity` rows created per month, restricted to `dims`."""
+        totals = Counter()
+        for day, row_entity, row_dims, value in self._rows:
+            if row_entity == entity and all(row_dims.get(k) == str(v) for k, v in dims.items()):
+                totals[day.strftime('%Y-%m')] += value
+        return totals
+
+
+def backfill_rollups(batch_size=10000):
+    """Recomputes all rollups by streaming creation dates and buckets from the base tables."""
+    totals = Counter()
+    for model, (_, dims) in ROLLUP_DIMENSIONS.items():
+        attrs = [attr for attr, _, _ in dims]
+        query = db.session.query(model.created_at, *(getattr(model, attr) for attr in attrs)) \
+            .filter(model.created_at.isnot(None))
+        for created_at, *values in query.yield_per(batch_size):
+            name = bucket_for_values(model, dict(zip(attrs, values)), ROLLUP_DIMENSIONS)
+            totals[(created_at.date(), name)] += 1
+
+    DailyRollup.query.delete()
+    db.session.bulk_insert_mappings(DailyRollup, [
+        {'day': day, 'name': name, 'value': value} for (day, name), value in totals.items()
+    ])
+    db.session.commit()
+    return totals
@@ -1,5 +1,7 @@
 # run.py
-from app import app
+from app import create_app
+
+app = create_app()
 
 if __name__ == '__main__':
     # Debug mode is controlled by FLASK_DEBUG in .env when using `flask run`
@@ -0,0 +1,92 @@
+# search.py
+"""Full-text influencer discovery backed by an SQLite FTS5 index.
+
+`influencer_search` is an FTS5 table keyed by users.id (its rowid) over influencer_name,
+niche and category. An after_flush hook rewrites an influencer's entry whenever one of
+those fields changes, so searches never scan the users table. Results are ranked by BM25
+relevance blended with a saturating reach bonus. On other database backends (no FTS5)
+search falls back to LIKE filtering.
+"""
+import re
+from sqlalchemy import DDL, event, func, inspect, literal_column, table, column, text, Integer
+from sqlalchemy.orm import Session
+
+from models import db, User
+
+INDEXED_FIELDS = ('influencer_name', 'niche', 'category')
+# BM25 column weights, in INDEXED_FIELDS order
+FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+# Reach adds up to REACH_WEIGHT to the relevance score, half of it at REACH_HALF_SATURATION
+REACH_WEIGHT = 1.0
+REACH_HALF_SATURATION = 10000.0
+
+search_table = table('influencer_search', column('rowid', Integer), *(column(f) for f in INDEXED_FIELDS))
+
+event.listen(db.metadata, 'after_create', DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS influencer_search USING fts5("
+    "influencer_name, niche, category, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+).execute_if(dialect='sqlite'))
+
+
+def fts_available(bind):
+    return bind.dialect.name == 'sqlite'
+
+def build_match_query(terms, field=None):
+    """FTS5 MATCH expression requiring every word of `terms` as a prefix, optionally in one field."""
+    words = re.findall(r'\w+', terms or '')
+    if not words:
+        return None
+    expression = ' '.join(f'"{word}"*' for word in words)
+    return f'{field} : ({expression})' if field else expression
+
+
+def _upsert_entries(connection, users):
+    connection.execute(text(
+        "INSERT OR REPLACE INTO influencer_search (rowid, influencer_name, niche, category) "
+        "VALUES (:id, :influencer_name, :niche, :category)"
+    ), [{'id': u.id, **{f: getattr(u, f) or '' for f in INDEXED_FIELDS}} for u in users])
+
+def _delete_entries(connection, user_ids):
+    connection.execute(text("DELETE FROM influencer_search WHERE rowid = :id"), [{'id': i} for i in user_ids])
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    changed = [obj for obj in session.new if isinstance(obj, User) and obj.role == 'influencer']
+    changed += [obj for obj in session.dirty if isinstance(obj, User) and obj.role == 'influencer'
+                and any(inspect(obj).attrs[f].history.has_changes() for f in INDEXED_FIELDS)]
+    removed = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if not (changed or removed) or not fts_available(session.get_bind()):
+        return
+    connection = session.connection()
+    if changed:
+        _upsert_entries(connection, changed)
+    if removed:
+        _delete_entries(connection, removed)
+
+
+def rebuild_search_index():
+    """Repopulates influencer_search from the users table. Returns the number of entries."""
+    db.session.execute(text("DELETE FROM influencer_search"))
+    result = db.session.execute(text(
+        "INSERT INTO influencer_search (rowid, influencer_name, niche, category) "
+        "SELECT id, COALESCE(influencer_name, ''), COALESCE(niche, ''), COALESCE(category, '') "
+        "FROM users WHERE role = 'influencer'"
+    ))
+    db.session.commit()
+    return result.rowcount
+
+
+def search_score():
+    """Relevance (negated BM25, higher is better) plus the reach bonus."""
+    relevance = -func.bm25(literal_column('influencer_search'), *FIELD_WEIGHTS)
+    reach = func.coalesce(User.reach, 0)
+    return (relevance + REACH_WEIGHT * reach * 1.0 / (reach + REACH_HALF_SATURATION)).label('score')
+
+def matching_influencers(query, match):
+    """Restricts a User query to FTS matches and adds a `score` column to each row."""
+    score = search_score()
+    query = query.add_columns(score) \
+        .join(search_table, search_table.c.rowid == User.id) \
+        .filter(literal_column('influencer_search').match(match))
+    return query, score
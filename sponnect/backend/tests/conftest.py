@@ -0,0 +1,69 @@
+# conftest.py
+"""Fixtures: an app on a migrated, file-backed SQLite database per test, and token helpers.
+
+A file (not :memory:) database is used so the configured engine profile, pool and
+cross-thread locking are the ones production runs with.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # The backend imports as top-level modules
+
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+
+from app import create_app
+from config import Config
+from models import db, User, Campaign, AdRequest
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        CACHE_TYPE = 'response_cache.LRUCache'
+        REPLICA_DATABASE_URL = None
+        EVENT_BROKER = 'memory'
+        DB_POOL_SIZE = 20
+    app = create_app(TestConfig)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def token_for(user):
+    """Access token for `user`; call inside the app context that loaded it."""
+    return create_access_token(identity=user.id, additional_claims={'role': user.role})
+
+def auth(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def negotiation(app):
+    """A sponsor, an influencer and a Negotiating ad request where it is the influencer's turn.
+    Returns (ad request id, sponsor token, influencer token)."""
+    with app.app_context():
+        sponsor = User(username='sponsor', email='sponsor@example.com', password_hash='x',
+                       role='sponsor', sponsor_approved=True, company_name='Acme')
+        influencer = User(username='influencer', email='influencer@example.com', password_hash='x',
+                          role='influencer', category='Tech', niche='Gadgets', reach=5000)
+        db.session.add_all([sponsor, influencer])
+        db.session.flush()
+        campaign = Campaign(name='Launch', budget=10000, visibility='public', sponsor_id=sponsor.id)
+        db.session.add(campaign)
+        db.session.flush()
+        ad_request = AdRequest(campaign_id=campaign.id, influencer_id=influencer.id, initiator_id=sponsor.id,
+                               requirements='One video', payment_amount=1000, status='Negotiating',
+                               last_offer_by='sponsor')
+        db.session.add(ad_request)
+        db.session.commit()
+        return ad_request.id, token_for(sponsor), token_for(influencer)
@@ -0,0 +1,97 @@
+# test_concurrency.py
+"""Optimistic concurrency on ad-request negotiation under real thread contention.
+
+Many threads act on one ad request at once through the HTTP routes. Every change must be
+a compare-and-swap on AdRequest.version, so exactly one step wins per version, losers get
+409 (or 400 once it is no longer their turn), and the negotiation history holds exactly
+one row per winning step.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from conftest import auth
+from models import db, AdRequest, NegotiationHistory
+
+THREADS = 16
+
+
+def _state(app, ad_request_id):
+    with app.app_context():
+        ad_request = db.session.get(AdRequest, ad_request_id)
+        history = NegotiationHistory.query.filter_by(ad_request_id=ad_request_id) \
+            .order_by(NegotiationHistory.id).all()
+        return ad_request.version, ad_request.status, ad_request.last_offer_by, ad_request.payment_amount, \
+            [(entry.user_role, entry.action, entry.payment_amount) for entry in history]
+
+
+def test_one_winner_per_version(app, negotiation):
+    ad_request_id, _, influencer_token = negotiation
+    start = threading.Barrier(THREADS)
+    actions = ['accept', 'reject', 'negotiate', 'negotiate']
+
+    def act(n):
+        client = app.test_client()
+        body = {'action': actions[n % len(actions)], 'payment_amount': 1000 + n, 'version': 1}
+        start.wait()
+        return n, client.patch(f'/api/influencer/ad_requests/{ad_request_id}', json=body,
+                               headers=auth(influencer_token)).status_code
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        results = list(pool.map(act, range(THREADS)))
+
+    winners = [n for n, status in results if status == 200]
+    assert len(winners) == 1, results
+    assert all(status in (400, 409) for n, status in results if n not in winners), results
+
+    version, status, last_offer_by, payment, history = _state(app, ad_request_id)
+    winner = winners[0]
+    assert version == 2
+    assert history == [('influencer', actions[winner % len(actions)], 1000 + winner)]
+    assert status == {'accept': 'Accepted', 'reject': 'Rejected', 'negotiate': 'Negotiating'}[actions[winner % len(actions)]]
+    if status == 'Negotiating':
+        assert (last_offer_by, payment) == ('influencer', 1000 + winner)
+
+
+def test_concurrent_counter_offers_keep_history_consistent(app, negotiation):
+    ad_request_id, sponsor_token, influencer_token = negotiation
+    rounds = 15
+    start = threading.Barrier(THREADS)
+    offers = iter(range(2000, 10 ** 6)) # Unique amounts, so every history row maps to one request
+    lock = threading.Lock()
+
+    def negotiate(n):
+        party = 'sponsor' if n % 2 else 'influencer'
+        client = app.test_client()
+        statuses = []
+        start.wait()
+        for _ in range(rounds):
+            version, _, last_offer_by, _, _ = _state(app, ad_request_id)
+            if last_offer_by == party:
+                continue # Not our turn yet
+            with lock:
+                amount = next(offers)
+            body = {'action': 'negotiate', 'payment_amount': amount, 'version': version}
+            if party == 'sponsor':
+                response = client.put(f'/api/sponsor/ad_requests/{ad_request_id}', json=body, headers=auth(sponsor_token))
+            else:
+                response = client.patch(f'/api/influencer/ad_requests/{ad_request_id}', json=body,
+                                        headers=auth(influencer_token))
+            statuses.append((party, amount, response.status_code))
+        return statuses
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        attempts = [attempt for statuses in pool.map(negotiate, range(THREADS)) for attempt in statuses]
+
+    assert all(status in (200, 400, 409) for _, _, status in attempts), attempts
+    won = [(party, amount) for party, amount, status in attempts if status == 200]
+    assert won, attempts # Some step succeeded, or the test raced nothing
+
+    version, status, last_offer_by, payment, history = _state(app, ad_request_id)
+    # One history row and one version bump per successful step, and nothing else
+    assert version == 1 + len(won) == 1 + len(history)
+    assert sorted(won) == sorted((role, amount) for role, _, amount in history)
+    # Turns strictly alternate, starting with the influencer answering the sponsor's offer
+    assert [role for role, _, _ in history] == ['influencer', 'sponsor'] * (len(history) // 2) + ['influencer'] * (len(history) % 2)
+    # The request reflects the last step
+    assert status == 'Negotiating'
+    assert (last_offer_by, payment) == (history[-1][0], history[-1][2])
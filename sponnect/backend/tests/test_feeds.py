@@ -0,0 +1,101 @@
+# test_feeds.py
+"""Influencer feeds: built and refreshed by refresh_feeds rounds, read-only on GET."""
+from conftest import auth, token_for
+from feeds import FEED_SIZE, refresh_feeds
+from models import db, User, Campaign, CampaignFeedEntry, CampaignFeedList
+
+
+def _seed(app, campaign_count):
+    with app.app_context():
+        sponsor = User(username='sponsor', email='sponsor@example.com', password_hash='x', role='sponsor')
+        influencer = User(username='influencer', email='influencer@example.com', password_hash='x',
+                          role='influencer', category='Tech', niche='Gadgets')
+        db.session.add_all([sponsor, influencer])
+        db.session.flush()
+        db.session.add_all(Campaign(name=f'Tech gadgets {n}' if n % 2 else f'Cooking {n}', budget=100 + n,
+                                    visibility='public', sponsor_id=sponsor.id) for n in range(campaign_count))
+        db.session.commit()
+        return influencer.id, token_for(influencer)
+
+def _feed(client, token, **params):
+    response = client.get('/api/influencer/feed', headers=auth(token), query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def _entry_count(app):
+    with app.app_context():
+        return CampaignFeedEntry.query.count()
+
+
+def test_get_reads_only_what_the_worker_built(app):
+    influencer_id, token = _seed(app, 10)
+    client = app.test_client()
+
+    data = _feed(client, token)
+    assert data['campaigns'] == [] and data['building']
+    assert _entry_count(app) == 0 # The GET computed and wrote nothing
+
+    with app.app_context():
+        assert refresh_feeds() == {'built': 1, 'refreshed': 0}
+    data = _feed(client, token)
+    assert not data['building']
+    scores = [campaign['score'] for campaign in data['campaigns']]
+    assert len(scores) == 10 and scores == sorted(scores, reverse=True)
+    assert all('Tech' in campaign['name'] for campaign in data['campaigns'][:5]) # Fit outranks budget
+
+
+def test_campaign_changes_reach_built_lists_on_the_next_round(app):
+    influencer_id, token = _seed(app, 4)
+    client = app.test_client()
+    with app.app_context():
+        refresh_feeds()
+        top = Campaign.query.get(_feed(client, token)['campaigns'][0]['id'])
+        top.is_flagged = True
+        db.session.add(Campaign(name='Tech gadgets launch', budget=10 ** 6, visibility='public', sponsor_id=top.sponsor_id))
+        db.session.commit()
+        flagged_id = top.id
+
+    ids = [campaign['id'] for campaign in _feed(client, token)['campaigns']]
+    assert flagged_id not in ids and len(ids) == 3 # Flag filtered at read; new campaign not yet scored
+
+    with app.app_context():
+        assert refresh_feeds()['refreshed'] == 1
+        refresh_feeds() # Re-reads the REFRESH_OVERLAP window; rescoring is idempotent
+    names = [campaign['name'] for campaign in _feed(client, token)['campaigns']]
+    assert names[0] == 'Tech gadgets launch' and len(names) == 4
+    assert _entry_count(app) == 4 # The flagged campaign left the list
+
+
+def test_lists_are_trimmed_and_paged(app):
+    influencer_id, token = _seed(app, FEED_SIZE + 20)
+    client = app.test_client()
+    with app.app_context():
+        refresh_feeds()
+        sponsor_id = User.query.filter_by(role='sponsor').one().id
+        db.session.add_all(Campaign(name=f'Tech gadgets extra {n}', budget=10 ** 6, visibility='public',
+                                    sponsor_id=sponsor_id) for n in range(5))
+        db.session.commit()
+        refresh_feeds()
+    assert _entry_count(app) == FEED_SIZE
+
+    seen, cursor = [], None
+    while True:
+        data = _feed(client, token, per_page=50, **({'cursor': cursor} if cursor else {}))
+        seen += [campaign['id'] for campaign in data['campaigns']]
+        cursor = data['pagination']['next_cursor']
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == FEED_SIZE
+
+
+def test_profile_change_rebuilds_the_list(app):
+    influencer_id, token = _seed(app, 6)
+    with app.app_context():
+        refresh_feeds()
+        influencer = db.session.get(User, influencer_id)
+        influencer.category, influencer.niche = 'Cooking', 'Recipes'
+        db.session.commit()
+        assert db.session.get(CampaignFeedList, influencer_id) is not None # Still served until rebuilt
+        assert refresh_feeds()['built'] == 1
+    top = _feed(app.test_client(), token)['campaigns'][0]
+    assert 'Cooking' in top['name']
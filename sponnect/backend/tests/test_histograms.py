@@ -0,0 +1,32 @@
+# test_histograms.py
+"""Single-pass histograms: edge parsing and bucket counts against per-bin COUNTs."""
+import math
+
+import pytest
+
+from histograms import bin_labels, histogram, parse_edges
+from models import db, User, Campaign
+
+
+@pytest.mark.parametrize('text', ['0,nan,10', 'nan,10', '0,nan', '0,inf,inf', 'inf,10', '0,-inf', '5', '10,0'])
+def test_parse_edges_rejects_bad_edges(text):
+    with pytest.raises(ValueError):
+        parse_edges(text)
+
+def test_parse_edges_allows_open_ends():
+    assert parse_edges('-inf,100,1000,inf') == [-math.inf, 100, 1000, math.inf]
+    assert bin_labels([-math.inf, 100, 1000, math.inf], '$') == ['Under $100', '$100-$1K', 'Over $1K']
+
+
+def test_histogram_matches_per_bin_counts(app):
+    budgets = [-5, 0, 999, 1000, 4999, 5000, 20000, 10 ** 6]
+    with app.app_context():
+        sponsor = User(username='sponsor', email='sponsor@example.com', password_hash='x', role='sponsor')
+        db.session.add(sponsor)
+        db.session.flush()
+        db.session.add_all(Campaign(name=f'C{n}', budget=budget, sponsor_id=sponsor.id) for n, budget in enumerate(budgets))
+        db.session.commit()
+        for edges in ([-math.inf, 0, 1000, 5000, math.inf], [0, 1000, 5000, 20000], [-math.inf, math.inf]):
+            expected = [Campaign.query.filter(Campaign.budget >= low, Campaign.budget < high).count()
+                        for low, high in zip(edges, edges[1:])]
+            assert histogram(Campaign.budget, edges, Campaign.query) == expected
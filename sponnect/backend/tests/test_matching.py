@@ -0,0 +1,68 @@
+# test_matching.py
+"""MatchIndex ranking: posting-list scores agree with the component formulas, including
+for rows reloaded after the posting lists were built."""
+import math
+import random
+
+from matching import MatchIndex, WEIGHTS, tokenize
+
+CATEGORIES = ['Tech', 'Cooking', 'Travel', 'Fitness', 'Fashion gadgets']
+NICHES = ['Gadgets', 'Recipes baking', 'Hiking trails', 'Running shoes', '', 'Street style photos']
+
+
+def _expected(profile, text, budget):
+    category, niche, reach, accepted, rejected, fee, eligible = profile
+    words = set(tokenize(text))
+    niche_tokens = list(dict.fromkeys(tokenize(niche)))[:4]
+    components = {
+        'category': float(any(token in words for token in list(dict.fromkeys(tokenize(category)))[:2])),
+        'niche': sum(token in words for token in niche_tokens) / max(1, len(niche_tokens)),
+        'reach': min(1.0, math.log1p(reach) / math.log1p(10_000_000)),
+        'acceptance': (accepted + 1) / (accepted + rejected + 2),
+        'payment': 0.5 if fee is None else min(1.0, budget / max(fee, 1.0)),
+    }
+    return sum(WEIGHTS[name] * value for name, value in components.items())
+
+def _profiles(rng, count):
+    return {user_id: (rng.choice(CATEGORIES), rng.choice(NICHES), rng.randrange(0, 10 ** 6),
+                      rng.randrange(5), rng.randrange(5), rng.choice([None, 50.0, 500.0, 5000.0]), rng.random() > 0.1)
+            for user_id in range(1, count + 1)}
+
+def _check(index, profiles, text, budget):
+    eligible = [user_id for user_id, profile in profiles.items() if profile[6]]
+    ranked = index._rank(text, budget, len(profiles))
+    assert sorted(user_id for user_id, _, _ in ranked) == sorted(eligible)
+    for user_id, score, components in ranked:
+        assert math.isclose(score, _expected(profiles[user_id], text, budget), abs_tol=1e-3)
+        assert math.isclose(score, sum(WEIGHTS[name] * value for name, value in components.items()), abs_tol=1e-3)
+    assert [score for _, score, _ in ranked] == sorted((score for _, score, _ in ranked), reverse=True)
+
+
+def test_scores_match_the_component_formulas():
+    rng = random.Random(7)
+    profiles = _profiles(rng, 300)
+    index = MatchIndex()
+    for user_id, profile in profiles.items():
+        index._set_row(user_id, *profile)
+    index._build_postings()
+    for text, budget in [('Tech gadgets launch', 1000), ('Baking recipes for cooking fans', 40), ('Nothing relevant', 0)]:
+        _check(index, profiles, text, budget)
+
+    # Changed and new rows are scored from their own tokens until the next rebuild
+    for user_id, profile in _profiles(rng, 320).items():
+        if user_id > 300 or user_id % 7 == 0:
+            profiles[user_id] = profile
+            index._set_row(user_id, *profile)
+    index._set_row(400, 'Knitting', 'Wool patterns', 100, 0, 0, None, True)
+    profiles[400] = ('Knitting', 'Wool patterns', 100, 0, 0, None, True)
+    assert index._changed
+    for text, budget in [('Tech gadgets launch', 1000), ('Knitting wool running', 300)]:
+        _check(index, profiles, text, budget)
+
+def test_top_k_only():
+    index = MatchIndex()
+    for user_id in range(1, 51):
+        index._set_row(user_id, 'Tech', 'Gadgets', user_id * 1000, 0, 0, None, True)
+    index._build_postings()
+    ranked = index._rank('tech', 0, 5)
+    assert [user_id for user_id, _, _ in ranked] == [50, 49, 48, 47, 46]
@@ -0,0 +1,40 @@
+# test_rollups.py
+"""Daily rollups: the flush hook against rows with and without a creation date."""
+from models import db, User, DailyRollup
+
+
+def _rollups():
+    return {(row.day, row.name): row.value for row in DailyRollup.query if row.value}
+
+
+def test_hook_tracks_role_changes_and_deletes(app):
+    with app.app_context():
+        user = User(username='someone', email='someone@example.com', password_hash='x', role='influencer')
+        db.session.add(user)
+        db.session.commit()
+        day = user.created_at.date()
+        assert _rollups() == {(day, 'user:role=influencer'): 1}
+
+        user.role = 'sponsor'
+        db.session.commit()
+        assert _rollups() == {(day, 'user:role=sponsor'): 1}
+
+        db.session.delete(user)
+        db.session.commit()
+        assert _rollups() == {}
+
+def test_rows_without_created_at_are_skipped(app):
+    with app.app_context():
+        user = User(username='legacy', email='legacy@example.com', password_hash='x', role='influencer')
+        db.session.add(user)
+        db.session.commit()
+        db.session.execute(User.__table__.update().values(created_at=None)) # As rows older than the default
+        DailyRollup.query.delete()
+        db.session.commit()
+
+        user = User.query.filter_by(username='legacy').one()
+        user.role = 'sponsor'
+        db.session.commit()
+        db.session.delete(user)
+        db.session.commit()
+        assert _rollups() == {}
@@ -0,0 +1,73 @@
+# test_statement_counts.py
+"""N+1 checks: the negotiation and ad-request lists run the same number of SQL statements
+(X-SQL-Statement-Count) whether a page holds N or 10*N ad requests with history."""
+import pytest
+
+from conftest import auth, token_for
+from models import db, User, Campaign, AdRequest, NegotiationHistory
+
+N = 5
+
+
+def _user(name, role, **fields):
+    user = User(username=name, email=f'{name}@example.com', password_hash='x', role=role, **fields)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def _ad_request(campaign, sponsor, influencer):
+    """A negotiating ad request with an offer from each side, so the latest-history join
+    and its user have work to do."""
+    ad_request = AdRequest(campaign_id=campaign.id, influencer_id=influencer.id, initiator_id=sponsor.id,
+                           requirements='One post', payment_amount=1000, status='Negotiating', last_offer_by='influencer')
+    db.session.add(ad_request)
+    db.session.flush()
+    db.session.add_all([
+        NegotiationHistory(ad_request_id=ad_request.id, user_id=sponsor.id, user_role='sponsor', action='propose',
+                           payment_amount=1000),
+        NegotiationHistory(ad_request_id=ad_request.id, user_id=influencer.id, user_role='influencer', action='counter',
+                           payment_amount=1200),
+    ])
+
+def _seed(app, tag, count):
+    """A sponsor with `count` ad requests to distinct influencers on one campaign, and an
+    influencer with `count` ad requests from distinct sponsors. Returns the campaign id and
+    both tokens."""
+    with app.app_context():
+        sponsor = _user(f'sponsor_{tag}', 'sponsor', sponsor_approved=True, company_name=tag)
+        influencer = _user(f'influencer_{tag}', 'influencer', category='Tech', niche='Gadgets')
+        campaign = Campaign(name=f'Campaign {tag}', budget=10000, visibility='public', sponsor_id=sponsor.id)
+        db.session.add(campaign)
+        db.session.flush()
+        for n in range(count):
+            _ad_request(campaign, sponsor, _user(f'influencer_{tag}_{n}', 'influencer'))
+            other = _user(f'sponsor_{tag}_{n}', 'sponsor', sponsor_approved=True, company_name=f'{tag} {n}')
+            other_campaign = Campaign(name=f'Campaign {tag} {n}', budget=5000, visibility='public', sponsor_id=other.id)
+            db.session.add(other_campaign)
+            db.session.flush()
+            _ad_request(other_campaign, other, influencer)
+        db.session.commit()
+        return campaign.id, token_for(sponsor), token_for(influencer)
+
+def _statements(client, url, token, key, count):
+    response = client.get(url, headers=auth(token), query_string={'per_page': 100})
+    assert response.status_code == 200
+    assert len(response.get_json()[key]) == count
+    return int(response.headers['X-SQL-Statement-Count'])
+
+
+@pytest.mark.parametrize('endpoint', ['influencer_negotiations', 'negotiation_summary', 'sponsor_ad_requests'])
+def test_statement_count_does_not_grow_with_the_page(app, endpoint):
+    app.config['SQL_STATEMENT_COUNT_HEADER'] = True
+    client = app.test_client()
+    counts = []
+    for tag, count in (('small', N), ('large', 10 * N)):
+        campaign_id, sponsor_token, influencer_token = _seed(app, tag, count)
+        url, token, key = {
+            'influencer_negotiations': ('/api/influencer/negotiations', influencer_token, 'negotiations'),
+            'negotiation_summary': (f'/api/sponsor/campaigns/{campaign_id}/negotiation_summary', sponsor_token,
+                                    'negotiations'),
+            'sponsor_ad_requests': ('/api/sponsor/ad_requests', sponsor_token, 'ad_requests'),
+        }[endpoint]
+        counts.append(_statements(client, url, token, key, count))
+    assert counts[0] == counts[1], f"{counts[0]} statements for {N} rows, {counts[1]} for {10 * N}"
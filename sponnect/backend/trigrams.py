@@ -0,0 +1,88 @@
+# trigrams.py
+"""Trigram (3-gram) inverted index for the admin user search.
+
+Each user's username, company_name and influencer_name are split into padded trigrams
+(pg_trgm style: '  ab', ' abc', 'bc '...) stored in user_trigrams. A search looks up the
+trigrams of the term through the primary key and ranks users by how many they share, so
+misspelt terms still match and no LIKE scan of the users table is needed. An after_flush
+hook keeps the index current on register and profile updates.
+"""
+import math
+import re
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from models import db, User, UserTrigram
+
+INDEXED_FIELDS = ('username', 'company_name', 'influencer_name')
+# Fraction of the term's trigrams a user must share to count as a match
+MIN_SIMILARITY = 0.4
+
+
+def trigrams(value):
+    """Set of padded, lower-cased trigrams of every word in `value`."""
+    grams = set()
+    for word in re.findall(r'\w+', (value or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def user_trigrams(user):
+    grams = set()
+    for field in INDEXED_FIELDS:
+        grams |= trigrams(getattr(user, field))
+    return grams
+
+
+def _reindex(connection, users):
+    table = UserTrigram.__table__
+    ids = [user.id for user in users]
+    connection.execute(table.delete().where(table.c.user_id.in_(ids)))
+    rows = [{'trigram': gram, 'user_id': user.id} for user in users for gram in user_trigrams(user)]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_trigram_index(session, flush_context):
+    changed = [obj for obj in session.new if isinstance(obj, User)]
+    changed += [obj for obj in session.dirty if isinstance(obj, User)
+                and any(inspect(obj).attrs[f].history.has_changes() for f in INDEXED_FIELDS)]
+    removed = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if changed:
+        _reindex(session.connection(), changed)
+    if removed:
+        table = UserTrigram.__table__
+        session.connection().execute(table.delete().where(table.c.user_id.in_(removed)))
+
+
+def trigram_matches(term, min_similarity=MIN_SIMILARITY):
+    """Subquery of (user_id, hits) for users sharing enough trigrams with `term`, or None if
+    the term has no searchable characters."""
+    grams = trigrams(term)
+    if not grams:
+        return None
+    needed = max(1, math.ceil(len(grams) * min_similarity))
+    return db.session.query(UserTrigram.user_id.label('user_id'), func.count().label('hits')) \
+        .filter(UserTrigram.trigram.in_(grams)) \
+        .group_by(UserTrigram.user_id) \
+        .having(func.count() >= needed) \
+        .subquery()
+
+
+def rebuild_trigram_index(batch_size=1000):
+    """Rebuilds user_trigrams from the users table. Returns the number of users indexed."""
+    UserTrigram.query.delete()
+    connection = db.session.connection()
+    batch, indexed = [], 0
+    for user in User.query.yield_per(batch_size):
+        batch.append(user)
+        if len(batch) >= batch_size:
+            _reindex(connection, batch)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        _reindex(connection, batch)
+        indexed += len(batch)
+    db.session.commit()
+    return indexed
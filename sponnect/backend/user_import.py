@@ -0,0 +1,167 @@
+# user_import.py
+"""Bulk import of influencers and sponsors from CSV or NDJSON.
+
+The file is parsed lazily and handled IMPORT_BATCH_SIZE rows at a time, so memory depends
+on the batch size, not the file size. Per batch: rows are validated with the same rules as
+/api/register and de-duplicated within the batch, usernames and emails already in the
+database are found with one IN query each, passwords are hashed in parallel on the
+password pool, and the users are flushed together and committed. Going through the ORM
+keeps the counter, rollup and search-index hooks in step; each hook writes its rows for
+the whole batch at once. Every rejected row is reported with its row number and reason.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User
+from passwords import hash_passwords
+
+IMPORT_BATCH_SIZE = 500
+ROLES = ('influencer', 'sponsor')
+PROFILE_FIELDS = {
+    'influencer': ('influencer_name', 'category', 'niche', 'reach'),
+    'sponsor': ('company_name', 'industry'),
+}
+
+
+def read_rows(stream, fmt):
+    """Dicts from a text stream of CSV (with a header row) or NDJSON. Unparsable NDJSON lines
+    yield None so they are rejected rather than aborting the import."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+def format_for(filename, default='csv'):
+    """'csv' or 'ndjson' from a file name's extension."""
+    name = (filename or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv' if name.endswith('.csv') else default
+
+
+def _text(row, field):
+    value = row.get(field)
+    return str(value).strip() if value not in (None, '') else None
+
+def validate(row):
+    """(User fields, password) for a valid row, or (None, reason)."""
+    if row is None:
+        return None, "Unparsable row"
+    username, email, password = _text(row, 'username'), _text(row, 'email'), row.get('password')
+    if not username or not password or not email:
+        return None, "Username, email, and password are required"
+    role = _text(row, 'role') or 'influencer'
+    if role not in ROLES:
+        return None, "Invalid role"
+    fields = {'username': username, 'email': email, 'role': role}
+    for field in PROFILE_FIELDS[role]:
+        fields[field] = _text(row, field)
+    if role == 'influencer' and fields['reach'] is not None:
+        try: fields['reach'] = int(fields['reach'])
+        except ValueError: return None, "Invalid reach"
+    if role == 'sponsor':
+        fields['sponsor_approved'] = False # Requires approval, as on register
+    return (fields, str(password)), None
+
+
+class ImportStats:
+    def __init__(self):
+        self.processed = self.imported = self.rejected = 0
+        self.started = time.monotonic()
+
+    @property
+    def rows_per_second(self):
+        elapsed = time.monotonic() - self.started
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self):
+        return {'processed': self.processed, 'imported': self.imported, 'rejected': self.rejected,
+                'rows_per_second': round(self.rows_per_second, 1)}
+
+
+def _existing(column, values):
+    return {value for (value,) in db.session.query(column).filter(column.in_(values))} if values else set()
+
+def _split_taken(candidates):
+    """(candidates whose username and email are free, [(number, fields, reason)] for the rest)."""
+    taken_usernames = _existing(User.username, [fields['username'] for _, fields, _ in candidates])
+    taken_emails = _existing(User.email, [fields['email'] for _, fields, _ in candidates])
+    free, rejected = [], []
+    for number, fields, secret in candidates:
+        if fields['username'] in taken_usernames:
+            rejected.append((number, fields, "Username already exists"))
+        elif fields['email'] in taken_emails:
+            rejected.append((number, fields, "Email already exists"))
+        else:
+            free.append((number, fields, secret))
+    return free, rejected
+
+def _insert(candidates):
+    db.session.add_all([User(password_hash=password_hash, **fields) for _, fields, password_hash in candidates])
+    db.session.commit()
+
+def _import_batch(batch, stats, reject):
+    candidates, usernames, emails = [], set(), set()
+    for number, row in batch:
+        parsed, reason = validate(row)
+        if parsed is None:
+            reject(number, row, reason)
+            continue
+        fields, password = parsed
+        if fields['username'] in usernames:
+            reject(number, fields, "Duplicate username in file")
+        elif fields['email'] in emails:
+            reject(number, fields, "Duplicate email in file")
+        else:
+            usernames.add(fields['username'])
+            emails.add(fields['email'])
+            candidates.append((number, fields, password))
+
+    # Only rows that can still be inserted are worth hashing
+    candidates, rejected = _split_taken(candidates)
+    hashes = hash_passwords([password for _, _, password in candidates])
+    candidates = [(number, fields, password_hash)
+                  for (number, fields, _), password_hash in zip(candidates, hashes)]
+    try:
+        _insert(candidates)
+    except IntegrityError:
+        # A concurrent registration took a name after the lookup; check again once
+        db.session.rollback()
+        candidates, late = _split_taken(candidates)
+        rejected += late
+        _insert(candidates)
+    stats.imported += len(candidates)
+    for number, fields, reason in rejected:
+        reject(number, fields, reason)
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE, on_reject=None, on_progress=None):
+    """Imports an iterable of row dicts. `on_reject(number, row, reason)` is called per
+    rejected row (passwords removed) and `on_progress(stats)` after every batch."""
+    stats = ImportStats()
+
+    def reject(number, row, reason):
+        stats.rejected += 1
+        if on_reject:
+            on_reject(number, {k: v for k, v in (row or {}).items() if k != 'password'}, reason)
+
+    numbered = enumerate(rows, 1)
+    while True:
+        batch = list(islice(numbered, batch_size))
+        if not batch:
+            break
+        _import_batch(batch, stats, reject)
+        stats.processed += len(batch)
+        if on_progress:
+            on_progress(stats)
+    return stats
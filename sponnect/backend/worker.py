@@ -0,0 +1,63 @@
+# worker.py
+"""Celery worker for the notification outbox and the influencer feeds.
+
+    celery -A worker worker -B --loglevel=info
+
+Beat runs `deliver_notifications` every NOTIFICATION_DIGEST_SECONDS / 4, so a digest goes
+out at most a quarter window after it is due, and `maintain_feeds` every
+FEED_REFRESH_SECONDS. The default broker is Celery's filesystem
+transport (CELERY_BROKER_FOLDER), so no Redis or RabbitMQ is needed locally; set
+CELERY_BROKER_URL to use one. Without Celery, `flask process-notifications --loop` does
+the same job, as does `flask refresh-feeds --loop` for the feeds.
+"""
+import os
+
+from celery import Celery
+
+import feeds
+import notifications
+from app import create_app
+
+flask_app = create_app()
+config = flask_app.config
+
+celery = Celery('sponnect', broker=config['CELERY_BROKER_URL'])
+if config['CELERY_BROKER_URL'] == 'filesystem://':
+    folder = config['CELERY_BROKER_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    celery.conf.broker_transport_options = {'data_folder_in': folder, 'data_folder_out': folder}
+celery.conf.beat_schedule = {
+    'deliver-notifications': {
+        'task': 'worker.deliver_notifications',
+        'schedule': max(1, config['NOTIFICATION_DIGEST_SECONDS'] / 4),
+    },
+    'maintain-feeds': {
+        'task': 'worker.maintain_feeds',
+        'schedule': max(1, config['FEED_REFRESH_SECONDS']),
+    },
+}
+
+
+@celery.task
+def deliver_notifications():
+    """Delivers due digests until none are left (or one round found nothing to send)."""
+    with flask_app.app_context():
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        while True:
+            result = notifications.process_outbox()
+            for key, value in result.items():
+                totals[key] += value
+            if not any(result.values()):
+                return totals
+
+@celery.task
+def maintain_feeds():
+    """Runs feed rounds until one has nothing left to build."""
+    with flask_app.app_context():
+        totals = {'built': 0, 'refreshed': 0}
+        while True:
+            result = feeds.refresh_feeds()
+            for key, value in result.items():
+                totals[key] += value
+            if not result['built']:
+                return totals
@@ -4,6 +4,11 @@ import { useToast } from 'vue-toastification';
 const state = {
   influencerRequests: [],
   sponsorRequests: [],
+  // next_cursor of the last page loaded (null: no more pages) and the filters it belongs to
+  influencerCursor: null,
+  influencerFilters: {},
+  sponsorCursor: null,
+  sponsorFilters: {},
   currentRequest: null,
   negotiationHistory: []
 };
@@ -15,6 +20,20 @@ const mutations = {
   SET_SPONSOR_REQUESTS(state, requests) {
     state.sponsorRequests = requests;
   },
+  APPEND_INFLUENCER_REQUESTS(state, requests) {
+    state.influencerRequests = state.influencerRequests.concat(requests);
+  },
+  APPEND_SPONSOR_REQUESTS(state, requests) {
+    state.sponsorRequests = state.sponsorRequests.concat(requests);
+  },
+  SET_INFLUENCER_CURSOR(state, { cursor, filters }) {
+    state.influencerCursor = cursor;
+    state.influencerFilters = filters;
+  },
+  SET_SPONSOR_CURSOR(state, { cursor, filters }) {
+    state.sponsorCursor = cursor;
+    state.sponsorFilters = filters;
+  },
   SET_CURRENT_REQUEST(state, request) {
     state.currentRequest = request;
   },
@@ -56,15 +75,32 @@ const actions = {
     try {
       const params = statusFilter ? { status: statusFilter } : {};
       const response = await axios.get('/influencer/ad_requests', { params });
-      commit('SET_INFLUENCER_REQUESTS', response.data);
+      commit('SET_INFLUENCER_REQUESTS', response.data.ad_requests);
+      commit('SET_INFLUENCER_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, filters: params });
       dispatch('ui/setLoading', false, { root: true });
-      return response.data;
+      return response.data.ad_requests;
     } catch (error) {
       toast.error(error.response?.data?.message || 'Failed to load ad requests.');
       dispatch('ui/setLoading', false, { root: true });
       return [];
     }
   },
+
+  // Appends the next page of the last fetchInfluencerRequests; returns the new items
+  async loadMoreInfluencerRequests({ commit, state }) {
+    if (!state.influencerCursor) return [];
+    const toast = useToast();
+    try {
+      const params = { ...state.influencerFilters, cursor: state.influencerCursor };
+      const response = await axios.get('/influencer/ad_requests', { params });
+      commit('APPEND_INFLUENCER_REQUESTS', response.data.ad_requests);
+      commit('SET_INFLUENCER_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, filters: state.influencerFilters });
+      return response.data.ad_requests;
+    } catch (error) {
+      toast.error(error.response?.data?.message || 'Failed to load more ad requests.');
+      return [];
+    }
+  },
   
   async influencerActionRequest({ commit, dispatch }, { requestId, action, data }) {
     const toast = useToast();
@@ -89,15 +125,32 @@ const actions = {
     dispatch('ui/setLoading', true, { root: true });
     try {
       const response = await axios.get('/sponsor/ad_requests', { params: filters });
-      commit('SET_SPONSOR_REQUESTS', response.data);
+      commit('SET_SPONSOR_REQUESTS', response.data.ad_requests);
+      commit('SET_SPONSOR_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, filters });
       dispatch('ui/setLoading', false, { root: true });
-      return response.data;
+      return response.data.ad_requests;
     } catch (error) {
       toast.error(error.response?.data?.message || 'Failed to load ad requests.');
       dispatch('ui/setLoading', false, { root: true });
       return [];
     }
   },
+
+  // Appends the next page of the last fetchSponsorRequests; returns the new items
+  async loadMoreSponsorRequests({ commit, state }) {
+    if (!state.sponsorCursor) return [];
+    const toast = useToast();
+    try {
+      const params = { ...state.sponsorFilters, cursor: state.sponsorCursor };
+      const response = await axios.get('/sponsor/ad_requests', { params });
+      commit('APPEND_SPONSOR_REQUESTS', response.data.ad_requests);
+      commit('SET_SPONSOR_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, filters: state.sponsorFilters });
+      return response.data.ad_requests;
+    } catch (error) {
+      toast.error(error.response?.data?.message || 'Failed to load more ad requests.');
+      return [];
+    }
+  },
   
   async createAdRequest({ commit, dispatch }, { campaignId, requestData }) {
     const toast = useToast();
@@ -168,6 +221,8 @@ const actions = {
 const getters = {
   influencerRequests: state => state.influencerRequests,
   sponsorRequests: state => state.sponsorRequests,
+  hasMoreInfluencerRequests: state => state.influencerCursor !== null,
+  hasMoreSponsorRequests: state => state.sponsorCursor !== null,
   currentRequest: state => state.currentRequest,
   negotiationHistory: state => state.negotiationHistory,
   getPendingRequests: state => (role) => {
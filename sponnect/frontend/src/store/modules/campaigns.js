@@ -4,7 +4,10 @@ import { useToast } from 'vue-toastification';
 const state = {
   campaigns: [],
   currentCampaign: null,
-  publicCampaigns: []
+  publicCampaigns: [],
+  // next_cursor of the last feed page loaded (null: no more pages) and the filters it belongs to
+  feedCursor: null,
+  feedParams: {}
 };
 
 const mutations = {
@@ -34,6 +37,13 @@ const mutations = {
   },
   SET_PUBLIC_CAMPAIGNS(state, campaigns) {
     state.publicCampaigns = campaigns;
+  },
+  APPEND_PUBLIC_CAMPAIGNS(state, campaigns) {
+    state.publicCampaigns = state.publicCampaigns.concat(campaigns);
+  },
+  SET_FEED_CURSOR(state, { cursor, params }) {
+    state.feedCursor = cursor;
+    state.feedParams = params;
   }
 };
 
@@ -133,6 +143,30 @@ const actions = {
     }
   },
   
+  async getAvailableCampaigns({ commit }, params = {}) {
+    // First page ranked for the logged-in influencer; loadMoreAvailableCampaigns for the rest
+    const response = await axios.get('/influencer/feed', { params });
+    commit('SET_PUBLIC_CAMPAIGNS', response.data.campaigns);
+    commit('SET_FEED_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, params });
+    return response.data.campaigns;
+  },
+
+  // Appends the next page of the last getAvailableCampaigns; returns the new items
+  async loadMoreAvailableCampaigns({ commit, state }) {
+    if (!state.feedCursor) return [];
+    const toast = useToast();
+    try {
+      const params = { ...state.feedParams, cursor: state.feedCursor };
+      const response = await axios.get('/influencer/feed', { params });
+      commit('APPEND_PUBLIC_CAMPAIGNS', response.data.campaigns);
+      commit('SET_FEED_CURSOR', { cursor: response.data.pagination?.next_cursor ?? null, params: state.feedParams });
+      return response.data.campaigns;
+    } catch (error) {
+      toast.error(error.response?.data?.message || 'Failed to load more campaigns.');
+      return [];
+    }
+  },
+
   async applyCampaign({ dispatch }, { campaignId, applicationData }) {
     const toast = useToast();
     dispatch('ui/setLoading', true, { root: true });
@@ -153,6 +187,7 @@ const getters = {
   allCampaigns: state => state.campaigns,
   currentCampaign: state => state.currentCampaign,
   publicCampaigns: state => state.publicCampaigns,
+  hasMoreAvailableCampaigns: state => state.feedCursor !== null,
   getCampaignById: state => id => state.campaigns.find(campaign => campaign.id === id)
 };
 